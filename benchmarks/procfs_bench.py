@@ -0,0 +1,42 @@
+"""
+Micro-benchmark of the collectors' procfs fast path against psutil.
+
+    python -m benchmarks.procfs_bench [iterations]
+"""
+import sys
+import timeit
+
+import psutil
+
+from nas_monitor.utils.network import is_monitored_nic
+from nas_monitor.utils.procfs import CpuUsage, MemInfo, NetDev
+
+
+def psutil_net_totals():
+    sent = recv = 0
+    for nic, io in psutil.net_io_counters(pernic=True).items():
+        if is_monitored_nic(nic):
+            sent += io.bytes_sent
+            recv += io.bytes_recv
+    return sent, recv
+
+
+def main(iterations: int = 20000):
+    cpu_usage = CpuUsage()
+    mem_info = MemInfo()
+    net_dev = NetDev(nic_filter=is_monitored_nic)
+    psutil.cpu_percent(interval=None)
+    cases = [
+        ("cpu percent", lambda: psutil.cpu_percent(interval=None), cpu_usage.percent),
+        ("memory", psutil.virtual_memory, mem_info.read),
+        ("network totals", psutil_net_totals, net_dev.totals),
+    ]
+    print(f"{'case':<16}{'psutil, us':>12}{'procfs, us':>12}{'speedup':>10}")
+    for name, slow, fast in cases:
+        slow_us = min(timeit.repeat(slow, number=iterations, repeat=3)) / iterations * 1e6
+        fast_us = min(timeit.repeat(fast, number=iterations, repeat=3)) / iterations * 1e6
+        print(f"{name:<16}{slow_us:>12.2f}{fast_us:>12.2f}{slow_us / fast_us:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20000)
@@ -0,0 +1,104 @@
+"""
+Disk footprint and range read throughput of raw samples stored as rows (RawMetric)
+and as compressed blocks (RawBlock).
+
+    python -m benchmarks.raw_blocks_bench [series] [hours]
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+from tortoise import Tortoise
+
+from nas_monitor.blocks import raw_blocks
+from nas_monitor.config import config
+from nas_monitor.metrics import fetch_metrics_columns
+from nas_monitor.models import init_db, disconnect_db
+from nas_monitor.partitions import raw_partitions
+
+# samples per series and hour (one every 5 seconds)
+SAMPLES_PER_HOUR = 720
+
+
+def series_values(kind: int, count: int, rnd: np.random.Generator) -> np.ndarray:
+    """Shapes of real series: steady (total_gb, health), stepping (temperatures), noisy (load)"""
+    if kind == 0:
+        return np.repeat(rnd.uniform(100, 4000, count // 2000 + 1).round(2), 2000)[:count]
+    if kind == 1:
+        return (40 + np.cumsum(rnd.choice([-1, 0, 0, 0, 0, 0, 0, 0, 0, 1], count))).astype(float)
+    return rnd.uniform(0, 100, count).round(1)
+
+
+async def seed(series_count: int, hours: int) -> tuple[datetime, datetime]:
+    conn = Tortoise.get_connection("default")
+    rnd = np.random.default_rng(1)
+    for i in range(series_count):
+        await conn.execute_insert("INSERT INTO device (name, type, enabled) VALUES (?, 'cpu', 1)", [f"dev{i}"])
+        await conn.execute_insert("INSERT INTO series (device_id, label) VALUES (?, 'load')", [i + 1])
+    start = int((datetime.now(timezone.utc) - timedelta(hours=hours + 1)).timestamp()) // 3600 * 3600
+    count = hours * SAMPLES_PER_HOUR
+    # collector ticks with some jitter
+    ts = start + np.arange(count) * (3600 // SAMPLES_PER_HOUR) + rnd.choice([0, 0, 0, 1], count)
+    for series_id in range(1, series_count + 1):
+        values = series_values(series_id % 3, count, rnd)
+        await conn.execute_many(
+            "INSERT INTO rawmetric (series_id, ts, value) VALUES (?, ?, ?)",
+            [[series_id, int(t), float(v)] for t, v in zip(ts, values)]
+        )
+    return datetime.fromtimestamp(start, timezone.utc), datetime.fromtimestamp(start + hours * 3600, timezone.utc)
+
+
+async def database_size(path: str) -> int:
+    conn = Tortoise.get_connection("default")
+    await conn.execute_script("VACUUM")
+    await conn.execute_query("PRAGMA wal_checkpoint(TRUNCATE)")
+    return os.path.getsize(path)
+
+
+async def read_throughput(start: datetime, end: datetime, repeat: int = 3) -> tuple[float, int]:
+    """Best time (s) of reading the whole range of all series, and the number of samples"""
+    best, samples = None, 0
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = await fetch_metrics_columns("raw", start_time=start, end_time=end)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+        samples = sum(len(item["t"]) for item in result)
+    return best, samples
+
+
+async def main(series_count: int = 30, hours: int = 24):
+    print(f"{series_count} series x {hours} hours of raw samples, {SAMPLES_PER_HOUR} per hour")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.sqlite3")
+        config.DB_PATH = f"sqlite://{path}"
+        config.DB_READ_POOL_SIZE = 0
+        await init_db()
+        try:
+            start, end = await seed(series_count, hours)
+            rows_size = await database_size(path)
+            rows_time, samples = await read_throughput(start, end)
+
+            started = time.perf_counter()
+            blocks = await raw_blocks.compact()
+            compact_time = time.perf_counter() - started
+            # drop the rows: the whole range is served from blocks
+            await Tortoise.get_connection("default").execute_query(f'DELETE FROM "{raw_partitions.hot}"')
+            blocks_size = await database_size(path)
+            blocks_time, block_samples = await read_throughput(start, end)
+            assert block_samples == samples
+        finally:
+            await disconnect_db()
+
+    print(f"compaction: {blocks} blocks in {compact_time:.2f} s")
+    print(f"{'storage':<10}{'file, MiB':>12}{'bytes/sample':>14}{'read, s':>10}{'samples/s':>14}")
+    for name, size, elapsed in (("rows", rows_size, rows_time), ("blocks", blocks_size, blocks_time)):
+        print(f"{name:<10}{size / 2 ** 20:>12.2f}{size / samples:>14.2f}{elapsed:>10.3f}{samples / elapsed:>14,.0f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main(*(int(arg) for arg in sys.argv[1:3])))
@@ -0,0 +1,82 @@
+"""
+Latency of API reads while raw -> hourly aggregation is running,
+with reads on the writer connection (pool size 0) and on the read-only pool.
+
+    python -m benchmarks.sqlite_read_bench [series] [hours]
+"""
+import asyncio
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+from tortoise import Tortoise
+
+from nas_monitor.aggregation import run_aggregation
+from nas_monitor.config import config
+from nas_monitor.metrics import fetch_metrics_data
+from nas_monitor.models import HourlyMetric, RawMetric, init_db, disconnect_db
+
+# samples per series and hour (one every 5 seconds)
+SAMPLES_PER_HOUR = 720
+
+
+async def seed(series_count: int, hours: int):
+    conn = Tortoise.get_connection("default")
+    for i in range(series_count):
+        await conn.execute_insert("INSERT INTO device (name, type, enabled) VALUES (?, 'cpu', 1)", [f"dev{i}"])
+        await conn.execute_insert("INSERT INTO series (device_id, label) VALUES (?, 'load')", [i + 1])
+    start = int((datetime.now(timezone.utc) - timedelta(hours=hours + 1)).timestamp())
+    step = 3600 // SAMPLES_PER_HOUR
+    for hour in range(hours):
+        rows = [
+            [series_id, start + hour * 3600 + n * step, float(n % 100)]
+            for series_id in range(1, series_count + 1)
+            for n in range(SAMPLES_PER_HOUR)
+        ]
+        await conn.execute_many("INSERT INTO rawmetric (series_id, ts, value) VALUES (?, ?, ?)", rows)
+
+
+async def read_latencies(until: asyncio.Future) -> list[float]:
+    """Latency (ms) of the last-hour dashboard query, repeated until the future is done"""
+    latencies = []
+    while not until.done():
+        started = time.perf_counter()
+        await fetch_metrics_data("raw", device_names=["dev0"], start_time=datetime.now(timezone.utc) - timedelta(hours=2))
+        latencies.append((time.perf_counter() - started) * 1000)
+        await asyncio.sleep(0)
+    return latencies
+
+
+async def run(pool_size: int, series_count: int, hours: int) -> tuple[float, float, float, int]:
+    with tempfile.TemporaryDirectory() as tmp:
+        config.DB_PATH = f"sqlite://{tmp}/bench.sqlite3"
+        config.DB_READ_POOL_SIZE = pool_size
+        await init_db()
+        try:
+            await seed(series_count, hours)
+            started = time.perf_counter()
+            aggregation = asyncio.ensure_future(
+                run_aggregation(RawMetric, HourlyMetric, "raw_to_hourly", 60)
+            )
+            latencies = await read_latencies(aggregation)
+            elapsed = time.perf_counter() - started
+        finally:
+            await disconnect_db()
+    latencies.sort()
+    p95 = latencies[int(len(latencies) * 0.95)] if latencies else 0
+    return statistics.median(latencies) if latencies else 0, p95, elapsed, len(latencies)
+
+
+async def main(series_count: int = 20, hours: int = 24):
+    print(f"{series_count} series x {hours} hours of raw samples, reads during aggregation")
+    print(f"{'read connections':<20}{'p50, ms':>10}{'p95, ms':>10}{'reads':>8}{'aggregation, s':>16}")
+    for pool_size in (0, config.DB_READ_POOL_SIZE or 4):
+        p50, p95, elapsed, count = await run(pool_size, series_count, hours)
+        name = "writer" if pool_size == 0 else f"pool of {pool_size}"
+        print(f"{name:<20}{p50:>10.2f}{p95:>10.2f}{count:>8}{elapsed:>16.2f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main(*(int(arg) for arg in sys.argv[1:3])))
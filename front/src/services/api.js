@@ -22,9 +22,11 @@ class ApiClient {
     /**
      * Get metrics with time range filtering
      * @param {Object} params - Query parameters
-     * @param {string} params.history_type - 'raw', 'daily', or 'history'
+     * @param {string} params.history_type - 'raw', 'hourly', 'history' or 'auto'
      * @param {string[]} params.device_types - Optional device types filter
      * @param {number} params.hours - Get metrics for last N hours
+     * @param {number} params.max_points - Optional points budget per series
+     * @param {number} params.since - Optional cursor from previous response, only newer rows are returned
      */
     async getMetrics(params) {
         const queryParams = new URLSearchParams();
@@ -36,7 +38,9 @@ class ApiClient {
         if (params.device_names) {
             params.device_names.forEach(name => queryParams.append('device_names', name));
         }
-        if (params.hours !== undefined) queryParams.append('hours', params.hours);
+        if (params.hours !== undefined && params.hours !== null) queryParams.append('hours', params.hours);
+        if (params.max_points) queryParams.append('max_points', params.max_points);
+        if (params.since !== undefined && params.since !== null) queryParams.append('since', params.since);
 
         const response = await fetch(`${API_BASE}/api/metrics?${queryParams}`);
         if (!response.ok) throw new Error('Failed to fetch metrics');
@@ -58,6 +62,18 @@ class ApiClient {
         return response.json();
     }
 
+    /**
+     * Open live updates socket
+     * @param {Object} filter - Optional device_types / device_names filter
+     */
+    openLive(filter = {}) {
+        const queryParams = new URLSearchParams();
+        (filter.device_types || []).forEach(type => queryParams.append('device_types', type));
+        (filter.device_names || []).forEach(name => queryParams.append('device_names', name));
+        const wsBase = API_BASE.replace(/^http/, 'ws');
+        return new WebSocket(`${wsBase}/api/ws/live?${queryParams}`);
+    }
+
     /**
      * Get all registered devices
      */
@@ -7,6 +7,7 @@ export const useDeviceStore = defineStore('devices', () => {
     const inventory = ref(null);
     const configData = ref(null);
     const metrics = ref({});
+    const metricsCursor = ref(null);
     const detailMetrics = ref([]);
     const selectedDevice = ref(null);
     const allDevices = ref([]);
@@ -17,9 +18,6 @@ export const useDeviceStore = defineStore('devices', () => {
     const loading = ref(false);
     const error = ref(null);
 
-    // Polling timers
-    const pollingTimers = ref({});
-
     // Getters
     const zpools = computed(() => inventory.value?.data?.zpools || []);
 
@@ -82,23 +80,31 @@ export const useDeviceStore = defineStore('devices', () => {
     }
 
     /**
-     * Update metrics for specific device types
+     * Update metrics for specific device types.
+     * With since cursor only rows added after it are loaded and appended.
      */
-    async function updateMetrics(deviceTypes = null, hours = 1) {
+    async function updateMetrics(deviceTypes = null, hours = 1, since = null) {
         try {
             const response = await api.getMetrics({
                 history_type: 'raw',
                 device_types: deviceTypes,
-                hours: hours
+                hours: hours,
+                since: since
             });
+            metricsCursor.value = response.cursor;
 
             // Group metrics by device
             const metricsByDevice = {};
             response.data.forEach(metric => {
                 if (!metricsByDevice[metric.device_name]) {
-                    metricsByDevice[metric.device_name] = [];
+                    metricsByDevice[metric.device_name] = since !== null ? [...(metrics.value[metric.device_name] || [])] : [];
+                }
+                const rows = metricsByDevice[metric.device_name];
+                // Skip points already received from the live socket
+                if (since !== null && rows.length && new Date(metric.timestamp) <= new Date(rows[rows.length - 1].timestamp)) {
+                    return;
                 }
-                metricsByDevice[metric.device_name].push(metric);
+                rows.push(metric);
             });
 
             // Merge with existing metrics
@@ -127,13 +133,14 @@ export const useDeviceStore = defineStore('devices', () => {
     /**
      * Fetch detailed metrics for a specific device and range
      */
-    async function fetchDetailMetrics(deviceName, historyType = 'raw', hours = 24) {
+    async function fetchDetailMetrics(deviceName, historyType = 'auto', hours = 24, maxPoints = null) {
         try {
             loading.value = true;
             const response = await api.getMetrics({
                 history_type: historyType,
                 device_names: [deviceName],
-                hours: historyType === 'raw' ? hours : null
+                hours: hours,
+                max_points: maxPoints
             });
             detailMetrics.value = response.data;
         } catch (e) {
@@ -208,8 +215,8 @@ export const useDeviceStore = defineStore('devices', () => {
         if (reconnectionTimer) return;
 
         console.log('Starting reconnection loop...');
-        // Stop all polling to prevent flooding console with errors while offline
-        stopAllPolling();
+        // Stop live updates to prevent flooding console with errors while offline
+        stopLiveUpdates();
 
         reconnectionTimer = setInterval(async () => {
             if (isConnected.value) {
@@ -231,7 +238,7 @@ export const useDeviceStore = defineStore('devices', () => {
                     // Reset error state
                     error.value = null;
 
-                    // Perform full initialization (loads inventory, config, and starts polling)
+                    // Perform full initialization (loads inventory, config, and starts live updates)
                     await initialize();
                 }
             } catch (e) {
@@ -240,72 +247,106 @@ export const useDeviceStore = defineStore('devices', () => {
         }, 3000);
     }
 
+    const LIVE_DEVICE_TYPES = ['cpu', 'ram', 'network', 'storage', 'zfs_pool'];
+    const LIVE_WINDOW_MS = 60 * 60 * 1000;
+    let liveSocket = null;
+    let liveReconnectTimer = null;
+
     /**
-     * Start polling for specific device types
+     * Append pushed values to the chart series of every device, dropping points older than the window
      */
-    function startPolling(deviceType) {
-        if (!configData.value) {
-            console.warn('Config not loaded, cannot start polling');
-            return;
-        }
-
-        const interval = updateIntervals.value[deviceType];
-        if (!interval) {
-            console.warn(`No interval configured for device type: ${deviceType}`);
-            return;
-        }
+    function appendLiveMetrics(message) {
+        const cutoff = Date.now() - LIVE_WINDOW_MS;
+        const updated = {};
+        Object.entries(message.data).forEach(([deviceName, labels]) => {
+            const rows = (metrics.value[deviceName] || []).filter(
+                row => new Date(row.timestamp).getTime() >= cutoff
+            );
+            Object.entries(labels).forEach(([label, value]) => {
+                rows.push({
+                    timestamp: message.timestamp,
+                    label: label,
+                    value: value,
+                    device_name: deviceName,
+                    device_type: message.device_type
+                });
+            });
+            updated[deviceName] = rows;
+        });
+        metrics.value = { ...metrics.value, ...updated };
+    }
 
-        // Clear existing timer if any
-        if (pollingTimers.value[deviceType]) {
-            clearInterval(pollingTimers.value[deviceType]);
+    /**
+     * Handle a message from the live socket
+     */
+    function onLiveMessage(event) {
+        const message = JSON.parse(event.data);
+        latestValues.value = { ...latestValues.value, ...message.data };
+        if (message.type === 'metrics') {
+            appendLiveMetrics(message);
         }
-
-        // Start new timer
-        pollingTimers.value[deviceType] = setInterval(async () => {
-            await updateMetrics([deviceType]);
-            await updateLatestValues([deviceType]);
-        }, interval * 1000);
-
-        // Initial fetch
-        updateMetrics([deviceType]);
-        updateLatestValues([deviceType]);
     }
 
     /**
-     * Start polling for all device types
+     * Subscribe to pushed updates: one socket instead of polling loop per device type
      */
-    function startAllPolling() {
-        const deviceTypes = ['cpu', 'ram', 'network', 'storage', 'zfs_pool'];
-        deviceTypes.forEach(type => startPolling(type));
+    function connectLive() {
+        if (liveSocket) return;
+        liveSocket = api.openLive();
+        liveSocket.onopen = () => {
+            isConnected.value = true;
+        };
+        liveSocket.onmessage = onLiveMessage;
+        liveSocket.onclose = () => {
+            const wasOpen = liveSocket !== null;
+            liveSocket = null;
+            if (!wasOpen) return;
+            // Server restarted or network failed: check with inventory request, then reconnect
+            liveReconnectTimer = setTimeout(async () => {
+                liveReconnectTimer = null;
+                try {
+                    await api.getInventory();
+                    // Load only the points missed while disconnected
+                    await updateMetrics(LIVE_DEVICE_TYPES, 1, metricsCursor.value);
+                    connectLive();
+                } catch (e) {
+                    isConnected.value = false;
+                    startReconnectionLoop();
+                }
+            }, 3000);
+        };
     }
 
     /**
-     * Stop polling for specific device type
+     * Load the chart window once, then follow pushed updates
      */
-    function stopPolling(deviceType) {
-        if (pollingTimers.value[deviceType]) {
-            clearInterval(pollingTimers.value[deviceType]);
-            delete pollingTimers.value[deviceType];
-        }
+    function startLiveUpdates() {
+        updateMetrics(LIVE_DEVICE_TYPES);
+        connectLive();
     }
 
     /**
-     * Stop all polling
+     * Close the live socket
      */
-    function stopAllPolling() {
-        Object.keys(pollingTimers.value).forEach(type => {
-            clearInterval(pollingTimers.value[type]);
-        });
-        pollingTimers.value = {};
+    function stopLiveUpdates() {
+        if (liveReconnectTimer) {
+            clearTimeout(liveReconnectTimer);
+            liveReconnectTimer = null;
+        }
+        if (liveSocket) {
+            const socket = liveSocket;
+            liveSocket = null;
+            socket.close();
+        }
     }
 
     /**
-     * Initialize store (load inventory and config, start polling)
+     * Initialize store (load inventory and config, start live updates)
      */
     async function initialize() {
         await loadInventory();
         await loadConfig();
-        startAllPolling();
+        startLiveUpdates();
     }
 
     return {
@@ -313,6 +354,7 @@ export const useDeviceStore = defineStore('devices', () => {
         inventory,
         configData,
         metrics,
+        metricsCursor,
         detailMetrics,
         selectedDevice,
         allDevices,
@@ -345,10 +387,8 @@ export const useDeviceStore = defineStore('devices', () => {
         fetchSystemInfo,
         rebootHost,
         shutdownHost,
-        startPolling,
-        startAllPolling,
-        stopPolling,
-        stopAllPolling,
+        startLiveUpdates,
+        stopLiveUpdates,
         initialize
     };
 });
@@ -0,0 +1,197 @@
+import logging
+from datetime import datetime, timezone
+from typing import Dict, Optional, Tuple
+
+from tortoise import Tortoise, transactions
+
+from nas_monitor.config import config
+from nas_monitor.models import AggregationState, RollupMetricBase
+from nas_monitor.utils.sketch import QuantileSketch
+
+
+async def resume_watermark(source_model, target_model, stage_name: str, bucket_sec: int) -> int:
+    """
+    Start of the first bucket not processed yet by an incremental stage (aggregation, block compaction).
+    Without saved state continue after the last bucket in target (or from the oldest source row).
+    """
+    state = await AggregationState.filter(stage=stage_name).first()
+    if state:
+        return state.watermark
+    last_target = await target_model.all().order_by("-ts").first()
+    if last_target:
+        return last_target.ts + bucket_sec
+    first_source = await source_model.all().order_by("ts").first()
+    if first_source:
+        return (first_source.ts // bucket_sec) * bucket_sec
+    return 0
+
+
+async def next_source_bucket(table_name: str, since_ts: int, bucket_sec: int) -> Optional[int]:
+    """Start of the next bucket having source rows, used to skip gaps (downtime)"""
+    conn = Tortoise.get_connection("default")
+    # ORDER BY + LIMIT instead of MIN() so SQLite can use the ts index of every partition behind a view
+    rows = await conn.execute_query_dict(
+        f"SELECT ts FROM {table_name} WHERE ts >= ? ORDER BY ts LIMIT 1", [since_ts]
+    )
+    if not rows or rows[0]['ts'] is None:
+        return None
+    return (rows[0]['ts'] // bucket_sec) * bucket_sec
+
+
+ROLLUP_COLUMNS = ["min_value", "max_value", "sum_value", "sample_count", "last_value", "sketch"]
+
+
+class RollupStats:
+    """Stats of one series over a time range, filled from samples (or finer rollups) in time order"""
+    __slots__ = ("min", "max", "sum", "count", "last", "sketch")
+
+    def __init__(self):
+        self.min = None
+        self.max = None
+        self.sum = 0.0
+        self.count = 0
+        self.last = None
+        self.sketch = QuantileSketch()
+
+    def add_value(self, value: float):
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+        self.sum += value
+        self.count += 1
+        self.last = value
+        self.sketch.add(value)
+
+    def add_rollup(self, row: dict):
+        self.min = row['min_value'] if self.min is None else min(self.min, row['min_value'])
+        self.max = row['max_value'] if self.max is None else max(self.max, row['max_value'])
+        self.sum += row['sum_value']
+        self.count += row['sample_count']
+        self.last = row['last_value']
+        if row['sketch']:
+            self.sketch.merge(QuantileSketch.from_bytes(row['sketch']))
+        else:
+            # rollups from before sketches were stored
+            self.sketch.add(row['value'], row['sample_count'])
+
+    def quantile(self, q: float) -> Optional[float]:
+        value = self.sketch.quantile(q)
+        if value is None:
+            return None
+        # sketch bins are approximate, exact bounds are known
+        return min(max(value, self.min), self.max)
+
+    def values(self) -> list:
+        return [
+            self.sum / self.count,
+            self.min, self.max, self.sum, self.count, self.last,
+            self.sketch.to_bytes()
+        ]
+
+
+async def _aggregate_chunk(source_model, target_model, stage_name: str,
+                           bucket_sec: int, chunk_start: int, chunk_end: int) -> int:
+    """
+    Aggregate closed buckets in [chunk_start, chunk_end) and move the watermark in one transaction.
+    Upsert on (series_id, ts) makes re-processing of a bucket overwrite it instead of duplicating.
+    Every written bucket gets a new seq above all existing ones, so re-aggregated buckets
+    (which keep their id) are returned again to incremental readers.
+    """
+    from_rollups = issubclass(source_model, RollupMetricBase)
+    source_table = source_model._meta.db_table
+    target_table = target_model._meta.db_table
+    source_columns = ["series_id", "ts", "value"] + (ROLLUP_COLUMNS if from_rollups else [])
+    select_query = f"""
+        SELECT {", ".join(source_columns)}
+        FROM {source_table}
+        WHERE ts >= ? AND ts < ?
+        ORDER BY series_id, ts
+    """
+    target_columns = ["series_id", "ts", "value"] + ROLLUP_COLUMNS + ["seq"]
+    insert_query = f"""
+        INSERT INTO {target_table} ({", ".join(target_columns)})
+        VALUES ({", ".join("?" * len(target_columns))})
+        ON CONFLICT (series_id, ts) DO UPDATE SET
+            {", ".join(f"{name} = excluded.{name}" for name in target_columns[2:])}
+    """
+    async with transactions.in_transaction() as conn:
+        rows = await conn.execute_query_dict(select_query, [chunk_start, chunk_end])
+        rollups: Dict[Tuple[int, int], RollupStats] = {}
+        for row in rows:
+            key = (row['series_id'], (row['ts'] // bucket_sec) * bucket_sec)
+            rollup = rollups.get(key)
+            if rollup is None:
+                rollup = rollups[key] = RollupStats()
+            if from_rollups:
+                rollup.add_rollup(row)
+            else:
+                rollup.add_value(row['value'])
+        if rollups:
+            seq_rows = await conn.execute_query_dict(f"SELECT MAX(seq) AS seq FROM {target_table}")
+            seq = seq_rows[0]['seq'] or 0
+            await conn.execute_many(
+                insert_query,
+                [
+                    [series_id, bucket_ts] + rollup.values() + [seq + n]
+                    for n, ((series_id, bucket_ts), rollup) in enumerate(rollups.items(), start=1)
+                ]
+            )
+        await save_stage_watermark(conn, stage_name, chunk_end)
+    return len(rollups)
+
+
+async def save_stage_watermark(conn, stage_name: str, watermark: int):
+    """Store the stage watermark, conn may be a transaction committing it together with the stage output"""
+    await conn.execute_query(
+        f"""
+        INSERT INTO {AggregationState._meta.db_table} (stage, watermark) VALUES (?, ?)
+        ON CONFLICT (stage) DO UPDATE SET watermark = excluded.watermark
+        """,
+        [stage_name, watermark]
+    )
+
+
+async def get_stage_watermark(stage_name: str) -> Optional[int]:
+    state = await AggregationState.filter(stage=stage_name).first()
+    return state.watermark if state else None
+
+
+async def run_aggregation(source_model, target_model, stage_name: str, interval_minutes: int,
+                          upstream_stage: str = None):
+    """
+    Incrementally aggregate source_model into target_model buckets of interval_minutes.
+
+    Only closed buckets are emitted: a bucket is closed when its end is older than
+    the grace period and, for chained stages, when upstream stage has finished it too.
+    Work is split into chunks of AGGREGATION_CHUNK_SECONDS, each in its own transaction,
+    so catching up after a long downtime never runs one huge query.
+    """
+    bucket_sec = interval_minutes * 60
+    now_ts = int(datetime.now(timezone.utc).timestamp())
+    horizon = ((now_ts - config.AGGREGATION_GRACE_SECONDS) // bucket_sec) * bucket_sec
+    if upstream_stage:
+        upstream_watermark = await get_stage_watermark(upstream_stage)
+        if upstream_watermark is None:
+            logging.debug('Aggregation %s: waiting for %s', stage_name, upstream_stage)
+            return
+        horizon = min(horizon, (upstream_watermark // bucket_sec) * bucket_sec)
+
+    watermark = await resume_watermark(source_model, target_model, stage_name, bucket_sec)
+    chunk_sec = max(bucket_sec, (config.AGGREGATION_CHUNK_SECONDS // bucket_sec) * bucket_sec)
+    source_table = source_model._meta.db_table
+
+    chunks = 0
+    written = 0
+    while watermark < horizon:
+        chunk_end = min(watermark + chunk_sec, horizon)
+        count = await _aggregate_chunk(source_model, target_model, stage_name, bucket_sec, watermark, chunk_end)
+        chunks += 1
+        written += count
+        watermark = chunk_end
+        if not count:
+            # jump over the gap without source data
+            next_bucket = await next_source_bucket(source_table, watermark, bucket_sec)
+            next_watermark = min(next_bucket, horizon) if next_bucket is not None else horizon
+            if next_watermark > watermark:
+                watermark = next_watermark
+                await save_stage_watermark(Tortoise.get_connection("default"), stage_name, watermark)
+    logging.debug('Aggregation %s: %s chunks, %s rows written', stage_name, chunks, written)
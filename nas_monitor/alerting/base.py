@@ -6,7 +6,7 @@ from typing import List
 
 from jinja2 import Environment, FileSystemLoader
 
-from nas_monitor.models import Device, RawMetric
+from nas_monitor.models import Device, Series, RawMetric
 from nas_monitor.shemas import Metrics
 from nas_monitor.senders.manager import sender_manager
 
@@ -73,11 +73,13 @@ class BaseChecker(ABC):
         Get recent metrics history from DB.
         """
         since = datetime.now(timezone.utc) - duration
+        series = await Series.filter(device_id=device_id, label=label).first()
+        if not series:
+            return []
         return await RawMetric.filter(
-            device_id=device_id, 
-            label=label, 
-            timestamp__gte=since
-        ).order_by("timestamp").all()
+            series_id=series.id,
+            ts__gte=int(since.timestamp())
+        ).order_by("ts").all()
 
     async def get_duration_since_value_change(self, device_id: int, label: str, threshold_value: float, operator: str = ">") -> timedelta:
         """
@@ -102,7 +104,7 @@ class BaseChecker(ABC):
             
             if match:
                 if i > 0:
-                     duration += (history[i].timestamp - history[i-1].timestamp)
+                     duration += timedelta(seconds=history[i].ts - history[i-1].ts)
             else:
                 break
         
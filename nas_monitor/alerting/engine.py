@@ -5,6 +5,7 @@ import pkgutil
 from typing import List, Dict, Type
 
 from nas_monitor.shemas import Metrics
+from nas_monitor.device_registry import device_registry
 from nas_monitor.models import Device
 from nas_monitor.alerting.base import BaseChecker
 import nas_monitor.alerting.checkers
@@ -36,19 +37,17 @@ class AlertEngine:
         
         self._checkers_loaded = True
 
-    async def process(self, metrics: List[Metrics], devices: List[Device]):
+    async def process(self, metrics: List[Metrics]):
         """
-        Entry point for processing metrics.
+        Entry point for processing metrics, devices are resolved from the device registry.
         """
         if not self._checkers_loaded:
             self._load_checkers()
 
         tasks = []
 
-        device_map = {d.name: d for d in devices}
-
         for metric in metrics:
-            device = device_map.get(metric.device_name)
+            device = device_registry.get(metric.device_name)
             if not device:
                 continue
             # Find checkers for this specific metric
@@ -1,11 +1,34 @@
-from fastapi import APIRouter, Query, HTTPException
+import asyncio
+import logging
+
+from fastapi import APIRouter, Query, HTTPException, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
 from datetime import datetime, timedelta, timezone
 from typing import Optional
 
 from nas_monitor.frontend_config import frontend_config
+from nas_monitor.export import (
+    MEDIA_TYPES,
+    FILE_EXTENSIONS,
+    available_formats,
+    default_format,
+    arrow_stream,
+    msgpack_stream,
+    ndjson_stream
+)
+from nas_monitor.device_registry import device_registry
+from nas_monitor.ingest import ingest_writer
+from nas_monitor.live import live_hub
 from nas_monitor.models import Device
+from nas_monitor.responses import json_response
 from nas_monitor.metrics import (
     fetch_metrics_data,
+    fetch_metrics_columns,
+    fetch_metrics_stats,
+    get_metrics_cursor,
+    iter_metric_pages,
+    iter_metric_rows,
+    select_history_type,
     get_latest_metrics_by_device,
     get_inventory_grouped
 )
@@ -57,38 +80,125 @@ async def get_frontend_config():
 
 @router.get("/metrics")
 async def get_metrics(
-    history_type: str = Query(..., description="Record types: raw, daily or history"),
+    request: Request,
+    history_type: str = Query("auto", description="Record types: raw, hourly, history or auto"),
     device_types: Optional[list[str]] = Query(None, description="Device types to filter"),
     device_names: Optional[list[str]] = Query(None, description="Specific device names to filter"),
-    hours: Optional[int] = Query(None, description="Get metrics for last N hours (for raw metrics)"),
+    hours: Optional[int] = Query(None, description="Get metrics for last N hours"),
+    max_points: Optional[int] = Query(None, ge=3, description="Downsample every series to N points"),
+    response_format: str = Query("rows", alias="format", description="Response format: rows, columnar or ndjson"),
+    since: Optional[int] = Query(None, ge=0, description="Cursor from previous response: only rows added after it"),
     from_date: Optional[datetime] = None,
     to_date: Optional[datetime] = None
 ):
     """
     Get metrics with time range filtering.
+    Responses are gzip/brotli compressed when the client accepts it.
     
     Parameters:
-    - history_type: raw, daily, or history
+    - history_type: raw, hourly, history, or auto (cheapest tier covering the range)
     - device_types: Optional list of device types to filter
     - hours: Get metrics for last N hours (overrides from_date if provided)
+    - max_points: Optional points budget per series (LTTB downsampling)
+    - format: rows (list of samples), columnar ({series, t: [...], v: [...]} per series)
+      or ndjson (rows streamed one per line, ordered by timestamp and id across series; no max_points)
+    - since: cursor returned by the previous request, only rows added after it are returned
+      (use with an explicit history_type; the cursor is a row id for raw and an update sequence
+      for hourly/history, so re-aggregated buckets are returned again)
     - from_date: Start time for metrics
     - to_date: End time for metrics
     """
-    if history_type not in ["raw", "hourly", "history"]:
-        raise HTTPException(status_code=400, detail="history_type must be raw, hourly or history")
+    if history_type not in ["raw", "hourly", "history", "auto"]:
+        raise HTTPException(status_code=400, detail="history_type must be raw, hourly, history or auto")
+    if response_format not in ["rows", "columnar", "ndjson"]:
+        raise HTTPException(status_code=400, detail="format must be rows, columnar or ndjson")
+    if response_format == "ndjson" and max_points:
+        raise HTTPException(status_code=400, detail="max_points is not supported with ndjson format")
     
     # If hours is provided, calculate from_date
     if hours is not None:
         to_date = datetime.now(timezone.utc)
         from_date = to_date - timedelta(hours=hours)
+
+    if history_type == "auto":
+        if since is not None:
+            raise HTTPException(status_code=400, detail="since requires explicit history_type")
+        history_type = select_history_type(from_date, to_date, max_points)
+
+    # taken before reading: rows committed during the read are left for the next request
+    cursor = await get_metrics_cursor(history_type)
+
+    if response_format == "ndjson":
+        # paged through the database, memory use does not depend on the range
+        pages = iter_metric_rows(
+            history_type=history_type,
+            device_types=device_types,
+            device_names=device_names,
+            start_time=from_date,
+            end_time=to_date,
+            since_id=since,
+            until_id=cursor
+        )
+        return StreamingResponse(
+            ndjson_stream(pages, with_stats=history_type != "raw"),
+            media_type=MEDIA_TYPES["ndjson"],
+            headers={"X-History-Type": history_type, "X-Cursor": str(cursor)}
+        )
     
     try:
-        data = await fetch_metrics_data(
+        fetch = fetch_metrics_columns if response_format == "columnar" else fetch_metrics_data
+        data = await fetch(
+            history_type=history_type,
+            device_types=device_types,
+            device_names=device_names,
+            start_time=from_date,
+            end_time=to_date,
+            max_points=max_points,
+            since_id=since,
+            until_id=cursor
+        )
+        return await json_response(request, {
+            "status": "success",
+            "history_type": history_type,
+            "format": response_format,
+            "cursor": cursor,
+            "count": len(data),
+            "data": data
+        })
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to fetch metrics: {str(e)}")
+
+
+@router.get("/metrics/stats")
+async def get_metrics_stats(
+    history_type: str = Query(..., description="Record types: raw, hourly or history"),
+    device_types: Optional[list[str]] = Query(None, description="Device types to filter"),
+    device_names: Optional[list[str]] = Query(None, description="Specific device names to filter"),
+    hours: Optional[int] = Query(None, description="Get stats for last N hours"),
+    quantiles: list[float] = Query([0.5, 0.95, 0.99], description="Quantiles to compute (0..1)"),
+    from_date: Optional[datetime] = None,
+    to_date: Optional[datetime] = None
+):
+    """
+    Get per-series stats (min, max, avg, count, sum, last and quantiles) over a time range.
+    """
+    if history_type not in ["raw", "hourly", "history"]:
+        raise HTTPException(status_code=400, detail="history_type must be raw, hourly or history")
+
+    if hours is not None:
+        to_date = datetime.now(timezone.utc)
+        from_date = to_date - timedelta(hours=hours)
+
+    try:
+        data = await fetch_metrics_stats(
             history_type=history_type,
             device_types=device_types,
             device_names=device_names,
             start_time=from_date,
-            end_time=to_date
+            end_time=to_date,
+            quantiles=quantiles
         )
         return {
             "status": "success",
@@ -98,7 +208,67 @@ async def get_metrics(
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to fetch metrics: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to fetch metrics stats: {str(e)}")
+
+
+@router.get("/ingest/stats")
+async def get_ingest_stats():
+    """
+    Raw metrics writer: queue depth, rows written and failed, ingest rate over the last minute
+    and flush latency (last, average, max) in milliseconds.
+    """
+    return {
+        "status": "success",
+        "data": ingest_writer.stats()
+    }
+
+
+@router.get("/export")
+async def export_metrics(
+    history_type: str = Query("history", description="Record types: raw, hourly or history"),
+    device_types: Optional[list[str]] = Query(None, description="Device types to filter"),
+    device_names: Optional[list[str]] = Query(None, description="Specific device names to filter"),
+    hours: Optional[int] = Query(None, description="Export metrics for last N hours"),
+    export_format: Optional[str] = Query(None, alias="format", description="arrow or msgpack"),
+    from_date: Optional[datetime] = None,
+    to_date: Optional[datetime] = None
+):
+    """
+    Stream metrics in a binary format for bulk consumers (notebooks, ETL).
+
+    - arrow: Arrow IPC stream, one record batch per page (requires pyarrow on the server)
+    - msgpack: stream of MessagePack maps {series, t, v, ...}, one per page
+
+    Default format is arrow when available. Rows are read from the database page by page,
+    so memory use does not depend on the exported range.
+    """
+    if history_type not in ["raw", "hourly", "history"]:
+        raise HTTPException(status_code=400, detail="history_type must be raw, hourly or history")
+    export_format = export_format or default_format()
+    if export_format not in available_formats():
+        raise HTTPException(
+            status_code=400,
+            detail=f"format must be one of: {', '.join(available_formats())}"
+        )
+
+    if hours is not None:
+        to_date = datetime.now(timezone.utc)
+        from_date = to_date - timedelta(hours=hours)
+
+    pages = iter_metric_pages(
+        history_type=history_type,
+        device_types=device_types,
+        device_names=device_names,
+        start_time=from_date,
+        end_time=to_date
+    )
+    encode = arrow_stream if export_format == "arrow" else msgpack_stream
+    filename = f"metrics-{history_type}.{FILE_EXTENSIONS[export_format]}"
+    return StreamingResponse(
+        encode(pages, with_stats=history_type != "raw"),
+        media_type=MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
 
 
 @router.get("/devices")
@@ -136,6 +306,7 @@ async def update_device(name: str, payload: dict):
         if "enabled" in payload:
             device.enabled = bool(payload["enabled"])
             await device.save()
+            device_registry.put(device)
             
         return {
             "status": "success",
@@ -206,3 +377,45 @@ async def get_latest_metrics(
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get latest metrics: {str(e)}")
+
+
+@router.websocket("/ws/live")
+async def live_updates(websocket: WebSocket):
+    """
+    Push freshly collected metrics instead of polling.
+
+    Query parameters device_types / device_names filter the subscription.
+    On connect (and on every filter change) a snapshot of latest values is sent:
+    {type: "snapshot", timestamp, data: {device_name: {label: value}}}
+    then every collected batch: {type: "metrics", device_type, timestamp, data: {...}}.
+    Client may change the filter by sending {"device_types": [...], "device_names": [...]}.
+    """
+    await websocket.accept()
+    subscriber = live_hub.subscribe(
+        device_types=websocket.query_params.getlist("device_types"),
+        device_names=websocket.query_params.getlist("device_names")
+    )
+    subscriber.put(live_hub.snapshot(subscriber))
+
+    async def send_loop():
+        while True:
+            await websocket.send_json(await subscriber.queue.get())
+
+    async def receive_loop():
+        while True:
+            message = await websocket.receive_json()
+            if isinstance(message, dict):
+                subscriber.set_filter(message.get("device_types"), message.get("device_names"))
+                subscriber.put(live_hub.snapshot(subscriber))
+
+    tasks = [asyncio.create_task(send_loop()), asyncio.create_task(receive_loop())]
+    try:
+        done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            exc = task.exception()
+            if exc and not isinstance(exc, WebSocketDisconnect):
+                logging.warning('Live connection closed with error: %s', exc)
+    finally:
+        for task in tasks:
+            task.cancel()
+        live_hub.unsubscribe(subscriber)
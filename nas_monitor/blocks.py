@@ -0,0 +1,161 @@
+import logging
+from datetime import datetime, timezone
+from typing import List, Optional, Tuple
+
+import numpy as np
+from tortoise import Tortoise, transactions
+from tortoise.backends.base.client import BaseDBAsyncClient
+
+from nas_monitor.aggregation import get_stage_watermark, next_source_bucket, resume_watermark, save_stage_watermark
+from nas_monitor.config import config
+from nas_monitor.models import RawBlock, RawMetric
+from nas_monitor.utils.blockcodec import decode_blocks, encode_block
+
+
+class BlockStore:
+    """
+    Compressed long-term storage of raw samples.
+
+    Once a block of RAW_BLOCK_SECONDS is closed, samples of every series in it are packed
+    into one RawBlock row (delta-of-delta timestamps, XOR values, see utils.blockcodec).
+    Raw rows stay the uncompressed head: the open block and the last RAW_ROWS_RETENTION_DAYS,
+    which keep ids for cursors and feed aggregation. Range reads take rows where they exist
+    and decode blocks only for the time before the oldest row.
+    Compaction is incremental by a watermark in AggregationState, like aggregation stages.
+    """
+
+    stage_name = "raw_to_blocks"
+
+    async def compact(self) -> int:
+        """Encode closed blocks not compacted yet. Returns the number of written blocks."""
+        block_sec = config.RAW_BLOCK_SECONDS
+        now_ts = int(datetime.now(timezone.utc).timestamp())
+        horizon = ((now_ts - config.AGGREGATION_GRACE_SECONDS) // block_sec) * block_sec
+        watermark = await resume_watermark(RawMetric, RawBlock, self.stage_name, block_sec)
+        chunk_sec = max(block_sec, (config.AGGREGATION_CHUNK_SECONDS // block_sec) * block_sec)
+        source_table = RawMetric._meta.db_table
+
+        written = 0
+        while watermark < horizon:
+            chunk_end = min(watermark + chunk_sec, horizon)
+            count = await self._compact_chunk(watermark, chunk_end)
+            written += count
+            watermark = chunk_end
+            if not count:
+                # jump over the gap without raw rows
+                next_block = await next_source_bucket(source_table, watermark, block_sec)
+                next_watermark = min(next_block, horizon) if next_block is not None else horizon
+                if next_watermark > watermark:
+                    watermark = next_watermark
+                    await save_stage_watermark(Tortoise.get_connection("default"), self.stage_name, watermark)
+        logging.debug('Raw blocks: %s blocks written', written)
+        return written
+
+    async def _compact_chunk(self, chunk_start: int, chunk_end: int) -> int:
+        """Encode blocks in [chunk_start, chunk_end) and move the watermark in one transaction"""
+        block_sec = config.RAW_BLOCK_SECONDS
+        select_query = f"""
+            SELECT series_id, ts, value
+            FROM {RawMetric._meta.db_table}
+            WHERE ts >= ? AND ts < ?
+            ORDER BY series_id, ts, id
+        """
+        insert_query = f"""
+            INSERT INTO {RawBlock._meta.db_table} (series_id, ts, last_ts, count, data)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT (series_id, ts) DO UPDATE SET
+                last_ts = excluded.last_ts, count = excluded.count, data = excluded.data
+        """
+        async with transactions.in_transaction() as conn:
+            rows = await conn.execute_query_dict(select_query, [chunk_start, chunk_end])
+            blocks = []
+            if rows:
+                series = np.fromiter((row['series_id'] for row in rows), dtype=np.int64, count=len(rows))
+                ts = np.fromiter((row['ts'] for row in rows), dtype=np.int64, count=len(rows))
+                values = np.fromiter((row['value'] for row in rows), dtype=np.float64, count=len(rows))
+                block_ts = ts // block_sec * block_sec
+                bounds = np.flatnonzero((series[1:] != series[:-1]) | (block_ts[1:] != block_ts[:-1])) + 1
+                for start, end in zip(np.r_[0, bounds], np.r_[bounds, len(rows)]):
+                    blocks.append([
+                        int(series[start]), int(block_ts[start]), int(ts[end - 1]), int(end - start),
+                        encode_block(ts[start:end], values[start:end])
+                    ])
+                await conn.execute_many(insert_query, blocks)
+            await save_stage_watermark(conn, self.stage_name, chunk_end)
+        return len(blocks)
+
+    @staticmethod
+    async def rows_start(db: BaseDBAsyncClient = None) -> Optional[int]:
+        """Time of the oldest raw row, data before it is read from blocks"""
+        # ORDER BY + LIMIT instead of MIN() so SQLite can use the ts index of every partition
+        ts = await RawMetric.all().using_db(db).order_by("ts").limit(1).values_list("ts", flat=True)
+        return ts[0] if ts else None
+
+    async def read_upper(self, end_ts: int = None, db: BaseDBAsyncClient = None) -> Optional[int]:
+        """Exclusive upper time of samples read from blocks: the oldest raw row, or end_ts + 1 if earlier"""
+        upper = await self.rows_start(db)
+        if end_ts is not None:
+            upper = end_ts + 1 if upper is None else min(upper, end_ts + 1)
+        return upper
+
+    @staticmethod
+    def _blocks(series_ids: List[int], start_ts: int = None, upper: int = None):
+        queryset = RawBlock.filter(series_id__in=list(series_ids))
+        if start_ts is not None:
+            queryset = queryset.filter(last_ts__gte=start_ts)
+        if upper is not None:
+            queryset = queryset.filter(ts__lt=upper)
+        return queryset
+
+    @staticmethod
+    def _decode(blocks: List[Tuple[int, bytes]], start_ts: int = None,
+                upper: int = None) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Decode (series_id, data) blocks into arrays (series_id, ts, value) within [start_ts, upper)"""
+        index, ts, values = decode_blocks(data for _, data in blocks)
+        series = np.fromiter((series_id for series_id, _ in blocks), dtype=np.int64, count=len(blocks))[index]
+        mask = np.ones(len(ts), dtype=bool)
+        if start_ts is not None:
+            mask &= ts >= start_ts
+        if upper is not None:
+            mask &= ts < upper
+        return series[mask], ts[mask], values[mask]
+
+    async def read(self, series_ids: List[int], start_ts: int = None, end_ts: int = None,
+                   db: BaseDBAsyncClient = None) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Samples from blocks in [start_ts, end_ts] older than the oldest raw row.
+        Returns arrays (series_id, ts, value) ordered by series and time.
+        """
+        upper = await self.read_upper(end_ts, db)
+        queryset = self._blocks(series_ids, start_ts, upper)
+        blocks = await queryset.using_db(db).order_by("series_id", "ts").values_list("series_id", "data")
+        return self._decode(blocks, start_ts, upper)
+
+    async def read_page(self, series_id: int, start_ts: int = None, upper: int = None,
+                        after_ts: int = None, limit: int = 1,
+                        db: BaseDBAsyncClient = None) -> Tuple[np.ndarray, np.ndarray, Optional[int]]:
+        """
+        Samples of up to `limit` blocks of one series starting after after_ts, in [start_ts, upper)
+        (upper from read_upper()). Keyset pagination over the (series_id, ts) index, so a long range
+        is decoded a few blocks at a time.
+        Returns arrays (ts, value) and the start of the last read block, None when no blocks are left.
+        """
+        queryset = self._blocks([series_id], start_ts, upper)
+        if after_ts is not None:
+            queryset = queryset.filter(ts__gt=after_ts)
+        blocks = await queryset.using_db(db).order_by("ts").limit(limit).values_list("ts", "data")
+        _, ts, values = self._decode([(series_id, data) for _, data in blocks], start_ts, upper)
+        return ts, values, blocks[-1][0] if blocks else None
+
+    async def rows_cutoff(self, cutoff_ts: int) -> int:
+        """Raw rows older than the returned time may be dropped: they are compacted into blocks"""
+        watermark = await get_stage_watermark(self.stage_name)
+        return min(cutoff_ts, watermark or 0)
+
+    @staticmethod
+    async def drop_expired(cutoff_ts: int) -> int:
+        """Delete blocks whose last sample is older than cutoff_ts"""
+        return await RawBlock.filter(last_ts__lt=cutoff_ts).delete()
+
+
+raw_blocks = BlockStore()
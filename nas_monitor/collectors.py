@@ -5,18 +5,31 @@ import shutil
 from abc import ABC, abstractmethod
 from datetime import datetime
 
-import psutil
+import numpy as np
 
+from nas_monitor.config import config
 from nas_monitor.shemas import Metrics
-from nas_monitor.utils.disk_utils import collect_all_disk_info
+from nas_monitor.utils.disk_utils import disk_snapshot, collect_smart_info, get_physical_disks, smart_cache
+from nas_monitor.utils.hwmon import hwmon_sensors
+from nas_monitor.utils.network import is_monitored_nic
+from nas_monitor.utils.procfs import (
+    DISK_STATS_FIELDS, CpuUsage, DiskStats, MemInfo, NetDev, align_counters, counter_deltas
+)
+from nas_monitor.utils.zfs_stats import arc_stats, zpool_iostat
 
 zfs_is_available = bool(shutil.which('zfs'))
 smartctl_is_available = bool(shutil.which('smartctl'))
-psutil.cpu_percent()    # temp call to init monitor
+
+# Per-interface series of the network device, "<nic>.<label>"
+NIC_LABELS = ("upload", "download", "rx_packets", "tx_packets", "errors", "drops")
+# Series of DiskIOCollector, in the order of its values array
+DISK_IO_LABELS = ("read_speed", "write_speed", "read_iops", "write_iops", "util_percent", "await_ms", "queue_depth")
 
 
 class BaseCollector(ABC):
     dev_type: str = None
+    # job name, for collectors of the same device type with different cadence (dev_type by default)
+    name: str = None
 
     @abstractmethod
     async def collect(self) -> list[Metrics]:
@@ -29,11 +42,12 @@ class CPUCollector(BaseCollector):
     def __init__(self, alpha=0.3):
         self.alpha = alpha
         self.smoothed_load = None
+        self.cpu_usage = CpuUsage()
 
     async def collect(self) -> list[Metrics]:
         metrics = []
-        # CPU load
-        load = psutil.cpu_percent(interval=None)
+        # CPU load (since previous call)
+        load = self.cpu_usage.percent()
         
         # Exponential Moving Average smoothing
         if self.smoothed_load is None:
@@ -44,92 +58,81 @@ class CPUCollector(BaseCollector):
         metrics.append(Metrics(device_name="cpu", label="load", value=round(self.smoothed_load, 1)))
         
         # CPU temperature
-        temps = psutil.sensors_temperatures()
-        cpu_temp = None
-        # find the sensor
-        for name in ['coretemp', 'k10temp', 'cpu_thermal', 'soc_thermal']:
-            if name in temps:
-                for entry in temps[name]:
-                    if entry.label.startswith('Package') or entry.label == '':
-                        cpu_temp = entry.current
-                        break
-                if not cpu_temp and temps[name]:
-                    cpu_temp = temps[name][0].current
-                break
+        temps = hwmon_sensors.read("cpu")
+        cpu_temp = temps[0] if temps else None
         if cpu_temp is not None:
             metrics.append(Metrics(device_name="cpu", label="temp", value=round(cpu_temp, 1)))
         return metrics
 
 
-
 class RAMCollector(BaseCollector):
     dev_type = 'ram'
 
+    def __init__(self):
+        self.mem_info = MemInfo()
+
     async def collect(self) -> list[Metrics]:
-        mem = psutil.virtual_memory()
+        total, available, used, percent = self.mem_info.read()
         metrics = [
-            Metrics(device_name="ram", label="usage_percent", value=mem.percent),
-            Metrics(device_name="ram", label="used_gb", value=round(mem.used / (1024 ** 3), 2))
+            Metrics(device_name="ram", label="usage_percent", value=percent),
+            Metrics(device_name="ram", label="used_gb", value=round(used / (1024 ** 3), 2))
         ]
 
-        # RAM temperature (try to find matching sensors)
-        try:
-            temps = psutil.sensors_temperatures()
-            mem_temps = []
-            for name, entries in temps.items():
-                name_lower = name.lower()
-                # jc42 is a common RAM temp sensor driver
-                if any(x in name_lower for x in ['dimm', 'mem', 'acpitz', 'pch_', 'jc42', 'gigabyte']):
-                    for entry in entries:
-                        if entry.current > 0:
-                            mem_temps.append(entry.current)
-            
-            if mem_temps:
-                # Use max or average? Usually people care about the hottest stick
-                avg_temp = sum(mem_temps) / len(mem_temps)
-                metrics.append(Metrics(device_name="ram", label="temp", value=round(avg_temp, 1)))
-        except Exception:
-            pass
+        # RAM temperature (memory related sensors)
+        mem_temps = [value for value in hwmon_sensors.read("ram") if value > 0]
+        if mem_temps:
+            # Use max or average? Usually people care about the hottest stick
+            avg_temp = sum(mem_temps) / len(mem_temps)
+            metrics.append(Metrics(device_name="ram", label="temp", value=round(avg_temp, 1)))
 
         return metrics
 
 
 class NetCollector(BaseCollector):
+    """
+    Aggregated upload/download of monitored interfaces (config NET_INCLUDE_INTERFACES / NET_EXCLUDE_INTERFACES)
+    plus per-interface series on the same device: <nic>.upload, <nic>.download (KB/s),
+    <nic>.rx_packets, <nic>.tx_packets, <nic>.errors, <nic>.drops (per second).
+    Counters of all interfaces are handled as one array, so a tick costs the same few numpy ops
+    for any number of interfaces.
+    """
     dev_type = "network"
 
     def __init__(self):
-        sent, recv = self._get_physical_io()
-        self.prev_io_sent = sent
-        self.prev_io_recv = recv
+        self.net_dev = NetDev(nic_filter=is_monitored_nic)
+        self.prev_names, self.prev_counters = self.net_dev.read()
         self.prev_time = datetime.now()
 
-    def _get_physical_io(self):
-        per_nic = psutil.net_io_counters(pernic=True)
-        bytes_sent = 0
-        bytes_recv = 0
-        for nic, io in per_nic.items():
-            nic_lower = nic.lower()
-            if nic_lower == 'lo': continue
-            if any(nic_lower.startswith(x) for x in ['veth', 'fw', 'tap', 'br', 'vmbr']): continue
-            bytes_sent += io.bytes_sent
-            bytes_recv += io.bytes_recv
-        return bytes_sent, bytes_recv
-
     async def collect(self) -> list[Metrics]:
         now = datetime.now()
-        bytes_sent, bytes_recv = self._get_physical_io()
+        names, counters = self.net_dev.read()
 
         dt = (now - self.prev_time).total_seconds()
         metrics = []
         if dt > 0:
-            up_speed = max(0, (bytes_sent - self.prev_io_sent) / dt / 1024)
-            down_speed = max(0, (bytes_recv - self.prev_io_recv) / dt / 1024)
+            previous, seen = align_counters(self.prev_names, self.prev_counters, names, counters)
+            deltas = counter_deltas(previous, counters)
+            # columns: rx bytes, packets, errs, drop, tx bytes, packets, errs, drop
+            rates = np.empty((len(names), 6))
+            rates[:, 0] = deltas[:, 4] / 1024
+            rates[:, 1] = deltas[:, 0] / 1024
+            rates[:, 2] = deltas[:, 1]
+            rates[:, 3] = deltas[:, 5]
+            rates[:, 4] = deltas[:, 2] + deltas[:, 6]
+            rates[:, 5] = deltas[:, 3] + deltas[:, 7]
+            rates = rates[seen] / dt
+            up_speed, down_speed = rates[:, :2].sum(axis=0)
             metrics.extend([
-                Metrics(device_name="net", label="upload", value=round(up_speed, 2)),
-                Metrics(device_name="net", label="download", value=round(down_speed, 2))
+                Metrics(device_name="net", label="upload", value=round(float(up_speed), 2)),
+                Metrics(device_name="net", label="download", value=round(float(down_speed), 2))
             ])
-        self.prev_io_sent = bytes_sent
-        self.prev_io_recv = bytes_recv
+            # a newly appeared interface gets its first rates on the next tick
+            seen_names = [name for name, is_seen in zip(names, seen) if is_seen]
+            for name, values in zip(seen_names, rates.round(2).tolist()):
+                for label, value in zip(NIC_LABELS, values):
+                    metrics.append(Metrics(device_name="net", label=f"{name}.{label}", value=value))
+        self.prev_names = names
+        self.prev_counters = counters
         self.prev_time = now
         return metrics
 
@@ -138,18 +141,12 @@ class StorageCollector(BaseCollector):
     dev_type = 'storage'
 
     async def collect(self) -> list[Metrics]:
-        data = await collect_all_disk_info()
+        data = await disk_snapshot.get()
         metrics = []
         
         for disk in data.get('disks', []):
             sn = disk.get('serial') or disk.get('name')
             
-            # SMART data
-            smart = disk.get('smart', {})
-            if smart:
-                metrics.append(Metrics(device_name=sn, label="temp", value=float(smart.get('temperature', 0))))
-                metrics.append(Metrics(device_name=sn, label="health", value=float(smart.get('health_status', 0))))
-            
             # Disk Usage (if mounted in system)
             usage = disk.get('usage')
             if usage:
@@ -162,12 +159,86 @@ class StorageCollector(BaseCollector):
         return metrics
 
 
+class DiskIOCollector(BaseCollector):
+    """
+    Per-disk throughput and latency from /proc/diskstats, on the same serial-based devices as StorageCollector:
+    read_speed, write_speed (KB/s), read_iops, write_iops, util_percent (time busy),
+    await_ms (average time per completed request) and queue_depth (average requests in flight).
+    """
+    dev_type = 'storage'
+    name = 'diskio'
+
+    def __init__(self):
+        self.disk_stats = DiskStats()
+        self.prev_names: list[str] = []
+        self.prev_counters = np.empty((0, DISK_STATS_FIELDS), dtype=np.int64)
+        self.prev_time = datetime.now()
+
+    async def collect(self) -> list[Metrics]:
+        # only the disk list (cached sysfs layout): the full disk snapshot with zfs/zpool commands
+        # stays on the cadence of the storage and ZFS collectors
+        disks, _ = await get_physical_disks()
+        # kernel name -> device name used by StorageCollector
+        devices = {disk['kname_short']: disk.get('serial') or disk.get('name') for disk in disks}
+        now = datetime.now()
+        names, counters = self.disk_stats.read(set(devices))
+
+        dt = (now - self.prev_time).total_seconds()
+        metrics = []
+        if dt > 0:
+            previous, seen = align_counters(self.prev_names, self.prev_counters, names, counters)
+            deltas = counter_deltas(previous, counters)[seen].astype(float)
+            requests = deltas[:, 0] + deltas[:, 4]
+            values = np.empty((len(deltas), len(DISK_IO_LABELS)))
+            values[:, 0] = deltas[:, 2] * 512 / 1024 / dt
+            values[:, 1] = deltas[:, 6] * 512 / 1024 / dt
+            values[:, 2] = deltas[:, 0] / dt
+            values[:, 3] = deltas[:, 4] / dt
+            values[:, 4] = np.minimum(deltas[:, 9] / (dt * 1000) * 100, 100)
+            values[:, 5] = np.divide(deltas[:, 3] + deltas[:, 7], requests,
+                                     out=np.zeros(len(deltas)), where=requests > 0)
+            values[:, 6] = deltas[:, 10] / (dt * 1000)
+            seen_names = [name for name, is_seen in zip(names, seen) if is_seen]
+            for name, row in zip(seen_names, values.round(2).tolist()):
+                for label, value in zip(DISK_IO_LABELS, row):
+                    metrics.append(Metrics(device_name=devices[name], label=label, value=value))
+        self.prev_names = names
+        self.prev_counters = counters
+        self.prev_time = now
+        return metrics
+
+
+class SmartCollector(BaseCollector):
+    """
+    SMART temperature and health on its own (slow) cadence, sleeping drives are not woken up:
+    they report their last known values and standby=1, so the series and health alerts do not go quiet.
+    """
+    dev_type = 'storage'
+    name = 'smart'
+
+    async def collect(self) -> list[Metrics]:
+        data = await disk_snapshot.get()
+        disks = data.get('disks', [])
+        result = await collect_smart_info(disks)
+        standby = set(result['standby'])
+        metrics = []
+        for disk in disks:
+            path = disk['kname']
+            info = smart_cache.get(path) if path in standby else result['smart'].get(path)
+            if not info:
+                continue
+            sn = disk.get('serial') or disk.get('name')
+            metrics.append(Metrics(device_name=sn, label="temp", value=float(info.get('temperature', 0))))
+            metrics.append(Metrics(device_name=sn, label="health", value=float(info.get('health_status', 0))))
+            metrics.append(Metrics(device_name=sn, label="standby", value=float(path in standby)))
+        return metrics
+
 
 class ZFSCollector(BaseCollector):
     dev_type = "zfs_pool"
 
     async def collect(self) -> list[Metrics]:
-        data = await collect_all_disk_info()
+        data = await disk_snapshot.get()
         metrics = []
         
         for pool in data.get('zfs_pools', []):
@@ -181,5 +252,44 @@ class ZFSCollector(BaseCollector):
         return metrics
 
 
+class ZFSIOCollector(BaseCollector):
+    """
+    Pool and vdev bandwidth, IOPS and latency from the long-running zpool iostat stream:
+    read_speed, write_speed (KB/s), read_iops, write_iops, read_await_ms, write_await_ms on the pool device,
+    the same series of vdevs and member disks as "<vdev>.<label>".
+    """
+    dev_type = "zfs_pool"
+    name = "zfs_io"
+
+    async def collect(self) -> list[Metrics]:
+        # pool names of the last snapshot: it is refreshed by the (slower) ZFS collector,
+        # collected here only before the first snapshot
+        data = disk_snapshot.last() or await disk_snapshot.get()
+        interval = config.COLLECTOR_INTERVAL_ZFS_IO
+        await zpool_iostat.ensure([pool['name'] for pool in data.get('zfs_pools', [])], interval)
+        metrics = []
+        for pool, samples in zpool_iostat.latest(max_age=interval * 3).items():
+            for name, sample in samples.items():
+                prefix = "" if name == pool else f"{name}."
+                values = {
+                    "read_speed": sample.read_bytes / 1024,
+                    "write_speed": sample.write_bytes / 1024,
+                    "read_iops": sample.read_ops,
+                    "write_iops": sample.write_ops,
+                    "read_await_ms": sample.read_wait_ns / 1e6 if sample.read_wait_ns is not None else None,
+                    "write_await_ms": sample.write_wait_ns / 1e6 if sample.write_wait_ns is not None else None,
+                }
+                for label, value in values.items():
+                    if value is not None:
+                        metrics.append(Metrics(device_name=pool, label=f"{prefix}{label}", value=round(value, 2)))
+        return metrics
 
 
+class ARCCollector(BaseCollector):
+    """ZFS ARC size, target, MRU/MFU split, L2ARC size and hit ratios (device "arc")"""
+    dev_type = "zfs_arc"
+
+    async def collect(self) -> list[Metrics]:
+        if not arc_stats.available:
+            return []
+        return [Metrics(device_name="arc", label=label, value=value) for label, value in arc_stats.summary().items()]
@@ -17,14 +17,44 @@ class AppConfig(BaseSettings):
     
     # Database
     DB_PATH: str = f"sqlite://{DATA_PATH}/metrics_db.sqlite3"
+    # SQLite tuning, the database is opened in WAL mode
+    DB_SYNCHRONOUS: str = "NORMAL"
+    DB_CACHE_SIZE_KB: int = 65536  # page cache per connection
+    DB_MMAP_SIZE: int = 268435456  # 256 MB of the file mapped into memory
+    DB_BUSY_TIMEOUT_MS: int = 5000
+    DB_READ_POOL_SIZE: int = 4  # read-only connections for API queries, 0 to read via the writer connection
     
     # Polling intervals for collectors (in seconds)
     COLLECTOR_INTERVAL_CPU: int = 5
     COLLECTOR_INTERVAL_RAM: int = 5
     COLLECTOR_INTERVAL_NETWORK: int = 3
+    # Network interfaces (glob patterns): include all when empty, loopback and virtual ones are excluded
+    NET_INCLUDE_INTERFACES: list[str] = []
+    NET_EXCLUDE_INTERFACES: list[str] = ["lo", "veth*", "fw*", "tap*", "br*", "vmbr*"]
     COLLECTOR_INTERVAL_STORAGE: int = 60
+    COLLECTOR_INTERVAL_DISKIO: int = 10  # /proc/diskstats, cheap
+    COLLECTOR_INTERVAL_SMART: int = 600  # smartctl, sleeping drives are skipped
     COLLECTOR_INTERVAL_ZFS_POOL: int = 60  # 1 minute
+    COLLECTOR_INTERVAL_ZFS_IO: int = 10  # interval of the zpool iostat stream
+    COLLECTOR_INTERVAL_ZFS_ARC: int = 10
+    DISK_SNAPSHOT_TTL: int = 30  # disk info is shared by storage and ZFS collectors for this time
+    DISK_PROBE_CONCURRENCY: int = 8  # smartctl/zfs commands running at once
+    DISK_PROBE_TIMEOUT: float = 15.0  # seconds, a hanging command is killed
+
+    # Ingest: raw samples are written in groups by a single writer task
+    INGEST_BATCH_SIZE: int = 500  # rows per insert
+    INGEST_FLUSH_INTERVAL: float = 5.0  # seconds, must stay well below AGGREGATION_GRACE_SECONDS
+    INGEST_QUEUE_SIZE: int = 10000  # pending rows, collectors wait when it is full
+    INGEST_RETRIES: int = 3  # a failed batch is written again this many times before it is dropped
+    INGEST_RETRY_DELAY: float = 0.5  # seconds before the first retry, doubled for every next one
     
+    # Raw metrics are stored in partitions of this length (UTC day), retention drops whole partitions
+    PARTITION_SECONDS: int = 86400
+    # Closed blocks of raw samples are compressed per series; rows are kept only for the recent days,
+    # older raw data is read from the blocks
+    RAW_BLOCK_SECONDS: int = 3600
+    RAW_ROWS_RETENTION_DAYS: int = 2
+
     # Metrics retention
     RAW_RETENTION_HOURS: int = 3
     DAILY_RETENTION_DAYS: int = 7
@@ -33,11 +63,15 @@ class AppConfig(BaseSettings):
     # Aggregation intervals (in minutes)
     AGGREGATION_INTERVAL_DAILY: int = 5  # raw -> daily every 5 min
     AGGREGATION_INTERVAL_HISTORY: int = 60  # daily -> history every hour
+    AGGREGATION_GRACE_SECONDS: int = 60  # bucket is closed when its end is older than this
+    AGGREGATION_CHUNK_SECONDS: int = 6 * 3600  # source time range processed per transaction
     
     # API settings
     API_HOST: str = "0.0.0.0"
     API_PORT: int = 8000
     CORS_ORIGINS: list[str] = ["*"]
+    EXPORT_PAGE_SIZE: int = 5000  # rows read from the database per export page
+    LIVE_QUEUE_SIZE: int = 100  # pending live messages per client, oldest are dropped
     
     # Alerting settings
     ALERT_THROTTLE_MINUTES: int = 10
@@ -0,0 +1,85 @@
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, List, Optional
+
+from tortoise.backends.base.client import BaseDBAsyncClient
+from tortoise.backends.base.config_generator import expand_db_url
+from tortoise.backends.sqlite.client import SqliteClient
+
+from nas_monitor.config import config
+
+
+def connection_config(db_url: str, read_only: bool = False) -> dict:
+    """
+    Tortoise connection settings for db_url with tuned SQLite pragmas
+    (Tortoise runs every extra credential as PRAGMA name=value on connect).
+    WAL lets readers work while the writer commits, synchronous=NORMAL is safe with WAL
+    and syncs only on checkpoints.
+    """
+    settings = expand_db_url(db_url)
+    credentials = settings["credentials"]
+    credentials.update({
+        "journal_mode": "WAL",
+        "synchronous": config.DB_SYNCHRONOUS,
+        # negative value is the size in KiB
+        "cache_size": -config.DB_CACHE_SIZE_KB,
+        "mmap_size": config.DB_MMAP_SIZE,
+        "temp_store": "MEMORY",
+        "busy_timeout": config.DB_BUSY_TIMEOUT_MS,
+    })
+    if read_only:
+        credentials["query_only"] = "ON"
+    return settings
+
+
+class ReadPool:
+    """
+    Small pool of read-only SQLite connections for API queries.
+    Tortoise's default connection stays the only writer (ingest, aggregation, cleanup);
+    it serializes every query behind one lock, so reads get connections of their own.
+    Querysets run on a pooled connection with .using_db(); while the pool is closed
+    (in-memory database, tests) acquire() yields None and queries use the default connection.
+    """
+
+    def __init__(self):
+        self._clients: List[SqliteClient] = []
+        self._idle: Optional[asyncio.Queue] = None
+
+    @property
+    def size(self) -> int:
+        return len(self._clients)
+
+    async def open(self, db_url: str, size: int):
+        await self.close()
+        credentials = connection_config(db_url, read_only=True)["credentials"]
+        # an in-memory database is private to its connection
+        if size <= 0 or credentials["file_path"] == ":memory:":
+            return
+        self._idle = asyncio.Queue()
+        for i in range(size):
+            client = SqliteClient(connection_name=f"read_{i}", **credentials)
+            await client.create_connection(with_db=True)
+            self._clients.append(client)
+            self._idle.put_nowait(client)
+        logging.info('Opened %s read-only database connections', size)
+
+    @asynccontextmanager
+    async def acquire(self) -> AsyncIterator[Optional[BaseDBAsyncClient]]:
+        if not self._clients:
+            yield None
+            return
+        client = await self._idle.get()
+        try:
+            yield client
+        finally:
+            self._idle.put_nowait(client)
+
+    async def close(self):
+        for client in self._clients:
+            await client.close()
+        self._clients = []
+        self._idle = None
+
+
+read_pool = ReadPool()
@@ -3,66 +3,14 @@ import json
 import logging
 import platform
 import re
-import shutil
 
 import psutil
 
+from nas_monitor.device_registry import device_registry
 from nas_monitor.models import Device
-
-zfs_is_available = bool(shutil.which('zfs'))
-
-
-async def _get_zfs_serial_mapping() -> dict[str, str]:
-    if not zfs_is_available:
-        return {}
-    mapping = {}
-    try:
-        proc = await asyncio.create_subprocess_exec(
-            "zpool", "status",
-            stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE
-        )
-        stdout, _ = await proc.communicate()
-        if not stdout:
-            return mapping
-
-        current_pool = None
-        content = stdout.decode()
-
-        for line in content.split('\n'):
-            line = line.strip()
-            if line.startswith("pool:"):
-                current_pool = line.split(":")[1].strip()
-            if any(status in line for status in ["ONLINE", "DEGRADED", "FAULTED"]):
-                parts = line.split()
-                if not parts: continue
-                vdev_path = parts[0]
-                # skip special devices (raidz, mirror)
-                if vdev_path == current_pool or any(x in vdev_path for x in ["raidz", "mirror", "logs", "cache"]):
-                    continue
-                
-                # Cleanup the path/name to find potential serials
-                dev_name = vdev_path.split('/')[-1]
-                
-                # Try to extract the core identifier
-                clean_name = dev_name.replace('-part', '').replace('_1', '')
-                for segment in clean_name.split('_'):
-                    if len(segment) > 8: # probable SN or WWN
-                        mapping[segment] = current_pool
-                
-                # Handle /dev/nvme0n1p3 format specifically
-                # Use regex to strip the partition part (pX)
-                base_nvme = re.sub(r'p\d+$', '', dev_name)
-                mapping[base_nvme] = current_pool
-
-                
-                # Always map the verbatim name found in zpool status
-                mapping[dev_name] = current_pool
-                mapping[vdev_path] = current_pool
-
-    except Exception as e:
-        print(f"Error mapping ZFS devices: {e}")
-    return mapping
-
+from nas_monitor.utils.network import is_monitored_nic
+from nas_monitor.utils.zfs_probe import probe_zfs, device_pool_map
+from nas_monitor.utils.zfs_stats import arc_stats
 
 
 async def get_cpu_model_name() -> str:
@@ -135,47 +83,42 @@ async def perform_inventory():
             "type": "network",
             "poll_interval": 2,
             "details": {
-                "description": "Aggregated traffic from all physical and bridge interfaces",
+                "description": "Aggregated and per-interface traffic of monitored interfaces",
                 "monitored_interfaces": [
-                    name for name in psutil.net_if_stats().keys()
-                    if name != 'lo' and not name.startswith(('veth', 'fw'))
+                    name for name in psutil.net_if_stats().keys() if is_monitored_nic(name)
                 ]
             }
         }
     )
 
-    sn_to_pool = await _get_zfs_serial_mapping()
-    try:
+    zfs_pools = await probe_zfs()
+    device_to_pool = device_pool_map(zfs_pools)
+    for pool in zfs_pools.values():
         # Use 'zfs list' for USABLE capacity instead of 'zpool list' which is RAW capacity
-        proc = await asyncio.create_subprocess_exec(
-            "zfs", "list", "-H", "-p", "-o", "name,avail,used", 
-            stdout=asyncio.subprocess.PIPE
+        usage = pool.usage()
+        if not usage:
+            continue
+        total_bytes = usage['total_bytes']
+
+        # Convert to human readable like '26.0T' or '500G'
+        tb = total_bytes / (1024**4)
+        if tb >= 1:
+            size_str = f"{tb:.1f}T"
+        else:
+            gb = total_bytes / (1024**3)
+            size_str = f"{gb:.1f}G"
+
+        await Device.update_or_create(
+            name=pool.name,
+            defaults={"type": "zfs_pool", "details": {"max_size": size_str}}
         )
-        stdout, _ = await proc.communicate()
-        if stdout:
-            for line in stdout.decode().strip().split('\n'):
-                if '/' in line: continue # skip datasets, only root pools
-                name, avail, used = line.split()
-                # Use raw bytes for more accurate summing before rounding
-                avail_bytes = int(avail)
-                used_bytes = int(used)
-                total_bytes = avail_bytes + used_bytes
-                
-                # Convert to human readable like '26.0T' or '500G'
-                tb = total_bytes / (1024**4)
-                if tb >= 1:
-                    size_str = f"{tb:.1f}T"
-                else:
-                    gb = total_bytes / (1024**3)
-                    size_str = f"{gb:.1f}G"
-                    
-                await Device.update_or_create(
-                    name=name,
-                    defaults={"type": "zfs_pool", "details": {"max_size": size_str}}
-                )
 
-    except OSError:
-        pass
+    if arc_stats.available:
+        arc = arc_stats.read()
+        await Device.update_or_create(
+            name="arc",
+            defaults={"type": "zfs_arc", "details": {"max_size": f"{arc.get('c_max', 0) / (1024**3):.1f}G"}}
+        )
 
     try:
         proc = await asyncio.create_subprocess_exec("smartctl", "--scan", "--json", stdout=asyncio.subprocess.PIPE)
@@ -194,19 +137,8 @@ async def perform_inventory():
                 drive_type = "ssd" if rotation_rate == 0 else "hdd"
 
                 if sn:
-                    pool_name = sn_to_pool.get(sn)
-                    if pool_name is None:
-                        # Improved partial match for serials (often prefix/suffix matches)
-                        for zfs_sn, p_name in sn_to_pool.items():
-                            if sn in zfs_sn or zfs_sn in sn:
-                                pool_name = p_name
-                                break
-                    
-                    # One more check: sometimes /dev/ name is used in zpool status
-                    if pool_name is None:
-                        # we would need more info from zpool status here but for now 
-                        # let's trust _get_zfs_serial_mapping's detection of vdev paths
-                        pass
+                    # zpool status -L -P lists resolved device paths, smartctl --scan gives the disk path
+                    pool_name = device_to_pool.get(path) or device_to_pool.get(path.split('/')[-1])
 
                     await Device.update_or_create(
                         name=sn,
@@ -225,4 +157,5 @@ async def perform_inventory():
     except Exception as e:
         logging.error(f"Disk inventory error: {e}")
 
+    await device_registry.load()
     logging.info("Inventory scan complete.")
\ No newline at end of file
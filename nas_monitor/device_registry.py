@@ -0,0 +1,42 @@
+import logging
+from typing import Dict, List, Optional
+
+from nas_monitor.models import Device
+
+
+class DeviceRegistry:
+    """
+    Process-wide copy of the Device table, so collector ticks, ingest and alerting
+    resolve devices without database queries.
+    Loaded at startup, reloaded after inventory and updated by the device settings endpoint.
+    """
+
+    def __init__(self):
+        # {device_name: Device}
+        self._devices: Dict[str, Device] = {}
+
+    async def load(self):
+        self._devices = {device.name: device for device in await Device.all()}
+        logging.debug('Device registry loaded: %s devices', len(self._devices))
+
+    def put(self, device: Device):
+        """Store a created or updated device"""
+        self._devices[device.name] = device
+
+    def get(self, name: str) -> Optional[Device]:
+        return self._devices.get(name)
+
+    def all(self, enabled: Optional[bool] = None) -> List[Device]:
+        return [
+            device for device in self._devices.values()
+            if enabled is None or device.enabled == enabled
+        ]
+
+    def enabled_by_type(self, dev_type: str) -> List[Device]:
+        return [device for device in self._devices.values() if device.enabled and device.type == dev_type]
+
+    def clear(self):
+        self._devices.clear()
+
+
+device_registry = DeviceRegistry()
@@ -0,0 +1,111 @@
+import io
+from typing import AsyncIterator, List
+
+import msgpack
+import orjson
+
+try:
+    # optional, enables Arrow IPC export
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
+from nas_monitor.metrics import STATS_COLUMNS, build_metric_row
+
+MEDIA_TYPES = {
+    "arrow": "application/vnd.apache.arrow.stream",
+    "msgpack": "application/x-msgpack",
+    "ndjson": "application/x-ndjson",
+}
+FILE_EXTENSIONS = {
+    "arrow": "arrows",
+    "msgpack": "msgpack",
+}
+
+
+def available_formats() -> List[str]:
+    return ["arrow", "msgpack"] if pa else ["msgpack"]
+
+
+def default_format() -> str:
+    return available_formats()[0]
+
+
+def arrow_schema(with_stats: bool):
+    fields = [
+        pa.field("device", pa.string()),
+        pa.field("label", pa.string()),
+        pa.field("type", pa.string()),
+        pa.field("ts", pa.timestamp("s", tz="UTC")),
+        pa.field("value", pa.float64()),
+    ]
+    if with_stats:
+        fields += [pa.field(key, pa.int64() if key == "count" else pa.float64()) for key in STATS_COLUMNS]
+    return pa.schema(fields)
+
+
+async def arrow_stream(pages, with_stats: bool) -> AsyncIterator[bytes]:
+    """
+    Encode pages from iter_metric_pages() as Arrow IPC stream: one record batch per page.
+    Bytes are yielded as soon as a batch is written.
+    """
+    schema = arrow_schema(with_stats)
+    sink = io.BytesIO()
+
+    def take() -> bytes:
+        data = sink.getvalue()
+        sink.seek(0)
+        sink.truncate()
+        return data
+
+    with pa.ipc.new_stream(sink, schema) as writer:
+        yield take()
+        async for series, rows in pages:
+            size = len(rows)
+            columns = list(zip(*rows))[1:]
+            arrays = [
+                pa.repeat(series['device_name'], size),
+                pa.repeat(series['label'], size),
+                pa.repeat(series['device_type'], size),
+            ]
+            arrays += [pa.array(column, type=dtype) for column, dtype in zip(columns, schema.types[3:])]
+            writer.write_batch(pa.RecordBatch.from_arrays(arrays, schema=schema))
+            yield take()
+    yield take()
+
+
+async def msgpack_stream(pages, with_stats: bool) -> AsyncIterator[bytes]:
+    """
+    Encode pages from iter_metric_pages() as a stream of MessagePack maps, one per page,
+    in the same columnar layout as /api/metrics?format=columnar:
+    {series: {device, label, type}, t: [...], v: [...]} (+ min/max/count/sum/last for rollups).
+    Read with msgpack.Unpacker.
+    """
+    packer = msgpack.Packer()
+    async for series, rows in pages:
+        columns = list(zip(*rows))[1:]
+        frame = {
+            "series": {
+                "device": series['device_name'],
+                "label": series['label'],
+                "type": series['device_type']
+            },
+            "t": columns[0],
+            "v": columns[1]
+        }
+        if with_stats:
+            frame.update(zip(STATS_COLUMNS, columns[2:]))
+        yield packer.pack(frame)
+
+
+async def ndjson_stream(pages, with_stats: bool) -> AsyncIterator[bytes]:
+    """
+    Encode pages from iter_metric_rows() (ordered by time across series) as newline delimited JSON,
+    one row of /api/metrics rows format per line, one chunk per page.
+    """
+    option = orjson.OPT_APPEND_NEWLINE
+    async for page in pages:
+        yield b"".join(
+            orjson.dumps(build_metric_row(row[0], row[1], row[2], series, row[3:] if with_stats else None), option=option)
+            for series, row in page
+        )
@@ -0,0 +1,161 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import List, Optional
+
+from nas_monitor.config import config
+from nas_monitor.models import RawMetric
+
+# Window of the ingest rate in stats
+RATE_WINDOW_SECONDS = 60
+# Queued by stop() behind the pending rows
+_STOP = object()
+
+
+class IngestWriter:
+    """
+    Group commit of raw samples: collectors put rows into a bounded queue and a single writer task
+    drains it, one bulk insert per INGEST_BATCH_SIZE rows or per INGEST_FLUSH_INTERVAL seconds,
+    whichever comes first. At most INGEST_QUEUE_SIZE rows wait in the queue plus one batch being written;
+    when the queue is full, submit() waits for the writer (backpressure).
+    A failed insert (e.g. "database is locked") is retried INGEST_RETRIES times with backoff
+    before the batch is dropped.
+    Without a running writer (scripts, tests) rows are written immediately;
+    after stop() late rows (a collector job still running at shutdown) are dropped.
+    """
+
+    def __init__(self, batch_size: int = None, flush_interval: float = None, queue_size: int = None):
+        self.batch_size = batch_size or config.INGEST_BATCH_SIZE
+        self.flush_interval = flush_interval or config.INGEST_FLUSH_INTERVAL
+        self.queue_size = queue_size or config.INGEST_QUEUE_SIZE
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stopped = False
+        self.retries = config.INGEST_RETRIES
+        self.retry_delay = config.INGEST_RETRY_DELAY
+        self.submitted = 0
+        self.written = 0
+        self.failed = 0
+        self.flushes = 0
+        self.last_flush_ms = 0.0
+        self.max_flush_ms = 0.0
+        self._total_flush_ms = 0.0
+        # (monotonic time, rows) of recent flushes
+        self._recent: deque = deque()
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self):
+        if self.running:
+            return
+        self._stopped = False
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the writer after it has flushed everything queued before the call"""
+        if not self.running:
+            return
+        await self._queue.put(_STOP)
+        await self._task
+        self._task = None
+        # rows submitted while stopping
+        rows = []
+        while not self._queue.empty():
+            rows.append(self._queue.get_nowait())
+        await self._flush([row for row in rows if row is not _STOP])
+        # the database is closed next
+        self._stopped = True
+        logging.info('Ingest writer stopped, %s rows written', self.written)
+
+    async def submit(self, rows: List[RawMetric]):
+        self.submitted += len(rows)
+        if self._stopped:
+            self.failed += len(rows)
+            logging.warning('Ingest writer is stopped, %s metrics dropped', len(rows))
+            return
+        if not self.running:
+            await self._flush(rows)
+            return
+        for row in rows:
+            await self._queue.put(row)
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            row = await self._queue.get()
+            if row is _STOP:
+                return
+            rows = [row]
+            stopping = False
+            deadline = loop.time() + self.flush_interval
+            try:
+                while len(rows) < self.batch_size:
+                    if self._queue.empty():
+                        timeout = deadline - loop.time()
+                        if timeout <= 0:
+                            break
+                        row = await asyncio.wait_for(self._queue.get(), timeout)
+                    else:
+                        row = self._queue.get_nowait()
+                    if row is _STOP:
+                        stopping = True
+                        break
+                    rows.append(row)
+            except asyncio.TimeoutError:
+                pass
+            await self._flush(rows)
+            if stopping:
+                return
+
+    async def _flush(self, rows: List[RawMetric]):
+        if not rows:
+            return
+        started = time.perf_counter()
+        for attempt in range(self.retries + 1):
+            try:
+                await RawMetric.bulk_create(rows)
+                break
+            except Exception as e:
+                if attempt == self.retries:
+                    self.failed += len(rows)
+                    logging.error('Failed to write %s metrics: %s', len(rows), e)
+                    return
+                delay = self.retry_delay * 2 ** attempt
+                logging.warning('Failed to write %s metrics: %s, retry in %.1f s', len(rows), e, delay)
+                await asyncio.sleep(delay)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        self.written += len(rows)
+        self.flushes += 1
+        self.last_flush_ms = elapsed_ms
+        self.max_flush_ms = max(self.max_flush_ms, elapsed_ms)
+        self._total_flush_ms += elapsed_ms
+        now = time.monotonic()
+        self._recent.append((now, len(rows)))
+        while self._recent and now - self._recent[0][0] > RATE_WINDOW_SECONDS:
+            self._recent.popleft()
+        logging.debug('Flushed %s metrics in %.1f ms', len(rows), elapsed_ms)
+
+    def stats(self) -> dict:
+        now = time.monotonic()
+        recent_rows = sum(rows for ts, rows in self._recent if now - ts <= RATE_WINDOW_SECONDS)
+        return {
+            "running": self.running,
+            "queued": self._queue.qsize() if self.running else 0,
+            "queue_size": self.queue_size,
+            "submitted": self.submitted,
+            "written": self.written,
+            "failed": self.failed,
+            "flushes": self.flushes,
+            "rows_per_second": round(recent_rows / RATE_WINDOW_SECONDS, 2),
+            "avg_batch_rows": round(self.written / self.flushes, 1) if self.flushes else 0,
+            "last_flush_ms": round(self.last_flush_ms, 2),
+            "avg_flush_ms": round(self._total_flush_ms / self.flushes, 2) if self.flushes else 0,
+            "max_flush_ms": round(self.max_flush_ms, 2),
+        }
+
+
+ingest_writer = IngestWriter()
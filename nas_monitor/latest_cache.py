@@ -0,0 +1,75 @@
+import logging
+from typing import Dict, List, Optional
+
+from tortoise import Tortoise
+
+from nas_monitor.shemas import Metrics
+
+
+class LatestValueCache:
+    """
+    Process-wide store of the latest value of every device/label series.
+    Updated on ingest, so reading it never touches the database.
+    """
+
+    def __init__(self):
+        # {device_name: {label: value}}
+        self._values: Dict[str, Dict[str, float]] = {}
+        # {device_name: device_type}
+        self._types: Dict[str, str] = {}
+
+    def update(self, device_name: str, device_type: str, label: str, value: float):
+        self._values.setdefault(device_name, {})[label] = value
+        self._types[device_name] = device_type
+
+    def update_batch(self, metrics: List[Metrics], device_types: Dict[str, str]):
+        """
+        Store a batch of freshly collected metrics.
+        device_types: {device_name: device_type}
+        """
+        for item in metrics:
+            dev_type = device_types.get(item.device_name)
+            if dev_type is None:
+                continue
+            self.update(item.device_name, dev_type, item.label, item.value)
+
+    def get(self, device_types: Optional[List[str]] = None) -> Dict[str, Dict[str, float]]:
+        """
+        Returns dict: {device_name: {label: value}}
+        """
+        return {
+            name: dict(labels)
+            for name, labels in self._values.items()
+            if not device_types or self._types.get(name) in device_types
+        }
+
+    def clear(self):
+        self._values.clear()
+        self._types.clear()
+
+    async def load(self):
+        """
+        Seed the cache from the database (called once at startup).
+        SQLite returns the bare columns of the row holding MAX(ts) for each group.
+        """
+        query = """
+            SELECT
+                d.name AS device_name,
+                d.type AS device_type,
+                s.label AS label,
+                m.value AS value,
+                MAX(m.ts) AS ts
+            FROM rawmetric m
+            JOIN series s ON s.id = m.series_id
+            JOIN device d ON d.id = s.device_id
+            GROUP BY m.series_id
+        """
+        conn = Tortoise.get_connection("default")
+        rows = await conn.execute_query_dict(query)
+        self.clear()
+        for row in rows:
+            self.update(row['device_name'], row['device_type'], row['label'], row['value'])
+        logging.info('Latest values cache loaded: %s series', len(rows))
+
+
+latest_cache = LatestValueCache()
@@ -0,0 +1,103 @@
+import asyncio
+import logging
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Set
+
+from nas_monitor.config import config
+from nas_monitor.latest_cache import latest_cache
+from nas_monitor.shemas import Metrics
+
+
+class LiveSubscriber:
+    """
+    One connected client: subscription filter and a bounded queue of pending messages.
+    A slow client never blocks collectors: when the queue is full the oldest message is dropped.
+    """
+
+    def __init__(self, device_types: Optional[List[str]] = None, device_names: Optional[List[str]] = None,
+                 queue_size: int = None):
+        self.device_types: Set[str] = set(device_types or [])
+        self.device_names: Set[str] = set(device_names or [])
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size or config.LIVE_QUEUE_SIZE)
+        self.dropped = 0
+
+    def set_filter(self, device_types: Optional[List[str]] = None, device_names: Optional[List[str]] = None):
+        self.device_types = set(device_types or [])
+        self.device_names = set(device_names or [])
+
+    def wants_type(self, device_type: str) -> bool:
+        return not self.device_types or device_type in self.device_types
+
+    def wants_device(self, device_name: str) -> bool:
+        return not self.device_names or device_name in self.device_names
+
+    def put(self, message: dict):
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(message)
+
+
+class LiveHub:
+    """
+    Fan-out of freshly collected metrics to live subscribers (WebSocket clients).
+    Fed by the collector jobs, so any number of open dashboards costs one publish per batch
+    and no database reads.
+    """
+
+    def __init__(self):
+        self._subscribers: Set[LiveSubscriber] = set()
+
+    @property
+    def subscribers_count(self) -> int:
+        return len(self._subscribers)
+
+    def subscribe(self, device_types: Optional[List[str]] = None,
+                  device_names: Optional[List[str]] = None) -> LiveSubscriber:
+        subscriber = LiveSubscriber(device_types, device_names)
+        self._subscribers.add(subscriber)
+        logging.debug('Live subscriber added, total: %s', len(self._subscribers))
+        return subscriber
+
+    def unsubscribe(self, subscriber: LiveSubscriber):
+        self._subscribers.discard(subscriber)
+        if subscriber.dropped:
+            logging.info('Live subscriber removed, %s messages dropped', subscriber.dropped)
+
+    def snapshot(self, subscriber: LiveSubscriber) -> dict:
+        """Latest values matching subscriber filter, sent on connect and on filter change"""
+        values = latest_cache.get(list(subscriber.device_types) or None)
+        return {
+            "type": "snapshot",
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "data": {name: labels for name, labels in values.items() if subscriber.wants_device(name)}
+        }
+
+    def publish(self, device_type: str, metrics: List[Metrics]):
+        """
+        Send a batch of one device type to matching subscribers:
+        {type: "metrics", device_type, timestamp, data: {device_name: {label: value}}}
+        """
+        if not self._subscribers:
+            return
+        data: Dict[str, Dict[str, float]] = {}
+        for item in metrics:
+            data.setdefault(item.device_name, {})[item.label] = item.value
+        timestamp = datetime.now(timezone.utc).isoformat()
+        for subscriber in self._subscribers:
+            if not subscriber.wants_type(device_type):
+                continue
+            if subscriber.device_names:
+                selected = {name: labels for name, labels in data.items() if name in subscriber.device_names}
+            else:
+                selected = data
+            if selected:
+                subscriber.put({
+                    "type": "metrics",
+                    "device_type": device_type,
+                    "timestamp": timestamp,
+                    "data": selected
+                })
+
+
+live_hub = LiveHub()
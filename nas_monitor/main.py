@@ -18,9 +18,13 @@ from nas_monitor.api_router import router as api_router
 from nas_monitor.models import model_to_dict, init_db, disconnect_db
 from nas_monitor import metrics as mt
 from nas_monitor.device_inventory import perform_inventory
+from nas_monitor.device_registry import device_registry
+from nas_monitor.ingest import ingest_writer
+from nas_monitor.latest_cache import latest_cache
 from nas_monitor.manager import setup_polling
 from nas_monitor.metrics import fetch_metrics_data
 from nas_monitor.shemas import RequestMetricsPayload
+from nas_monitor.utils.zfs_stats import zpool_iostat
 # Import sender manager to initialize it during startup (it does init in constructor)
 from nas_monitor.senders.manager import sender_manager
 
@@ -29,12 +33,18 @@ from nas_monitor.senders.manager import sender_manager
 async def lifespan(app: FastAPI):
     scheduler = AsyncIOScheduler()
     await init_db()
+    await device_registry.load()
+    await latest_cache.load()
+    ingest_writer.start()
     if not config.DISABLE_TASKS:
         setup_polling(scheduler)
     await perform_inventory()
     scheduler.start()
     yield
     scheduler.shutdown(wait=True)
+    await zpool_iostat.stop()
+    # collector jobs still running after shutdown() get their rows dropped by the stopped writer
+    await ingest_writer.stop()
     await disconnect_db()
 
 app = FastAPI(
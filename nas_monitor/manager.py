@@ -1,12 +1,16 @@
 import logging
 import asyncio
+from datetime import datetime
 
+from nas_monitor.aggregation import run_aggregation
+from nas_monitor.blocks import raw_blocks
 from nas_monitor.collectors import BaseCollector
 from nas_monitor.config import config
+from nas_monitor.live import live_hub
+from nas_monitor.partitions import raw_partitions
 from nas_monitor.metrics import (
     add_metrics_batch, 
     get_enabled_devices_by_type,
-    run_aggregation,
     cleanup_metrics,
     RawMetric,
     HourlyMetric,
@@ -14,17 +18,18 @@ from nas_monitor.metrics import (
 )
 from nas_monitor.alerting import alert_engine
 
-# map collectors by device type
-COLLECTORS = {cls.dev_type: cls() for cls in BaseCollector.__subclasses__()}
+# map collectors by job name (device type by default)
+COLLECTORS = {cls.name or cls.dev_type: cls() for cls in BaseCollector.__subclasses__()}
 
 
-async def job_collector_task(dev_type: str):
-    """Call scheduled task dor device type"""
-    devices = await get_enabled_devices_by_type(dev_type)
+async def job_collector_task(name: str):
+    """Call scheduled task for collector name (device type by default)"""
+    collector = COLLECTORS.get(name)
+    dev_type = collector.dev_type if collector else name
+    devices = get_enabled_devices_by_type(dev_type)
     if not devices:
         logging.warning('No devices to scan for type: %s', dev_type)
         return
-    collector = COLLECTORS.get(dev_type)
     if collector:
         data = await collector.collect()
         enabled_names = {d.name for d in devices}
@@ -32,13 +37,14 @@ async def job_collector_task(dev_type: str):
 
         if filtered_data:
             await add_metrics_batch(filtered_data)
+            live_hub.publish(dev_type, filtered_data)
             
             # Run alerting checks asynchronously
-            asyncio.create_task(alert_engine.process(filtered_data, devices))
+            asyncio.create_task(alert_engine.process(filtered_data))
         else:
             logging.warning('Nothing to write for type: %s', dev_type)
     else:
-        logging.warning('No collector for type: %s', dev_type)
+        logging.warning('No collector: %s', name)
 
 
 def setup_polling(scheduler):
@@ -67,25 +73,62 @@ def setup_polling(scheduler):
         seconds=config.COLLECTOR_INTERVAL_STORAGE, 
         args=['storage']
     )
+    # Disk I/O throughput and latency
+    scheduler.add_job(
+        job_collector_task, 'interval',
+        seconds=config.COLLECTOR_INTERVAL_DISKIO,
+        args=['diskio']
+    )
+    # SMART (slow cadence, first run at startup so temperatures are known)
+    scheduler.add_job(
+        job_collector_task, 'interval',
+        seconds=config.COLLECTOR_INTERVAL_SMART,
+        next_run_time=datetime.now(),
+        args=['smart']
+    )
     # ZFS Pool
     scheduler.add_job(
         job_collector_task, 'interval', 
         seconds=config.COLLECTOR_INTERVAL_ZFS_POOL, 
         args=['zfs_pool']
     )
+    # ZFS pool I/O (latest values of the zpool iostat stream)
+    scheduler.add_job(
+        job_collector_task, 'interval',
+        seconds=config.COLLECTOR_INTERVAL_ZFS_IO,
+        args=['zfs_io']
+    )
+    # ZFS ARC
+    scheduler.add_job(
+        job_collector_task, 'interval',
+        seconds=config.COLLECTOR_INTERVAL_ZFS_ARC,
+        args=['zfs_arc']
+    )
+
+    # Raw partitions: close the hot table of the previous day
+    scheduler.add_job(
+        raw_partitions.rotate, 'cron',
+        hour='*', minute=1
+    )
+
+    # Raw blocks: compress the closed hour of raw samples
+    scheduler.add_job(
+        raw_blocks.compact, 'cron',
+        hour='*', minute=3
+    )
 
     # Aggregation & Cleanup
-    # Raw -> Hourly (every hour)
+    # Raw -> Hourly (every hour, after the grace period of the closed hour)
     scheduler.add_job(
         run_aggregation, 'cron',
-        hour='*',
+        hour='*', minute=5,
         args=[RawMetric, HourlyMetric, 'raw_to_hourly', 60]
     )
-    # Hourly -> History (every day)
+    # Hourly -> History (every day, after the last hour of the day is aggregated)
     scheduler.add_job(
         run_aggregation, 'cron',
-        hour=0,
-        args=[HourlyMetric, HistoryMetric, 'hourly_to_history', 1440]
+        hour=0, minute=15,
+        args=[HourlyMetric, HistoryMetric, 'hourly_to_history', 1440, 'raw_to_hourly']
     )
     # Cleanup (every day)
     scheduler.add_job(
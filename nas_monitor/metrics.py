@@ -1,12 +1,23 @@
+import heapq
 import logging
-import psutil
-import time
 from datetime import datetime, timedelta, timezone
-
-from tortoise import Tortoise, transactions
-
-from nas_monitor.models import Device, RawMetric, HourlyMetric, HistoryMetric, MigrationState
+from itertools import groupby
+from operator import itemgetter
+
+import numpy as np
+from tortoise.expressions import Q
+
+from nas_monitor.aggregation import RollupStats, ROLLUP_COLUMNS
+from nas_monitor.blocks import raw_blocks
+from nas_monitor.db import read_pool
+from nas_monitor.device_registry import device_registry
+from nas_monitor.ingest import ingest_writer
+from nas_monitor.partitions import raw_partitions
+from nas_monitor.latest_cache import latest_cache
+from nas_monitor.models import Device, Series, RawMetric, HourlyMetric, HistoryMetric, RollupMetricBase
+from nas_monitor.config import config
 from nas_monitor.shemas import Metrics
+from nas_monitor.utils.downsample import lttb_indices
 from nas_monitor.utils.system_info import get_system_uptime
 
 
@@ -14,8 +25,8 @@ async def get_all_devices():
     return await Device.all()
 
 
-async def get_enabled_devices_by_type(dev_type: str):
-    return await Device.filter(enabled=True, type=dev_type).all()
+def get_enabled_devices_by_type(dev_type: str) -> list[Device]:
+    return device_registry.enabled_by_type(dev_type)
 
 # todo: from config
 # data compression time ranges
@@ -25,6 +36,9 @@ RETENTION = {
     "history": timedelta(days=3650) # 10 years
 }
 
+# smallest page of one series in the merged stream of iter_metric_rows()
+MIN_MERGE_PAGE_SIZE = 100
+
 # map type to model
 MODELS_MAP = {
     "raw": RawMetric,
@@ -32,6 +46,19 @@ MODELS_MAP = {
     "history": HistoryMetric
 }
 
+# approximate distance between points of a series (seconds), finest tier first
+TIER_RESOLUTION = {
+    "raw": min(
+        config.COLLECTOR_INTERVAL_CPU,
+        config.COLLECTOR_INTERVAL_RAM,
+        config.COLLECTOR_INTERVAL_NETWORK,
+        config.COLLECTOR_INTERVAL_STORAGE,
+        config.COLLECTOR_INTERVAL_ZFS_POOL
+    ),
+    "hourly": 3600,
+    "history": 86400
+}
+
 
 async def upsert_device(name: str, dev_type: str = "unknown", details: dict|None = None):
     """
@@ -47,102 +74,231 @@ async def upsert_device(name: str, dev_type: str = "unknown", details: dict|None
     return device
 
 
-async def add_metrics_batch(data: list[Metrics]):
-    devices = await Device.all()
-    device_map = {d.name: d for d in devices}
+# {(device_id, label): series_id}
+_SERIES_CACHE: dict[tuple[int, str], int] = {}
+
+
+def to_epoch(value: datetime) -> int:
+    """Datetime to epoch seconds, naive datetimes are treated as UTC"""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return int(value.timestamp())
+
+
+def from_epoch(ts: int) -> datetime:
+    return datetime.fromtimestamp(ts, tz=timezone.utc)
+
+
+async def get_series_id(device_id: int, label: str) -> int:
+    """
+    Resolve series id for device/label pair, create series if not exists
+    """
+    key = (device_id, label)
+    series_id = _SERIES_CACHE.get(key)
+    if series_id is None:
+        series, _ = await Series.get_or_create(device_id=device_id, label=label)
+        series_id = _SERIES_CACHE[key] = series.id
+    return series_id
+
+
+async def get_series_map(device_types: list[str] = None, device_names: list[str] = None,
+                         labels: list[str] = None) -> dict[int, dict]:
+    """
+    Get series matching the filters.
+    Returns dict: {series_id: {label, device_name, device_type}}
+    """
+    queryset = Series.all()
+    if device_types:
+        queryset = queryset.filter(device__type__in=device_types)
+    if device_names:
+        queryset = queryset.filter(device__name__in=device_names)
+    if labels:
+        queryset = queryset.filter(label__in=labels)
+    async with read_pool.acquire() as db:
+        rows = await queryset.using_db(db).values(
+            "id",
+            "label",
+            device_name="device__name",
+            device_type="device__type"
+        )
+    return {row.pop('id'): row for row in rows}
 
+
+async def add_metrics_batch(data: list[Metrics]):
     to_create = []
-    now = datetime.now(timezone.utc)
+    device_types = {}
+    now = to_epoch(datetime.now(timezone.utc))
 
     for item in data:
         # get device
-        device = device_map.get(item.device_name)
+        device = device_registry.get(item.device_name)
 
         if not device:
             print(f"Warning: Device {item.device_name} not found in database. Run inventory.")
             continue
+        device_types[device.name] = device.type
         to_create.append(RawMetric(
-            timestamp=now,
-            device=device,
-            label=item.label,
+            ts=now,
+            series_id=await get_series_id(device.id, item.label),
             value=item.value
         ))
 
     if to_create:
-        await RawMetric.bulk_create(to_create)
+        # latest values are served right away, rows reach the database with the next group commit
+        latest_cache.update_batch(data, device_types)
+        await ingest_writer.submit(to_create)
         logging.debug('Added metrics batch %s', len(to_create))
 
 
-async def run_aggregation(source_model, target_model, stage_name: str, interval_minutes: int):
-    logging.debug('Running aggregation on %s', stage_name)
-    state, _ = await MigrationState.get_or_create(stage=stage_name)
-
-    last_entry = await source_model.all().order_by("-timestamp").first()
-    if not last_entry: return
-
-    cutoff_time = last_entry.timestamp.replace(second=0, microsecond=0)
-    if interval_minutes >= 60:
-        cutoff_time = cutoff_time.replace(minute=0)
-
-    table_name = source_model._meta.db_table
-    interval_sec = interval_minutes * 60
-
-    # group by interval, device and label
-    query = f"""
-        SELECT 
-            (CAST(strftime('%s', timestamp) AS INT) / {interval_sec}) * {interval_sec} as interval_ts,
-            device_id,
-            label, 
-            AVG(value) as avg_val,
-            MAX(id) as max_id
-        FROM {table_name}
-        WHERE id > {state.last_processed_id} AND timestamp < '{cutoff_time.isoformat()}'
-        GROUP BY interval_ts, device_id, label
-        ORDER BY interval_ts ASC
-    """
-
-    conn = Tortoise.get_connection("default")
-    results = await conn.execute_query_dict(query)
-
-    if results:
-        async with transactions.in_transaction():
-            new_entries = [
-                target_model(
-                    timestamp=datetime.fromtimestamp(row['interval_ts'], tz=timezone.utc),
-                    device_id=row['device_id'],
-                    label=row['label'],
-                    value=row['avg_val']
-                ) for row in results
-            ]
-            await target_model.bulk_create(new_entries)
-            state.last_processed_id = max(row['max_id'] for row in results)
-            await state.save()
-
-
 async def cleanup_metrics():
     logging.debug('Cleaning up metrics')
     now = datetime.now(timezone.utc)
     for key, model in MODELS_MAP.items():
-        await model.filter(timestamp__lt=now - RETENTION[key]).delete()
+        cutoff = to_epoch(now - RETENTION[key])
+        if model is RawMetric:
+            await raw_blocks.drop_expired(cutoff)
+            # rows are kept for the recent days only, older samples stay in blocks
+            cutoff = await raw_blocks.rows_cutoff(to_epoch(now - timedelta(days=config.RAW_ROWS_RETENTION_DAYS)))
+        if model is RawMetric and raw_partitions.active:
+            # whole partitions are dropped, no row deletes
+            await raw_partitions.drop_expired(cutoff)
+            continue
+        await model.filter(ts__lt=cutoff).delete()
+
+
+# API stats keys to rollup columns
+STATS_COLUMNS = {
+    "min": "min_value",
+    "max": "max_value",
+    "count": "sample_count",
+    "sum": "sum_value",
+    "last": "last_value",
+}
+
+
+def _cursor_field(model) -> str:
+    """
+    Column compared with incremental cursors: row id of raw samples, update sequence of rollups
+    (a re-aggregated bucket keeps its id, but gets a new seq)
+    """
+    return "seq" if issubclass(model, RollupMetricBase) else "id"
+
+
+def _filter_range(queryset, start_time: datetime = None, end_time: datetime = None,
+                  since_id: int = None, until_id: int = None):
+    if start_time:
+        queryset = queryset.filter(ts__gte=to_epoch(start_time))
+    if end_time:
+        queryset = queryset.filter(ts__lte=to_epoch(end_time))
+    cursor_field = _cursor_field(queryset.model)
+    if since_id is not None:
+        queryset = queryset.filter(**{f"{cursor_field}__gt": since_id})
+    if until_id is not None:
+        queryset = queryset.filter(**{f"{cursor_field}__lte": until_id})
+    return queryset
+
+
+async def _query_series_range(model, series_map: dict[int, dict],
+                              start_time: datetime = None, end_time: datetime = None,
+                              columns: tuple = ("id", "series_id", "ts", "value"),
+                              order_by: tuple = ("ts",),
+                              since_id: int = None, until_id: int = None) -> list[tuple]:
+    """
+    Range scan over the (series_id, ts) index.
+    Raw samples older than the oldest raw row are decoded from blocks (their id is 0),
+    except for incremental reads (since_id): blocks only hold old data.
+    Returns list of tuples with requested columns
+    """
+    if not series_map:
+        return []
+    queryset = _filter_range(model.filter(series_id__in=list(series_map)), start_time, end_time, since_id, until_id)
+    async with read_pool.acquire() as db:
+        rows = await queryset.using_db(db).order_by(*order_by).values_list(*columns)
+        if model is not RawMetric or since_id is not None:
+            return rows
+        block_rows = await _read_block_rows(list(series_map), start_time, end_time, columns, db)
+    if not block_rows:
+        return rows
+    if order_by == ("ts",):
+        # blocks end before the oldest raw row
+        return block_rows + rows
+    return sorted(block_rows + rows, key=itemgetter(*(columns.index(name) for name in order_by)))
+
+
+async def _read_block_rows(series_ids: list[int], start_time: datetime = None, end_time: datetime = None,
+                           columns: tuple = ("id", "series_id", "ts", "value"), db=None) -> list[tuple]:
+    """Raw samples from compressed blocks as tuples of columns, ordered by time"""
+    series, ts, values = await raw_blocks.read(
+        series_ids,
+        to_epoch(start_time) if start_time else None,
+        to_epoch(end_time) if end_time else None,
+        db=db
+    )
+    order = np.argsort(ts, kind="stable")
+    return _block_tuples(series[order], ts[order], values[order], columns)
+
+
+def _block_tuples(series: np.ndarray, ts: np.ndarray, values: np.ndarray, columns: tuple) -> list[tuple]:
+    """Decoded block samples as tuples of columns, a block sample has no row id (0)"""
+    arrays = {"id": np.zeros(len(ts), dtype=np.int64), "series_id": series, "ts": ts, "value": values}
+    return list(zip(*(arrays[name].tolist() for name in columns)))
+
+
+async def _iter_block_pages(series_id: int, columns: tuple, start_time: datetime = None,
+                            end_time: datetime = None, page_size: int = None):
+    """
+    Pages of one series from compressed blocks ordered by time.
+    Blocks are read with keyset pagination, a few per query sized to about page_size samples,
+    so at most one decoded page (plus the rest of the previous one) is held in memory.
+    """
+    start_ts = to_epoch(start_time) if start_time else None
+    async with read_pool.acquire() as db:
+        upper = await raw_blocks.read_upper(to_epoch(end_time) if end_time else None, db)
+    blocks_per_page = max(1, page_size * TIER_RESOLUTION["raw"] // config.RAW_BLOCK_SECONDS)
+    pending = []
+    after_ts = None
+    while True:
+        async with read_pool.acquire() as db:
+            ts, values, after_ts = await raw_blocks.read_page(series_id, start_ts, upper, after_ts,
+                                                              blocks_per_page, db)
+        if after_ts is None:
+            break
+        pending.extend(_block_tuples(np.full(len(ts), series_id, dtype=np.int64), ts, values, columns))
+        while len(pending) >= page_size:
+            yield pending[:page_size]
+            pending = pending[page_size:]
+    if pending:
+        yield pending
+
+
+async def get_metrics_cursor(history_type: str) -> int:
+    """
+    Cursor for incremental reads: the last row id of raw tier, the last update seq of rollup tiers.
+    Both only grow, so rows added (or buckets re-aggregated) later are always above the cursor.
+    Take the cursor before reading and read with until_id=cursor,
+    then rows committed meanwhile are returned by the next read instead of being skipped.
+    """
+    model = MODELS_MAP.get(history_type)
+    if not model:
+        raise ValueError(f"Invalid history type: {history_type}")
+    cursor_field = _cursor_field(model)
+    async with read_pool.acquire() as db:
+        values = await model.all().using_db(db).order_by(f"-{cursor_field}").limit(1).values_list(cursor_field, flat=True)
+    return (values[0] if values else None) or 0
 
 
 async def _read_range(model, devices: list[str] = None, labels: list[str] = None,
                       from_date: datetime = None, to_date: datetime = None):
-    queryset = model.all()
-    if devices:
-        queryset = queryset.filter(device__name__in=devices)
-    if labels:
-        queryset = queryset.filter(label__in=labels)
-    if from_date:
-        queryset = queryset.filter(timestamp__gte=from_date)
-    if to_date:
-        queryset = queryset.filter(timestamp__lte=to_date)
-    return await queryset.order_by("timestamp").values(
-        "timestamp",
-        "label",
-        "value",
-        device_name="device__name"
-    )
+    series_map = await get_series_map(device_names=devices, labels=labels)
+    rows = await _query_series_range(model, series_map, from_date, to_date)
+    return [
+        {
+            "timestamp": from_epoch(ts),
+            "label": series_map[series_id]['label'],
+            "value": value,
+            "device_name": series_map[series_id]['device_name']
+        } for _, series_id, ts, value in rows
+    ]
 
 async def read_raw_range(devices=None, labels=None, start=None, end=None):
     return await _read_range(RawMetric, devices, labels, start, end)
@@ -155,65 +311,327 @@ async def read_history_range(devices=None, labels=None, start=None, end=None):
 
 
 
+def select_history_type(start_time: datetime = None, end_time: datetime = None, max_points: int = None) -> str:
+    """
+    Pick the cheapest tier for a time range: the coarsest tier that still keeps data
+    for the whole range and gives at least max_points per series.
+    Without max_points the finest tier covering the range is used.
+    """
+    if start_time is None:
+        return "history"
+    now_ts = to_epoch(datetime.now(timezone.utc))
+    start_ts = to_epoch(start_time)
+    end_ts = to_epoch(end_time) if end_time else now_ts
+    covering = [
+        name for name in TIER_RESOLUTION
+        if start_ts >= now_ts - RETENTION[name].total_seconds()
+    ]
+    if not covering:
+        return "history"
+    if max_points:
+        for name in reversed(covering):
+            if (end_ts - start_ts) / TIER_RESOLUTION[name] >= max_points:
+                return name
+    return covering[0]
+
+
+def _downsample_series(series_rows: list[tuple], max_points: int) -> list[tuple]:
+    """
+    LTTB downsampling of one series to max_points.
+    series_rows: (id, series_id, ts, value, ...) ordered by time.
+    """
+    if len(series_rows) <= max_points:
+        return series_rows
+    ts = np.fromiter((row[2] for row in series_rows), dtype=np.float64, count=len(series_rows))
+    values = np.fromiter((row[3] for row in series_rows), dtype=np.float64, count=len(series_rows))
+    return [series_rows[i] for i in lttb_indices(ts, values, max_points)]
+
+
+def _downsample_rows(rows: list[tuple], max_points: int) -> list[tuple]:
+    """
+    LTTB downsampling of every series to max_points.
+    rows: (id, series_id, ts, value, ...) ordered by series and time.
+    Returns rows ordered by time.
+    """
+    result = []
+    for _, group in groupby(rows, key=itemgetter(1)):
+        result.extend(_downsample_series(list(group), max_points))
+    result.sort(key=itemgetter(2))
+    return result
+
+
+def build_metric_row(row_id: int, ts: int, value: float, series: dict, stats: tuple = None) -> dict:
+    """
+    Metric row of the rows response format.
+    stats: (min, max, count, sum, last) of a rollup, None for a raw sample (a raw row has no stats keys).
+    """
+    item = {
+        "id": row_id,
+        "timestamp": from_epoch(ts),
+        "label": series['label'],
+        "value": value,
+        "device_name": series['device_name'],
+        "device_type": series['device_type']
+    }
+    if stats is not None:
+        item.update(zip(STATS_COLUMNS, stats))
+    return item
+
+
 async def fetch_metrics_data(
         history_type: str,
         device_types: list[str] = None,
         device_names: list[str] = None,
         start_time: datetime = None,
-        end_time: datetime = None
+        end_time: datetime = None,
+        max_points: int = None,
+        since_id: int = None,
+        until_id: int = None
     ) -> list[dict]:
+    """
+    Metrics rows ordered by time. Rows of hourly and history tiers carry min/max/count/sum/last
+    stats of the bucket, raw rows only the sample value.
+    With max_points every series is downsampled (LTTB) to at most max_points rows.
+    since_id/until_id limit rows to the cursor range (since_id, until_id], see get_metrics_cursor().
+    """
     model = MODELS_MAP.get(history_type)
     if not model:
         raise ValueError(f"Invalid history type: {history_type}")
-    queryset = model.all()
-    if device_types:
-        queryset = queryset.filter(device__type__in=device_types)
-    if device_names:
-        queryset = queryset.filter(device__name__in=device_names)
-    if start_time:
-        queryset = queryset.filter(timestamp__gte=start_time)
-    if end_time:
-        queryset = queryset.filter(timestamp__lte=end_time)
-    return await queryset.order_by("timestamp").values(
-        "id",
-        "timestamp",
-        "label",
-        "value",
-        device_name="device__name",
-        device_type="device__type"
-    )
+    series_map = await get_series_map(device_types=device_types, device_names=device_names)
+    is_rollup = issubclass(model, RollupMetricBase)
+    columns = ("id", "series_id", "ts", "value") + (tuple(STATS_COLUMNS.values()) if is_rollup else ())
+    if max_points:
+        rows = await _query_series_range(model, series_map, start_time, end_time,
+                                         columns=columns, order_by=("series_id", "ts"),
+                                         since_id=since_id, until_id=until_id)
+        rows = _downsample_rows(rows, max_points)
+    else:
+        rows = await _query_series_range(model, series_map, start_time, end_time, columns=columns,
+                                         since_id=since_id, until_id=until_id)
+    return [
+        build_metric_row(row[0], row[2], row[3], series_map[row[1]], row[4:] if is_rollup else None)
+        for row in rows
+    ]
+
+
+async def fetch_metrics_columns(
+        history_type: str,
+        device_types: list[str] = None,
+        device_names: list[str] = None,
+        start_time: datetime = None,
+        end_time: datetime = None,
+        max_points: int = None,
+        since_id: int = None,
+        until_id: int = None
+    ) -> list[dict]:
+    """
+    Metrics grouped by series in columnar form, without repeating series info for every sample:
+    [{series: {device, label, type}, t: [epoch seconds], v: [values]}]
+    Rollup tiers also get min/max/count/sum/last columns.
+    since_id/until_id limit rows to the cursor range (since_id, until_id], see get_metrics_cursor().
+    """
+    model = MODELS_MAP.get(history_type)
+    if not model:
+        raise ValueError(f"Invalid history type: {history_type}")
+    series_map = await get_series_map(device_types=device_types, device_names=device_names)
+    is_rollup = issubclass(model, RollupMetricBase)
+    columns = ("id", "series_id", "ts", "value") + (tuple(STATS_COLUMNS.values()) if is_rollup else ())
+    rows = await _query_series_range(model, series_map, start_time, end_time,
+                                     columns=columns, order_by=("series_id", "ts"),
+                                     since_id=since_id, until_id=until_id)
+    result = []
+    for series_id, group in groupby(rows, key=itemgetter(1)):
+        series_rows = list(group)
+        if max_points:
+            series_rows = _downsample_series(series_rows, max_points)
+        series = series_map[series_id]
+        item = {
+            "series": {
+                "device": series['device_name'],
+                "label": series['label'],
+                "type": series['device_type']
+            },
+            "t": [row[2] for row in series_rows],
+            "v": [row[3] for row in series_rows]
+        }
+        if is_rollup:
+            for index, key in enumerate(STATS_COLUMNS, start=4):
+                item[key] = [row[index] for row in series_rows]
+        result.append(item)
+    return result
+
+
+async def _iter_series_pages(model, series_id: int, columns: tuple, start_time: datetime = None,
+                             end_time: datetime = None, page_size: int = None,
+                             since_id: int = None, until_id: int = None):
+    """
+    Pages of one series ordered by (ts, id): raw samples from compressed blocks first (id 0),
+    then rows with keyset pagination on (ts, id) over the (series_id, ts) index.
+    """
+    if model is RawMetric and since_id is None:
+        # old samples from compressed blocks, rows continue after them
+        async for rows in _iter_block_pages(series_id, columns, start_time, end_time, page_size):
+            yield rows
+    queryset = _filter_range(model.filter(series_id=series_id), start_time, end_time, since_id, until_id)
+    last = None
+    while True:
+        page = queryset
+        if last:
+            page = page.filter(Q(ts__gt=last[1]) | Q(ts=last[1], id__gt=last[0]))
+        # a connection per page: a slow download does not hold a pooled connection
+        async with read_pool.acquire() as db:
+            rows = await page.using_db(db).order_by("ts", "id").limit(page_size).values_list(*columns)
+        if not rows:
+            break
+        yield rows
+        if len(rows) < page_size:
+            break
+        last = rows[-1]
+
+
+def _export_columns(model) -> tuple:
+    columns = ("id", "ts", "value")
+    if issubclass(model, RollupMetricBase):
+        columns += tuple(STATS_COLUMNS.values())
+    return columns
+
+
+async def iter_metric_pages(
+        history_type: str,
+        device_types: list[str] = None,
+        device_names: list[str] = None,
+        start_time: datetime = None,
+        end_time: datetime = None,
+        page_size: int = None,
+        since_id: int = None,
+        until_id: int = None
+    ):
+    """
+    Async generator over metrics, page by page, for bulk export without loading everything in memory.
+    Pages come ordered by series, then by (ts, id), see _iter_series_pages().
+    Yields (series info, rows) where rows are tuples: (id, ts, value) for raw,
+    (id, ts, value, min, max, count, sum, last) for rollup tiers.
+    """
+    model = MODELS_MAP.get(history_type)
+    if not model:
+        raise ValueError(f"Invalid history type: {history_type}")
+    page_size = page_size or config.EXPORT_PAGE_SIZE
+    series_map = await get_series_map(device_types=device_types, device_names=device_names)
+    columns = _export_columns(model)
+    for series_id, series in series_map.items():
+        async for rows in _iter_series_pages(model, series_id, columns, start_time, end_time,
+                                             page_size, since_id, until_id):
+            yield series, rows
+
+
+async def iter_metric_rows(
+        history_type: str,
+        device_types: list[str] = None,
+        device_names: list[str] = None,
+        start_time: datetime = None,
+        end_time: datetime = None,
+        page_size: int = None,
+        since_id: int = None,
+        until_id: int = None
+    ):
+    """
+    Async generator over metrics of all series ordered by (ts, id), for streaming by time.
+    Every series keeps its own keyset pagination (over rows and over compressed blocks) and the series
+    are merged with a heap (k-way merge), so at most one page per series is held in memory.
+    Yields lists of up to page_size (series info, row) pairs, rows as in iter_metric_pages().
+    """
+    model = MODELS_MAP.get(history_type)
+    if not model:
+        raise ValueError(f"Invalid history type: {history_type}")
+    page_size = page_size or config.EXPORT_PAGE_SIZE
+    series_map = await get_series_map(device_types=device_types, device_names=device_names)
+    if not series_map:
+        return
+    columns = _export_columns(model)
+    series_page_size = max(MIN_MERGE_PAGE_SIZE, page_size // len(series_map))
+    # [series info, pages iterator, current page, position in the page] per series
+    streams = []
+    heap = []
+    for series_id, series in series_map.items():
+        pages = _iter_series_pages(model, series_id, columns, start_time, end_time,
+                                   series_page_size, since_id, until_id)
+        rows = await anext(pages, None)
+        if rows:
+            heap.append((rows[0][1], rows[0][0], len(streams)))
+            streams.append([series, pages, rows, 0])
+    heapq.heapify(heap)
+    page = []
+    while heap:
+        _, _, index = heapq.heappop(heap)
+        stream = streams[index]
+        series, pages, rows, position = stream
+        page.append((series, rows[position]))
+        position += 1
+        if position == len(rows):
+            rows = await anext(pages, None)
+            position = 0
+        if rows:
+            stream[2], stream[3] = rows, position
+            heapq.heappush(heap, (rows[position][1], rows[position][0], index))
+        if len(page) >= page_size:
+            yield page
+            page = []
+    if page:
+        yield page
+
+
+async def fetch_metrics_stats(
+        history_type: str,
+        device_types: list[str] = None,
+        device_names: list[str] = None,
+        start_time: datetime = None,
+        end_time: datetime = None,
+        quantiles: list[float] = (0.5, 0.95, 0.99)
+    ) -> list[dict]:
+    """
+    Stats of every series over the whole range.
+    For rollup tiers quantiles are computed by merging bucket sketches, not by rescanning raw data.
+    """
+    model = MODELS_MAP.get(history_type)
+    if not model:
+        raise ValueError(f"Invalid history type: {history_type}")
+    if any(not 0 <= q <= 1 for q in quantiles):
+        raise ValueError("Quantiles must be in range 0..1")
+    series_map = await get_series_map(device_types=device_types, device_names=device_names)
+    is_rollup = issubclass(model, RollupMetricBase)
+    columns = ("series_id", "ts", "value") + (tuple(ROLLUP_COLUMNS) if is_rollup else ())
+    rows = await _query_series_range(model, series_map, start_time, end_time,
+                                     columns=columns, order_by=("series_id", "ts"))
+    stats: dict[int, RollupStats] = {}
+    for row in rows:
+        series_stats = stats.get(row[0])
+        if series_stats is None:
+            series_stats = stats[row[0]] = RollupStats()
+        if is_rollup:
+            series_stats.add_rollup(dict(zip(columns, row)))
+        else:
+            series_stats.add_value(row[2])
+    return [
+        {
+            **series_map[series_id],
+            "min": series_stats.min,
+            "max": series_stats.max,
+            "avg": series_stats.sum / series_stats.count,
+            "count": series_stats.count,
+            "sum": series_stats.sum,
+            "last": series_stats.last,
+            "quantiles": {f"p{q * 100:g}": series_stats.quantile(q) for q in quantiles}
+        } for series_id, series_stats in stats.items()
+    ]
 
 
 async def get_latest_metrics_by_device(device_types: list[str] = None) -> dict:
     """
     Get latest metric value for each device/label combination.
+    Served from the in-memory cache, which is updated on ingest.
     Returns dict: {device_name: {label: value}}
     """
-    queryset = RawMetric.all()
-    if device_types:
-        queryset = queryset.filter(device__type__in=device_types)
-    
-    # Get latest metrics grouped by device and label
-    results = await queryset.order_by("-timestamp").values(
-        "timestamp",
-        "label",
-        "value",
-        device_name="device__name"
-    )
-    
-    # Group by device and label, keeping only the latest
-    latest = {}
-    seen = set()
-    
-    for row in results:
-        key = (row['device_name'], row['label'])
-        if key not in seen:
-            seen.add(key)
-            if row['device_name'] not in latest:
-                latest[row['device_name']] = {}
-            latest[row['device_name']][row['label']] = row['value']
-    
-    return latest
+    return latest_cache.get(device_types)
 
 
 async def get_inventory_grouped() -> dict:
@@ -227,7 +645,7 @@ async def get_inventory_grouped() -> dict:
     }
     """
     # Only return enabled devices for the dashboard
-    all_devices = await Device.filter(enabled=True).all()
+    all_devices = device_registry.all(enabled=True)
     uptime = get_system_uptime()
     
     # Get ZFS pools
@@ -0,0 +1,146 @@
+import logging
+from typing import List
+
+from tortoise import Tortoise, transactions
+
+# Metric tables that used the old layout: (device_id, label, text timestamp) per sample
+METRIC_TABLES = ["rawmetric", "hourlymetric", "historymetric"]
+ROLLUP_TABLES = ["hourlymetric", "historymetric"]
+# Stats columns of rollup tables: {column: DDL type}
+ROLLUP_STATS_COLUMNS = {
+    "min_value": "REAL",
+    "max_value": "REAL",
+    "sum_value": "REAL",
+    "sample_count": "INT",
+    "last_value": "REAL",
+    "sketch": "BLOB",
+}
+LEGACY_SUFFIX = "_legacy"
+# Tables of removed models
+OBSOLETE_TABLES = [
+    "migrationstate",  # id-based aggregation progress, replaced by aggregationstate
+]
+
+
+async def _table_columns(conn, table: str) -> List[str]:
+    rows = await conn.execute_query_dict(f'PRAGMA table_info("{table}")')
+    return [row['name'] for row in rows]
+
+
+async def detach_legacy_metric_tables() -> List[str]:
+    """
+    Rename metric tables with the old layout out of the way, so that
+    generate_schemas() can create the compact ones.
+    Must be called before generate_schemas(). Returns renamed table names.
+    """
+    conn = Tortoise.get_connection("default")
+    renamed = []
+    for table in METRIC_TABLES:
+        if "device_id" not in await _table_columns(conn, table):
+            continue
+        legacy = table + LEGACY_SUFFIX
+        logging.warning('Legacy metric table found: %s, renaming to %s', table, legacy)
+        await conn.execute_script(f'ALTER TABLE "{table}" RENAME TO "{legacy}"')
+        # Indexes keep their names after rename and would shadow the new ones
+        indexes = await conn.execute_query_dict(
+            "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = ? AND sql IS NOT NULL",
+            [legacy]
+        )
+        for index in indexes:
+            await conn.execute_script(f'DROP INDEX "{index["name"]}"')
+        renamed.append(table)
+    return renamed
+
+
+async def legacy_metric_tables() -> List[str]:
+    """Metric tables having a renamed legacy table, also the ones left by an interrupted migration"""
+    conn = Tortoise.get_connection("default")
+    rows = await conn.execute_query_dict(
+        "SELECT name FROM sqlite_master WHERE type = 'table' AND name LIKE ?", [f"%{LEGACY_SUFFIX}"]
+    )
+    existing = {row['name'] for row in rows}
+    return [table for table in METRIC_TABLES if table + LEGACY_SUFFIX in existing]
+
+
+async def migrate_legacy_metric_tables():
+    """
+    Copy data from renamed legacy tables into the compact schema:
+    fill the series dictionary, convert timestamps to epoch seconds and drop the old tables.
+    Driven by the legacy tables present in the database, so a migration interrupted after
+    the rename is finished on the next start. Each table is copied and dropped in one transaction.
+    """
+    tables = await legacy_metric_tables()
+    if not tables:
+        return
+    for table in tables:
+        legacy = table + LEGACY_SUFFIX
+        logging.warning('Migrating %s to compact schema...', table)
+        columns = "id, series_id, ts, value"
+        values = "MAX(l.id), s.id, CAST(strftime('%s', l.timestamp) AS INT) AS ts, AVG(l.value)"
+        if table in ROLLUP_TABLES:
+            columns += ", min_value, max_value, sum_value, sample_count, last_value"
+            values += ", MIN(l.value), MAX(l.value), AVG(l.value), 1, AVG(l.value)"
+        # one statement per call: executescript() would commit on its own
+        async with transactions.in_transaction() as conn:
+            await conn.execute_query(f"""
+                INSERT OR IGNORE INTO series (device_id, label)
+                    SELECT DISTINCT device_id, label FROM "{legacy}"
+            """)
+            await conn.execute_query(f"""
+                INSERT OR IGNORE INTO "{table}" ({columns})
+                    SELECT {values}
+                    FROM "{legacy}" l
+                    JOIN series s ON s.device_id = l.device_id AND s.label = l.label
+                    GROUP BY s.id, ts
+            """)
+            await conn.execute_query(f'DROP TABLE "{legacy}"')
+    # Give the space of the dropped tables back to the filesystem
+    await Tortoise.get_connection("default").execute_script("VACUUM")
+    logging.warning('Metric tables migrated: %s', ', '.join(tables))
+
+
+async def add_rollup_stats_columns():
+    """
+    Add min/max/sum/count/last/sketch columns to rollup tables created before they existed.
+    Old rows are treated as a single sample with the average value.
+    """
+    conn = Tortoise.get_connection("default")
+    for table in ROLLUP_TABLES:
+        existing = await _table_columns(conn, table)
+        missing = [name for name in ROLLUP_STATS_COLUMNS if name not in existing]
+        if not missing:
+            continue
+        logging.warning('Adding stats columns to %s: %s', table, ', '.join(missing))
+        statements = [f'ALTER TABLE "{table}" ADD COLUMN "{name}" {ROLLUP_STATS_COLUMNS[name]};' for name in missing]
+        await conn.execute_script(f"""
+            BEGIN;
+            {" ".join(statements)}
+            UPDATE "{table}" SET
+                min_value = value, max_value = value, sum_value = value, sample_count = 1, last_value = value
+            WHERE sample_count IS NULL;
+            COMMIT;
+        """)
+
+
+async def add_rollup_seq_column():
+    """
+    Add the update sequence column to rollup tables created before it existed
+    and number rows without it (old and migrated legacy rows) by id.
+    """
+    conn = Tortoise.get_connection("default")
+    for table in ROLLUP_TABLES:
+        if "seq" not in await _table_columns(conn, table):
+            logging.warning('Adding seq column to %s', table)
+            await conn.execute_script(f"""
+                BEGIN;
+                ALTER TABLE "{table}" ADD COLUMN "seq" BIGINT;
+                CREATE INDEX IF NOT EXISTS "idx_{table}_seq" ON "{table}" ("seq");
+                COMMIT;
+            """)
+        await conn.execute_query(f'UPDATE "{table}" SET seq = id WHERE seq IS NULL')
+
+
+async def drop_obsolete_tables():
+    conn = Tortoise.get_connection("default")
+    for table in OBSOLETE_TABLES:
+        await conn.execute_script(f'DROP TABLE IF EXISTS "{table}"')
@@ -2,6 +2,15 @@ import logging
 
 from tortoise import models, fields, Tortoise
 from nas_monitor.config import config
+from nas_monitor.db import connection_config, read_pool
+from nas_monitor.partitions import raw_partitions
+from nas_monitor.migrations import (
+    detach_legacy_metric_tables,
+    migrate_legacy_metric_tables,
+    add_rollup_stats_columns,
+    add_rollup_seq_column,
+    drop_obsolete_tables
+)
 
 
 class Device(models.Model):
@@ -12,27 +21,75 @@ class Device(models.Model):
     details = fields.JSONField(null=True)
 
 
+class Series(models.Model):
+    """Dictionary of metric series: one row per device/label pair"""
+    id = fields.IntField(primary_key=True)
+    device = fields.ForeignKeyField('models.Device', related_name='series')
+    label = fields.CharField(max_length=50)
+
+    class Meta:
+        unique_together = (("device", "label"),)
+
+
 class MetricBase(models.Model):
-    timestamp = fields.DatetimeField(db_index=True)
-    device = fields.ForeignKeyField('models.Device')
-    label = fields.CharField(max_length=50, db_index=True)
+    series = fields.ForeignKeyField('models.Series')
+    ts = fields.IntField(db_index=True)  # epoch seconds, UTC
     value = fields.FloatField()
 
     class Meta: abstract = True
 
 
-class RawMetric(MetricBase): pass
+class RawMetric(MetricBase):
+    """
+    Raw samples. In a database set up by init_db() "rawmetric" is a view over the hot table
+    and closed time partitions, which carry the (series_id, ts) and (ts) indexes (see partitions.py).
+    """
+    ts = fields.IntField()  # epoch seconds, UTC, indexed per partition
+
+
+class RollupMetricBase(MetricBase):
+    """Aggregated bucket: value is the average, plus stats of the source samples"""
+    min_value = fields.FloatField(null=True)
+    max_value = fields.FloatField(null=True)
+    sum_value = fields.FloatField(null=True)
+    sample_count = fields.IntField(null=True)
+    last_value = fields.FloatField(null=True)
+    sketch = fields.BinaryField(null=True)  # serialized QuantileSketch
+    # bumped on every (re)aggregation of the bucket: incremental cursor of rollup tiers
+    seq = fields.BigIntField(null=True, db_index=True)
+
+    class Meta: abstract = True
+
+
+class HourlyMetric(RollupMetricBase):
+    class Meta:
+        unique_together = (("series", "ts"),)
+
 
+class HistoryMetric(RollupMetricBase):
+    class Meta:
+        unique_together = (("series", "ts"),)
 
-class HourlyMetric(MetricBase): pass
 
+class RawBlock(models.Model):
+    """
+    Raw samples of one series in a closed block of RAW_BLOCK_SECONDS starting at ts,
+    compressed by utils.blockcodec (see blocks.py)
+    """
+    id = fields.IntField(primary_key=True)
+    series = fields.ForeignKeyField('models.Series')
+    ts = fields.IntField()  # block start, epoch seconds, UTC
+    last_ts = fields.IntField()  # time of the last sample
+    count = fields.IntField()
+    data = fields.BinaryField()
 
-class HistoryMetric(MetricBase): pass
+    class Meta:
+        unique_together = (("series", "ts"),)
 
 
-class MigrationState(models.Model):
+class AggregationState(models.Model):
     stage = fields.CharField(max_length=20, primary_key=True)
-    last_processed_id = fields.BigIntField(default=0)
+    watermark = fields.BigIntField(default=0)  # epoch start of the first bucket not aggregated yet
 
 
 
@@ -42,10 +99,23 @@ def model_to_dict(obj):
 
 
 async def init_db():
-    await Tortoise.init(db_url=config.DB_PATH, modules={'models': [__name__]})
+    await Tortoise.init(config={
+        "connections": {"default": connection_config(config.DB_PATH)},
+        "apps": {"models": {"models": [__name__], "default_connection": "default"}}
+    })
+    await detach_legacy_metric_tables()
     await Tortoise.generate_schemas()
     logging.info('Schemas generated!')
+    await migrate_legacy_metric_tables()
+    await add_rollup_stats_columns()
+    await add_rollup_seq_column()
+    await drop_obsolete_tables()
+    await raw_partitions.setup()
+    # the app may have been down at the end of the period
+    await raw_partitions.rotate()
+    await read_pool.open(config.DB_PATH, config.DB_READ_POOL_SIZE)
 
 
 async def disconnect_db():
+    await read_pool.close()
     await Tortoise.close_connections()
\ No newline at end of file
@@ -0,0 +1,225 @@
+import logging
+import re
+from datetime import datetime, timezone
+from typing import List, Optional
+
+from tortoise import Tortoise, transactions
+
+from nas_monitor.config import config
+
+
+class PartitionedTable:
+    """
+    Time-partitioned metric table in SQLite.
+
+    New rows go to the hot table "<name>_hot". Once it holds rows of a closed period
+    (PARTITION_SECONDS, a UTC day by default) it is renamed into a partition "<name>_YYYYMMDD_HHMMSS"
+    (start of the period) and a new hot table takes its place. Only rows on the other side of
+    a period boundary are copied, so every partition holds exactly one period.
+    "<name>" itself is a UNION ALL view over the hot table and the partitions, so ORM reads of the
+    model work unchanged and SQLite pushes range filters into every partition's index.
+    Inserts into the view are redirected to the hot table by an INSTEAD OF trigger.
+    Ids stay globally increasing: each new hot table continues the AUTOINCREMENT sequence
+    of the previous one, so id-based cursors keep working across partitions.
+    Retention drops whole partitions instead of deleting rows.
+    """
+
+    def __init__(self, name: str, columns: List[str], ddl: str):
+        self.name = name
+        self.columns = columns
+        # CREATE TABLE statement with {table} placeholder
+        self.ddl = ddl
+        self.hot = f"{name}_hot"
+        # set by setup(): the database uses partitions (plain table otherwise, e.g. in tests)
+        self.active = False
+        self._partition_re = re.compile(rf"^{re.escape(name)}_\d{{8}}_\d{{6}}$")
+
+    @staticmethod
+    def _conn():
+        return Tortoise.get_connection("default")
+
+    @staticmethod
+    async def _execute(conn, *statements: str):
+        # one statement per call: executescript() would commit the surrounding transaction
+        for statement in statements:
+            await conn.execute_query(statement)
+
+    async def _object_type(self, conn, name: str) -> Optional[str]:
+        rows = await conn.execute_query_dict("SELECT type FROM sqlite_master WHERE name = ?", [name])
+        return rows[0]['type'] if rows else None
+
+    async def partitions(self, conn=None) -> List[str]:
+        """Closed partitions, oldest first"""
+        conn = conn or self._conn()
+        rows = await conn.execute_query_dict(
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND name LIKE ?", [f"{self.name}_%"]
+        )
+        return sorted(row['name'] for row in rows if self._partition_re.match(row['name']))
+
+    async def _create_indexes(self, conn, table: str, token: str):
+        """(series_id, ts) for series range scans and (ts) for aggregation chunks"""
+        await self._execute(
+            conn,
+            f'CREATE INDEX IF NOT EXISTS "{self.name}_{token}_series_ts" ON "{table}" (series_id, ts)',
+            f'CREATE INDEX IF NOT EXISTS "{self.name}_{token}_ts" ON "{table}" (ts)'
+        )
+
+    async def _indexed_columns(self, conn, table: str) -> List[tuple]:
+        result = []
+        for index in await conn.execute_query_dict(f'PRAGMA index_list("{table}")'):
+            info = await conn.execute_query_dict(f'PRAGMA index_info("{index["name"]}")')
+            result.append(tuple(row['name'] for row in info))
+        return result
+
+    async def _create_view(self, conn):
+        """(Re)create the view over hot table and partitions and its insert trigger"""
+        columns = ", ".join(self.columns)
+        tables = [self.hot] + list(reversed(await self.partitions(conn)))
+        select = " UNION ALL ".join(f'SELECT {columns} FROM "{table}"' for table in tables)
+        values = ", ".join(f"NEW.{column}" for column in self.columns)
+        await self._execute(
+            conn,
+            f'DROP VIEW IF EXISTS "{self.name}"',
+            f'CREATE VIEW "{self.name}" AS {select}',
+            f'CREATE TRIGGER "{self.name}_insert" INSTEAD OF INSERT ON "{self.name}" '
+            f'BEGIN INSERT INTO "{self.hot}" ({columns}) VALUES ({values}); END'
+        )
+
+    async def setup(self):
+        """
+        Called by init_db() after generate_schemas(): turns a plain table created by Tortoise
+        (new or existing database) into the hot table and creates the view.
+        Converted rows of closed periods are split into one partition per period right away.
+        """
+        converted = False
+        async with transactions.in_transaction() as conn:
+            if await self._object_type(conn, self.name) == "table":
+                if await self._object_type(conn, self.hot) is None:
+                    rows = await conn.execute_query_dict(f'SELECT EXISTS (SELECT 1 FROM "{self.name}") AS has_rows')
+                    converted = bool(rows[0]['has_rows'])
+                    # a new database has just got an empty table from generate_schemas()
+                    logging.log(logging.WARNING if converted else logging.INFO,
+                                'Converting %s to time-partitioned storage', self.name)
+                    await self._execute(conn, f'ALTER TABLE "{self.name}" RENAME TO "{self.hot}"')
+                else:
+                    # the view was dropped outside of the app, generate_schemas() made an empty table
+                    await self._execute(conn, f'DROP TABLE "{self.name}"')
+            if await self._object_type(conn, self.hot) is None:
+                await self._execute(conn, self.ddl.format(table=self.hot))
+            indexed = await self._indexed_columns(conn, self.hot)
+            if ("series_id", "ts") not in indexed or ("ts",) not in indexed:
+                await self._create_indexes(conn, self.hot, datetime.now(timezone.utc).strftime("%Y%m%d%H%M%S"))
+            await self._create_view(conn)
+        self.active = True
+        if converted:
+            await self.rotate()
+
+    def _partition_name(self, period_start: int) -> str:
+        return f"{self.name}_{datetime.fromtimestamp(period_start, timezone.utc):%Y%m%d_%H%M%S}"
+
+    async def _move_rows(self, conn, source: str, target: str, start_ts: int, end_ts: int = None):
+        """Move rows with start_ts <= ts < end_ts, ids included, from one table to another"""
+        columns = ", ".join(self.columns)
+        condition = "ts >= ?" + (" AND ts < ?" if end_ts is not None else "")
+        params = [start_ts] + ([end_ts] if end_ts is not None else [])
+        await conn.execute_query(
+            f'INSERT INTO "{target}" ({columns}) SELECT {columns} FROM "{source}" WHERE {condition}', params
+        )
+        await conn.execute_query(f'DELETE FROM "{source}" WHERE {condition}', params)
+
+    async def rotate(self, now: datetime = None) -> List[str]:
+        """
+        Close the hot table if it has rows older than the current period.
+        The hot table is split at period boundaries: rows of the current period stay hot,
+        every closed period gets its own partition (several after downtime or a conversion).
+        The largest part is renamed, only the rest of the rows is copied.
+        Returns the names of the created partitions.
+        """
+        if not self.active:
+            return []
+        now = now or datetime.now(timezone.utc)
+        period = config.PARTITION_SECONDS
+        boundary = int(now.timestamp()) // period * period
+        staging = f"{self.name}_closing"
+        created = []
+        async with transactions.in_transaction() as conn:
+            rows = await conn.execute_query_dict(
+                f'SELECT MIN(ts) AS min_ts, MAX(id) AS max_id FROM "{self.hot}"'
+            )
+            min_ts, max_id = rows[0]['min_ts'], rows[0]['max_id']
+            if min_ts is None or min_ts >= boundary:
+                return []
+            rows = await conn.execute_query_dict(
+                f'SELECT ts / {period} * {period} AS period_start, COUNT(*) AS count FROM "{self.hot}" '
+                f'WHERE ts < ? GROUP BY period_start ORDER BY period_start', [boundary]
+            )
+            periods = [(row['period_start'], row['count']) for row in rows]
+            await self._execute(
+                conn,
+                f'ALTER TABLE "{self.hot}" RENAME TO "{staging}"',
+                self.ddl.format(table=self.hot)
+            )
+            await self._create_indexes(conn, self.hot, now.strftime("%Y%m%d%H%M%S"))
+            # rows of the current period stay hot
+            await self._move_rows(conn, staging, self.hot, boundary)
+            # continue ids of the closed table
+            await conn.execute_query("DELETE FROM sqlite_sequence WHERE name = ?", [self.hot])
+            await conn.execute_query("INSERT INTO sqlite_sequence (name, seq) VALUES (?, ?)", [self.hot, max_id])
+
+            # the staging table becomes the partition of its largest new period
+            new_periods = [
+                (start, count) for start, count in periods
+                if await self._object_type(conn, self._partition_name(start)) is None
+            ]
+            renamed = max(new_periods, key=lambda item: item[1])[0] if new_periods else None
+            for start, _ in periods:
+                if start == renamed:
+                    continue
+                partition = self._partition_name(start)
+                if await self._object_type(conn, partition) is None:
+                    await self._execute(conn, self.ddl.format(table=partition))
+                    await self._create_indexes(conn, partition, partition[len(self.name) + 1:])
+                    created.append(partition)
+                else:
+                    logging.warning('Partition %s already exists, late rows are added to it', partition)
+                await self._move_rows(conn, staging, partition, start, start + period)
+            if renamed is None:
+                await self._execute(conn, f'DROP TABLE "{staging}"')
+            else:
+                partition = self._partition_name(renamed)
+                await self._execute(conn, f'ALTER TABLE "{staging}" RENAME TO "{partition}"')
+                created.append(partition)
+            await self._create_view(conn)
+        created.sort()
+        logging.info('Closed partitions %s', ', '.join(created))
+        return created
+
+    async def drop_expired(self, cutoff_ts: int) -> List[str]:
+        """Drop partitions whose newest row is older than cutoff_ts"""
+        conn = self._conn()
+        expired = []
+        for partition in await self.partitions(conn):
+            rows = await conn.execute_query_dict(f'SELECT MAX(ts) AS max_ts FROM "{partition}"')
+            max_ts = rows[0]['max_ts']
+            if max_ts is None or max_ts < cutoff_ts:
+                expired.append(partition)
+        if not expired:
+            return []
+        async with transactions.in_transaction() as conn:
+            for partition in expired:
+                await self._execute(conn, f'DROP TABLE "{partition}"')
+            await self._create_view(conn)
+        logging.info('Dropped expired partitions: %s', ', '.join(expired))
+        return expired
+
+
+raw_partitions = PartitionedTable(
+    "rawmetric",
+    columns=["id", "series_id", "ts", "value"],
+    ddl="""CREATE TABLE "{table}" (
+    "id" INTEGER PRIMARY KEY AUTOINCREMENT NOT NULL,
+    "ts" INT NOT NULL,
+    "value" REAL NOT NULL,
+    "series_id" INT NOT NULL REFERENCES "series" ("id") ON DELETE CASCADE
+)"""
+)
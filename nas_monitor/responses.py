@@ -0,0 +1,67 @@
+import gzip
+from typing import Optional
+
+import orjson
+from fastapi import Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import Response
+
+try:
+    # optional, enables "br" content encoding
+    import brotli
+except ImportError:
+    brotli = None
+
+# Smaller bodies are sent as is
+MIN_COMPRESS_SIZE = 1024
+# Larger bodies are compressed in a worker thread, not on the event loop
+THREADPOOL_COMPRESS_SIZE = 256 * 1024
+
+
+def negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    """
+    Choose response encoding from Accept-Encoding header: br (if available) or gzip.
+    Codings refused with q=0 are never chosen, even when "*" is accepted.
+    Returns None when the body should not be compressed.
+    """
+    accepted = {}
+    for item in accept_encoding.split(","):
+        name, _, params = item.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                continue
+        if name:
+            accepted[name.lower()] = quality
+    candidates = ["br", "gzip"] if brotli else ["gzip"]
+    qualities = {name: accepted.get(name, accepted.get("*", 0)) for name in candidates}
+    candidates = [name for name in candidates if qualities[name] > 0]
+    if not candidates:
+        return None
+    return max(candidates, key=qualities.get)
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=5)
+    return gzip.compress(body, compresslevel=5)
+
+
+async def json_response(request: Request, content) -> Response:
+    """
+    JSON response serialized with orjson and compressed according to Accept-Encoding.
+    """
+    body = orjson.dumps(content, option=orjson.OPT_SERIALIZE_NUMPY)
+    headers = {"Vary": "Accept-Encoding"}
+    if len(body) >= MIN_COMPRESS_SIZE:
+        encoding = negotiate_encoding(request.headers.get("accept-encoding", ""))
+        if encoding:
+            if len(body) >= THREADPOOL_COMPRESS_SIZE:
+                body = await run_in_threadpool(compress, body, encoding)
+            else:
+                body = compress(body, encoding)
+            headers["Content-Encoding"] = encoding
+    return Response(content=body, media_type="application/json", headers=headers)
@@ -0,0 +1,26 @@
+import pytest_asyncio
+from tortoise import Tortoise
+
+from nas_monitor.device_registry import device_registry
+from nas_monitor.latest_cache import latest_cache
+from nas_monitor.models import Device, Series
+from nas_monitor.partitions import raw_partitions
+
+
+@pytest_asyncio.fixture
+async def db():
+    """Empty in-memory database with the app schema; process-wide state is reset afterwards"""
+    await Tortoise.init(db_url="sqlite://:memory:", modules={'models': ['nas_monitor.models']})
+    await Tortoise.generate_schemas()
+    yield
+    device_registry.clear()
+    latest_cache.clear()
+    raw_partitions.active = False
+    await Tortoise.close_connections()
+
+
+@pytest_asyncio.fixture
+async def series(db):
+    """The cpu/load series"""
+    cpu = await Device.create(name="cpu", type="cpu")
+    return await Series.create(device=cpu, label="load")
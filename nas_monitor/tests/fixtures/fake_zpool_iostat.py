@@ -0,0 +1,9 @@
+"""Stand-in for `zpool iostat -Hplv -y <interval>`: prints the fixture report and keeps running"""
+import os
+import sys
+import time
+
+with open(os.path.join(os.path.dirname(__file__), "zpool_iostat.txt")) as f:
+    sys.stdout.write(f.read())
+sys.stdout.flush()
+time.sleep(60)
@@ -0,0 +1,99 @@
+import pytest
+from datetime import datetime, timezone
+from tortoise import Tortoise
+
+from nas_monitor.aggregation import run_aggregation, get_stage_watermark
+from nas_monitor.config import config
+from nas_monitor.models import RawMetric, HourlyMetric, HistoryMetric
+
+DAY = 86400
+# midnight, well in the past
+START = 1_700_000_000 // DAY * DAY
+
+
+@pytest.mark.asyncio
+async def test_raw_to_hourly_chunks_and_gaps(series, mocker):
+    mocker.patch.object(config, "AGGREGATION_CHUNK_SECONDS", 3600)
+    await RawMetric.bulk_create([
+        RawMetric(series=series, ts=START + 10, value=1.0),
+        RawMetric(series=series, ts=START + 20, value=3.0),
+        RawMetric(series=series, ts=START + 3600, value=5.0),
+        # two days of downtime
+        RawMetric(series=series, ts=START + 2 * DAY + 7200, value=7.0),
+    ])
+    await run_aggregation(RawMetric, HourlyMetric, 'raw_to_hourly', 60)
+
+    rows = await HourlyMetric.all().order_by("ts").values_list("ts", "value")
+    assert rows == [(START, 2.0), (START + 3600, 5.0), (START + 2 * DAY + 7200, 7.0)]
+    assert await get_stage_watermark('raw_to_hourly') > START + 2 * DAY + 7200
+
+    # Second run emits nothing new
+    await run_aggregation(RawMetric, HourlyMetric, 'raw_to_hourly', 60)
+    assert await HourlyMetric.all().count() == 3
+
+
+@pytest.mark.asyncio
+async def test_open_bucket_is_not_emitted(series):
+    now = int(datetime.now(timezone.utc).timestamp())
+    await RawMetric.create(series=series, ts=now, value=1.0)
+    await run_aggregation(RawMetric, HourlyMetric, 'raw_to_hourly', 60)
+    assert await HourlyMetric.all().count() == 0
+
+
+@pytest.mark.asyncio
+async def test_chained_stage_waits_for_upstream(series):
+    for ts, value in ((START, 1.0), (START + DAY, 3.0)):
+        await HourlyMetric.create(
+            series=series, ts=ts, value=value,
+            min_value=value, max_value=value, sum_value=value, sample_count=1, last_value=value
+        )
+
+    await run_aggregation(HourlyMetric, HistoryMetric, 'hourly_to_history', 1440, 'raw_to_hourly')
+    assert await HistoryMetric.all().count() == 0
+
+    # upstream finished only the first day
+    await Tortoise.get_connection("default").execute_query(
+        "INSERT INTO aggregationstate (stage, watermark) VALUES (?, ?)", ['raw_to_hourly', START + DAY + 3600]
+    )
+    await run_aggregation(HourlyMetric, HistoryMetric, 'hourly_to_history', 1440, 'raw_to_hourly')
+    assert await HistoryMetric.all().values_list("ts", "value") == [(START, 1.0)]
+
+
+@pytest.mark.asyncio
+async def test_rollup_stats_survive_both_tiers(series):
+    # spike inside the first hour, flat second hour
+    values = [10.0] * 59 + [95.0]
+    await RawMetric.bulk_create(
+        [RawMetric(series=series, ts=START + i * 60, value=v) for i, v in enumerate(values)]
+        + [RawMetric(series=series, ts=START + 3600 + i * 60, value=20.0) for i in range(20)]
+    )
+    await run_aggregation(RawMetric, HourlyMetric, 'raw_to_hourly', 60)
+    first = await HourlyMetric.get(ts=START)
+    assert (first.min_value, first.max_value, first.sample_count, first.last_value) == (10.0, 95.0, 60, 95.0)
+    assert first.value == pytest.approx(sum(values) / 60)
+
+    await run_aggregation(HourlyMetric, HistoryMetric, 'hourly_to_history', 1440, 'raw_to_hourly')
+    day = await HistoryMetric.get(ts=START)
+    assert (day.min_value, day.max_value, day.sample_count, day.last_value) == (10.0, 95.0, 80, 20.0)
+    # average is weighted by sample count, not by hours
+    assert day.value == pytest.approx((sum(values) + 20 * 20.0) / 80)
+    assert day.sketch
+
+
+@pytest.mark.asyncio
+async def test_reaggregated_bucket_moves_cursor(series):
+    from nas_monitor.aggregation import save_stage_watermark
+    from nas_monitor.metrics import fetch_metrics_data, get_metrics_cursor
+
+    await RawMetric.create(series=series, ts=START + 10, value=1.0)
+    await run_aggregation(RawMetric, HourlyMetric, 'raw_to_hourly', 60)
+    cursor = await get_metrics_cursor("hourly")
+    assert await fetch_metrics_data("hourly", since_id=cursor) == []
+
+    # late sample, the bucket is aggregated again and keeps its id
+    await RawMetric.create(series=series, ts=START + 20, value=3.0)
+    await save_stage_watermark(Tortoise.get_connection("default"), 'raw_to_hourly', START)
+    await run_aggregation(RawMetric, HourlyMetric, 'raw_to_hourly', 60)
+    rows = await fetch_metrics_data("hourly", since_id=cursor, until_id=await get_metrics_cursor("hourly"))
+    assert [(row['value'], row['count']) for row in rows] == [(2.0, 2)]
+    assert await HourlyMetric.all().count() == 1
@@ -0,0 +1,117 @@
+import numpy as np
+import pytest
+import pytest_asyncio
+from datetime import datetime, timezone
+
+from nas_monitor.blocks import raw_blocks
+from nas_monitor.metrics import (
+    cleanup_metrics, fetch_metrics_data, fetch_metrics_columns, iter_metric_pages, iter_metric_rows
+)
+from nas_monitor.models import Series, RawMetric, RawBlock
+from nas_monitor.utils.blockcodec import decode_block, decode_blocks, encode_block
+
+HOUR = 3600
+# 2024-01-01 00:00 UTC
+START = 1_704_067_200
+
+
+def test_block_roundtrip_is_exact():
+    ts = START + np.arange(720, dtype=np.int64) * 5
+    ts[100] += 1  # collector jitter
+    rnd = np.random.default_rng(1)
+    for values in (np.full(720, 1.5), rnd.random(720) * 100, np.array([np.nan, -0.0, np.inf] * 240)):
+        decoded_ts, decoded_values = decode_block(encode_block(ts, values))
+        assert np.array_equal(decoded_ts, ts)
+        assert decoded_values.tobytes() == values.tobytes()
+    for count in (1, 2, 3):
+        decoded_ts, decoded_values = decode_block(encode_block(ts[:count], np.arange(count, dtype=float)))
+        assert decoded_ts.tolist() == ts[:count].tolist()
+        assert decoded_values.tolist() == list(range(count))
+
+
+def test_steady_series_compresses_well():
+    ts = START + np.arange(720, dtype=np.int64) * 5
+    data = encode_block(ts, np.full(720, 3.7))
+    # 16 bytes per sample in a row, without the row and index overhead
+    assert len(data) < 720 * 16 / 50
+
+
+def test_decode_blocks_concatenates():
+    index, ts, values = decode_blocks([
+        encode_block(np.array([1, 2]), np.array([1.0, 2.0])),
+        encode_block(np.array([5]), np.array([3.0])),
+    ])
+    assert index.tolist() == [0, 0, 1]
+    assert ts.tolist() == [1, 2, 5]
+    assert values.tolist() == [1.0, 2.0, 3.0]
+
+
+@pytest_asyncio.fixture
+async def series(series):
+    load = series
+    temp = await Series.create(device_id=load.device_id, label="temp")
+    await RawMetric.bulk_create([
+        RawMetric(series=s, ts=START + hour * HOUR + n * 600, value=float(hour * 10 + n + s.id * 100))
+        for hour in range(3) for n in range(6) for s in (load, temp)
+    ])
+    return load, temp
+
+
+def at(ts: int) -> datetime:
+    return datetime.fromtimestamp(ts, timezone.utc)
+
+
+@pytest.mark.asyncio
+async def test_compact_and_read_blocks_before_rows(series):
+    load, temp = series
+    expected = await fetch_metrics_data("raw", start_time=at(START), end_time=at(START + 3 * HOUR))
+
+    assert await raw_blocks.compact() == 6
+    assert await RawBlock.filter(series_id=load.id).order_by("ts").values_list("ts", "count") == [
+        (START, 6), (START + HOUR, 6), (START + 2 * HOUR, 6)
+    ]
+    # nothing new to compact
+    assert await raw_blocks.compact() == 0
+
+    # rows of the first two hours are gone, the blocks serve them
+    await RawMetric.filter(ts__lt=START + 2 * HOUR).delete()
+    rows = await fetch_metrics_data("raw", start_time=at(START), end_time=at(START + 3 * HOUR))
+    assert [(row["timestamp"], row["label"], row["value"]) for row in rows] == \
+        [(row["timestamp"], row["label"], row["value"]) for row in expected]
+    assert {row["id"] for row in rows[:24]} == {0}
+
+    columns = await fetch_metrics_columns("raw", start_time=at(START + 1200), end_time=at(START + HOUR))
+    assert [item["t"] for item in columns] == [[START + 1200, START + 1800, START + 2400, START + 3000, START + 3600]] * 2
+
+    pages = [rows async for _, rows in iter_metric_pages("raw", device_names=["cpu"], page_size=10)]
+    assert [len(page) for page in pages] == [10, 2, 6, 10, 2, 6]
+    assert [row[2] for row in pages[0][:3]] == [100.0, 101.0, 102.0]
+
+
+@pytest.mark.asyncio
+async def test_cleanup_keeps_rows_not_compacted(series):
+    # the rows are older than the rows retention, but not compacted yet
+    await cleanup_metrics()
+    assert await RawMetric.all().count() == 36
+    await raw_blocks.compact()
+    await cleanup_metrics()
+    assert await RawMetric.all().count() == 0
+    # blocks are kept for the raw retention (deleted as well: 2024 is long ago)
+    assert await RawBlock.all().count() == 0
+
+
+@pytest.mark.asyncio
+async def test_block_pages_decode_few_blocks_at_a_time(series, mocker):
+    await raw_blocks.compact()
+    await RawMetric.all().delete()
+    read_page = mocker.spy(raw_blocks, "read_page")
+
+    pages = [rows async for _, rows in iter_metric_pages("raw", device_names=["cpu"], page_size=4)]
+    assert [len(page) for page in pages] == [4, 4, 4, 4, 2] * 2
+    # every series: one block per query (3 blocks) and the empty query at the end
+    assert read_page.call_count == 8
+    assert {call.args[4] for call in read_page.call_args_list} == {1}
+
+    rows = [row async for page in iter_metric_rows("raw", device_names=["cpu"], page_size=5) for _, row in page]
+    assert [row[1] for row in rows] == sorted(START + hour * HOUR + n * 600 for hour in range(3)
+                                              for n in range(6) for _ in range(2))
@@ -0,0 +1,47 @@
+import pytest
+from tortoise import Tortoise
+from tortoise.exceptions import OperationalError
+
+from nas_monitor.config import config
+from nas_monitor.db import read_pool
+from nas_monitor.metrics import fetch_metrics_data
+from nas_monitor.models import Device, Series, RawMetric, init_db, disconnect_db
+
+
+@pytest.fixture
+def db_file(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "DB_PATH", f"sqlite://{tmp_path}/test.sqlite3")
+    monkeypatch.setattr(config, "DB_READ_POOL_SIZE", 2)
+    return tmp_path / "test.sqlite3"
+
+
+async def pragma(client, name):
+    return (await client.execute_query_dict(f"PRAGMA {name}"))[0][name]
+
+
+@pytest.mark.asyncio
+async def test_writer_and_read_pool(db_file):
+    await init_db()
+    try:
+        writer = Tortoise.get_connection("default")
+        assert await pragma(writer, "journal_mode") == "wal"
+        # NORMAL
+        assert await pragma(writer, "synchronous") == 1
+        assert await pragma(writer, "cache_size") == -config.DB_CACHE_SIZE_KB
+        assert read_pool.size == 2
+
+        cpu = await Device.create(name="cpu", type="cpu")
+        series = await Series.create(device=cpu, label="load")
+        await RawMetric.create(ts=1_700_000_000, series=series, value=5.0)
+
+        async with read_pool.acquire() as reader:
+            assert reader is not writer
+            assert await pragma(reader, "query_only") == 1
+            with pytest.raises(OperationalError):
+                await reader.execute_query("DELETE FROM rawmetric")
+        # API reads go through the pool and see committed rows
+        rows = await fetch_metrics_data("raw")
+        assert [row["value"] for row in rows] == [5.0]
+    finally:
+        await disconnect_db()
+    assert read_pool.size == 0
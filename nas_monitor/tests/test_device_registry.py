@@ -0,0 +1,41 @@
+import pytest
+
+from nas_monitor.device_registry import DeviceRegistry, device_registry
+from nas_monitor.latest_cache import latest_cache
+from nas_monitor.metrics import add_metrics_batch, get_enabled_devices_by_type
+from nas_monitor.models import Device, RawMetric
+from nas_monitor.shemas import Metrics
+
+
+@pytest.mark.asyncio
+async def test_registry_load_and_update(db):
+    await Device.create(name="cpu", type="cpu")
+    sda = await Device.create(name="SN1", type="storage")
+    await Device.create(name="SN2", type="storage", enabled=False)
+
+    registry = DeviceRegistry()
+    await registry.load()
+    assert registry.get("cpu").type == "cpu"
+    assert [d.name for d in registry.enabled_by_type("storage")] == ["SN1"]
+    assert len(registry.all(enabled=True)) == 2
+
+    sda.enabled = False
+    await sda.save()
+    registry.put(sda)
+    assert registry.enabled_by_type("storage") == []
+    assert registry.get("missing") is None
+
+
+@pytest.mark.asyncio
+async def test_ingest_uses_registry(db):
+    cpu = await Device.create(name="cpu", type="cpu")
+    await device_registry.load()
+    assert get_enabled_devices_by_type("cpu") == [device_registry.get("cpu")]
+
+    await add_metrics_batch([
+        Metrics(device_name="cpu", label="load", value=12.5),
+        Metrics(device_name="unknown", label="load", value=1.0),
+    ])
+    rows = await RawMetric.all().prefetch_related("series")
+    assert [(r.series.device_id, r.series.label, r.value) for r in rows] == [(cpu.id, "load", 12.5)]
+    assert latest_cache.get(["cpu"]) == {"cpu": {"load": 12.5}}
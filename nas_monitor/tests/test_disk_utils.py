@@ -1,9 +1,11 @@
 
 import unittest
 import asyncio
+import time
 from unittest.mock import patch, MagicMock
 
-from nas_monitor.utils.disk_utils import get_disk_usage
+from nas_monitor.utils import disk_utils
+from nas_monitor.utils.disk_utils import get_disk_usage, DiskInfoSnapshot, collect_smart_info, run_cmd
 
 class TestDiskUtils(unittest.TestCase):
     
@@ -45,5 +47,153 @@ class TestDiskUtils(unittest.TestCase):
                 result = asyncio.run(get_disk_usage('/fake/path'))
                 self.assertEqual(result, {})
 
+
+class TestDiskInfoSnapshot(unittest.TestCase):
+
+    def test_single_flight(self):
+        """Concurrent callers share one collection, fresh result is reused within ttl."""
+        calls = []
+
+        async def collect():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return {"disks": [], "zfs_pools": [], "n": len(calls)}
+
+        async def run():
+            snapshot = DiskInfoSnapshot(ttl=60, collect=collect)
+            results = await asyncio.gather(*(snapshot.get() for _ in range(5)))
+            again = await snapshot.get()
+            snapshot.invalidate()
+            refreshed = await snapshot.get()
+            return results, again, refreshed
+
+        results, again, refreshed = asyncio.run(run())
+        self.assertTrue(all(r is results[0] for r in results))
+        self.assertIs(again, results[0])
+        self.assertEqual(refreshed['n'], 2)
+        self.assertEqual(len(calls), 2)
+
+    def test_failed_collection_is_retried(self):
+        """An error is raised to all waiters and the next call collects again."""
+        calls = []
+
+        async def collect():
+            calls.append(1)
+            if len(calls) == 1:
+                raise RuntimeError("lsblk failed")
+            return {"disks": [], "zfs_pools": []}
+
+        async def run():
+            snapshot = DiskInfoSnapshot(ttl=60, collect=collect)
+            with self.assertRaises(RuntimeError):
+                await snapshot.get()
+            return await snapshot.get()
+
+        self.assertEqual(asyncio.run(run()), {"disks": [], "zfs_pools": []})
+
+    def test_last_does_not_collect(self):
+        """last() returns the previous result even when it is stale, None before the first collection."""
+        calls = []
+
+        async def collect():
+            calls.append(1)
+            return {"disks": [], "zfs_pools": [], "n": len(calls)}
+
+        async def run():
+            snapshot = DiskInfoSnapshot(ttl=0, collect=collect)
+            before = snapshot.last()
+            data = await snapshot.get()
+            return before, data, snapshot.last()
+
+        before, data, last = asyncio.run(run())
+        self.assertIsNone(before)
+        self.assertIs(last, data)
+        self.assertEqual(len(calls), 1)
+
+
+class TestConcurrentProbes(unittest.TestCase):
+
+    def test_run_cmd_timeout(self):
+        """A hanging command is killed and returns empty output."""
+        start = time.monotonic()
+        self.assertEqual(asyncio.run(run_cmd(["sleep", "5"], timeout=0.2)), "")
+        self.assertLess(time.monotonic() - start, 2)
+
+    def test_smart_probes_run_concurrently(self):
+        """SMART probes overlap up to DISK_PROBE_CONCURRENCY, latency is recorded per probe."""
+        disks = [{"name": f"sd{c}", "kname": f"/dev/sd{c}", "serial": c, "partitions": []} for c in "abcdef"]
+        running = []
+        peak = []
+
+        async def smart(path, skip_standby=False):
+            running.append(path)
+            peak.append(len(running))
+            await asyncio.sleep(0.1)
+            running.remove(path)
+            return {"temperature": 30}
+
+        with patch.object(disk_utils, "get_smart_info", side_effect=smart), \
+                patch.object(disk_utils.config, "DISK_PROBE_CONCURRENCY", 3), \
+                patch.dict(disk_utils.smart_cache, clear=True):
+            start = time.monotonic()
+            data = asyncio.run(collect_smart_info(disks))
+            elapsed = time.monotonic() - start
+
+        self.assertEqual(max(peak), 3)
+        self.assertLess(elapsed, 0.5)
+        self.assertEqual(len(data['probe_latency']), 6)
+        self.assertEqual(data['smart']['/dev/sda'], {"temperature": 30})
+
+
+class TestStandbySmart(unittest.TestCase):
+
+    def test_standby_drive_is_not_woken(self):
+        """smartctl is called with -n standby, a sleeping drive keeps its cached values."""
+        standby_output = '{"smartctl": {"exit_status": 2, "messages": [{"string": "Device is in STANDBY mode, exit(2)", "severity": "information"}]}}'
+        active_output = '{"temperature": {"current": 41}, "smart_status": {"passed": true}}'
+        calls = []
+
+        async def fake_run_cmd(args, timeout=None):
+            calls.append(args)
+            return standby_output if args[-1] == "/dev/sdb" else active_output
+
+        disks = [{"kname": "/dev/sda"}, {"kname": "/dev/sdb"}]
+        with patch.object(disk_utils, "run_cmd", side_effect=fake_run_cmd), \
+                patch.object(disk_utils, "is_tool_available", return_value=True), \
+                patch.dict(disk_utils.smart_cache, {"/dev/sdb": {"temperature": 35}}, clear=True):
+            data = asyncio.run(collect_smart_info(disks))
+            cached = dict(disk_utils.smart_cache)
+
+        self.assertTrue(all(args[:5] == ["smartctl", "-a", "-j", "-n", "standby"] for args in calls))
+        self.assertEqual(list(data['smart']), ["/dev/sda"])
+        self.assertEqual(data['smart']['/dev/sda']['temperature'], 41)
+        self.assertEqual(data['standby'], ["/dev/sdb"])
+        self.assertEqual(cached["/dev/sdb"], {"temperature": 35})
+        self.assertEqual(cached["/dev/sda"]['temperature'], 41)
+    def test_collector_reports_cached_values_of_sleeping_drive(self):
+        """Sleeping drive keeps its temp/health series with the cached values and standby=1."""
+        from nas_monitor.collectors import SmartCollector
+
+        disks = [{"name": "sda", "kname": "/dev/sda", "serial": "A"}, {"name": "sdb", "kname": "/dev/sdb", "serial": "B"}]
+
+        async def snapshot():
+            return {"disks": disks}
+
+        async def smart(disks):
+            disk_utils.smart_cache["/dev/sda"] = {"temperature": 41, "health_status": 1}
+            return {"smart": {"/dev/sda": disk_utils.smart_cache["/dev/sda"]}, "standby": ["/dev/sdb"]}
+
+        with patch.object(disk_utils.disk_snapshot, "get", side_effect=snapshot), \
+                patch("nas_monitor.collectors.collect_smart_info", side_effect=smart), \
+                patch.dict(disk_utils.smart_cache, {"/dev/sdb": {"temperature": 35, "health_status": 1}}, clear=True):
+            metrics = asyncio.run(SmartCollector().collect())
+
+        values = {(m.device_name, m.label): m.value for m in metrics}
+        self.assertEqual(values, {
+            ("A", "temp"): 41.0, ("A", "health"): 1.0, ("A", "standby"): 0.0,
+            ("B", "temp"): 35.0, ("B", "health"): 1.0, ("B", "standby"): 1.0,
+        })
+
+
 if __name__ == '__main__':
     unittest.main()
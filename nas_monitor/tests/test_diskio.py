@@ -0,0 +1,64 @@
+import asyncio
+from datetime import timedelta
+
+from nas_monitor import collectors
+from nas_monitor.collectors import DiskIOCollector
+from nas_monitor.utils import disk_utils
+from nas_monitor.utils.procfs import DiskStats
+
+
+def diskstats_line(name, reads=0, read_sectors=0, read_ms=0, writes=0, write_sectors=0, write_ms=0,
+                   busy_ms=0, weighted_ms=0):
+    # major minor name, 11 used fields, then discard and flush fields of newer kernels
+    return (f"   8       0 {name} {reads} 0 {read_sectors} {read_ms} {writes} 0 {write_sectors} {write_ms} "
+            f"0 {busy_ms} {weighted_ms} 0 0 0 0 0 0\n")
+
+
+def test_disk_stats_selects_disks(tmp_path):
+    (tmp_path / "diskstats").write_text(
+        diskstats_line("sda", reads=5) + diskstats_line("sda1", reads=4) + diskstats_line("loop0", reads=3)
+        + "   8      16 sdb 1 2 3 4 5 6 7 8 9 10 11\n"
+    )
+    names, counters = DiskStats(root=str(tmp_path)).read({"sda", "sdb"})
+    assert names == ["sda", "sdb"]
+    assert counters.tolist()[1] == list(range(1, 12))
+    assert counters[0, 0] == 5
+
+
+def test_diskio_collector(tmp_path, monkeypatch):
+    stats = tmp_path / "diskstats"
+    stats.write_text(diskstats_line("sda") + diskstats_line("sdb"))
+
+    async def physical_disks():
+        return [
+            {"name": "sda", "kname_short": "sda", "serial": "SN-A"},
+            {"name": "nvme0n1", "kname_short": "nvme0n1", "serial": ""},
+        ], {"sda": "SN-A", "nvme0n1": ""}
+
+    async def snapshot():
+        raise AssertionError("the disk snapshot is not refreshed by the 10 s job")
+
+    monkeypatch.setattr(collectors, "get_physical_disks", physical_disks)
+    monkeypatch.setattr(disk_utils.disk_snapshot, "get", snapshot)
+    collector = DiskIOCollector()
+    collector.disk_stats = DiskStats(root=str(tmp_path))
+    # first tick only remembers counters
+    assert asyncio.run(collector.collect()) == []
+
+    stats.write_text(
+        diskstats_line("sda", reads=100, read_sectors=2048 * 10, read_ms=500, writes=100, write_sectors=2048,
+                       write_ms=1500, busy_ms=500, weighted_ms=2000)
+        + diskstats_line("nvme0n1", reads=7)
+    )
+    collector.prev_time -= timedelta(seconds=1)
+    metrics = asyncio.run(collector.collect())
+    values = {(m.device_name, m.label): m.value for m in metrics}
+    # nvme0n1 appeared only now, its rates start with the next tick
+    assert {name for name, _ in values} == {"SN-A"}
+    # about 1 second elapsed: 10 MiB read, 1 MiB written
+    assert 9000 < values["SN-A", "read_speed"] <= 10240
+    assert 900 < values["SN-A", "write_speed"] <= 1024
+    assert 90 < values["SN-A", "read_iops"] <= 100
+    assert 45 < values["SN-A", "util_percent"] <= 50
+    assert values["SN-A", "await_ms"] == 10.0
+    assert 1.8 < values["SN-A", "queue_depth"] <= 2
@@ -0,0 +1,49 @@
+import numpy as np
+
+from nas_monitor.utils.downsample import lttb_indices
+
+
+def _reference_lttb(points, threshold):
+    """Straightforward LTTB from the original paper"""
+    every = (len(points) - 2) / (threshold - 2)
+    a = 0
+    sampled = [0]
+    for i in range(threshold - 2):
+        avg_start = int((i + 1) * every) + 1
+        avg_end = min(int((i + 2) * every) + 1, len(points))
+        avg_x = sum(p[0] for p in points[avg_start:avg_end]) / (avg_end - avg_start)
+        avg_y = sum(p[1] for p in points[avg_start:avg_end]) / (avg_end - avg_start)
+        range_start, range_end = int(i * every) + 1, int((i + 1) * every) + 1
+        best, best_area = None, -1
+        for j in range(range_start, range_end):
+            area = abs((points[a][0] - avg_x) * (points[j][1] - points[a][1])
+                       - (points[a][0] - points[j][0]) * (avg_y - points[a][1]))
+            if area > best_area:
+                best, best_area = j, area
+        sampled.append(best)
+        a = best
+    sampled.append(len(points) - 1)
+    return sampled
+
+
+def test_matches_reference_implementation():
+    x = np.arange(1000) * 5
+    y = np.sin(np.arange(1000) / 20) * 50 + (np.arange(1000) % 7)
+    for threshold in (3, 10, 97, 500):
+        expected = _reference_lttb(list(zip(x.tolist(), y.tolist())), threshold)
+        assert lttb_indices(x, y, threshold).tolist() == expected
+
+
+def test_keeps_spike_and_bounds():
+    y = np.zeros(10_000)
+    y[4321] = 100.0
+    idx = lttb_indices(np.arange(10_000), y, 50)
+    assert len(idx) == 50
+    assert idx[0] == 0 and idx[-1] == 9_999
+    assert 4321 in idx
+    assert np.all(np.diff(idx) > 0)
+
+
+def test_small_input_is_returned_as_is():
+    assert lttb_indices(np.arange(5), np.arange(5), 10).tolist() == [0, 1, 2, 3, 4]
+    assert lttb_indices(np.arange(5), np.arange(5), 2).tolist() == [0, 1, 2, 3, 4]
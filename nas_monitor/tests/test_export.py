@@ -0,0 +1,95 @@
+import msgpack
+import orjson
+import pytest
+import pytest_asyncio
+
+from nas_monitor.export import arrow_stream, msgpack_stream, ndjson_stream
+from nas_monitor.metrics import iter_metric_pages, iter_metric_rows
+from nas_monitor.models import Device, Series, RawMetric, HistoryMetric
+
+START = 1_700_000_000
+
+
+@pytest_asyncio.fixture
+async def db(db):
+    cpu = await Device.create(name="cpu", type="cpu")
+    load = await Series.create(device=cpu, label="load")
+    temp = await Series.create(device=cpu, label="temp")
+    # two samples with the same ts must not be lost at a page boundary
+    await RawMetric.bulk_create(
+        [RawMetric(series=load, ts=START + i // 2 * 5, value=i) for i in range(25)]
+        + [RawMetric(series=temp, ts=START + i * 60, value=40) for i in range(3)]
+    )
+    await HistoryMetric.bulk_create([
+        HistoryMetric(series=load, ts=START + i * 86400, value=i, min_value=0, max_value=i,
+                      sum_value=i * 10, sample_count=10, last_value=i)
+        for i in range(5)
+    ])
+
+
+async def _collect(stream) -> bytes:
+    return b"".join([chunk async for chunk in stream])
+
+
+@pytest.mark.asyncio
+async def test_iter_metric_pages(db):
+    pages = [(series['label'], rows) async for series, rows in iter_metric_pages("raw", page_size=4)]
+    load = [row for label, rows in pages if label == "load" for row in rows]
+    assert [value for _, _, value in load] == list(range(25))
+    assert all(len(rows) <= 4 for _, rows in pages)
+    assert sum(len(rows) for label, rows in pages if label == "temp") == 3
+
+
+@pytest.mark.asyncio
+async def test_msgpack_stream(db):
+    unpacker = msgpack.Unpacker(raw=False)
+    unpacker.feed(await _collect(msgpack_stream(iter_metric_pages("history", page_size=2), True)))
+    frames = list(unpacker)
+    assert len(frames) == 3
+    assert frames[0]['series'] == {"device": "cpu", "label": "load", "type": "cpu"}
+    assert sum((frame['v'] for frame in frames), []) == [0, 1, 2, 3, 4]
+    assert sum((frame['count'] for frame in frames), []) == [10] * 5
+
+
+@pytest.mark.asyncio
+async def test_arrow_stream(db):
+    pa = pytest.importorskip("pyarrow")
+    data = await _collect(arrow_stream(iter_metric_pages("history", page_size=2), True))
+    table = pa.ipc.open_stream(data).read_all()
+    assert table.num_rows == 5
+    assert table.column("value").to_pylist() == [0, 1, 2, 3, 4]
+    assert table.column("max").to_pylist() == [0, 1, 2, 3, 4]
+    assert table.column("ts")[0].value == START
+    assert set(table.column("label").to_pylist()) == {"load"}
+
+    data = await _collect(arrow_stream(iter_metric_pages("raw", page_size=10), False))
+    table = pa.ipc.open_stream(data).read_all()
+    assert table.num_rows == 28
+    assert "min" not in table.schema.names
+
+
+@pytest.mark.asyncio
+async def test_ndjson_stream(db):
+    data = await _collect(ndjson_stream(iter_metric_rows("raw", device_names=["cpu"], page_size=7), False))
+    rows = [orjson.loads(line) for line in data.splitlines()]
+    assert len(rows) == 28
+    assert len({row['id'] for row in rows}) == 28
+    assert rows[0]['label'] == "load" and "count" not in rows[0]
+    assert rows[0]['timestamp'] == "2023-11-14T22:13:20+00:00"
+    # series are merged by time
+    assert [(row['timestamp'], row['id']) for row in rows] == sorted((row['timestamp'], row['id']) for row in rows)
+    assert [row['label'] for row in rows[:3]] == ["load", "load", "temp"]
+
+    data = await _collect(ndjson_stream(iter_metric_rows("history", page_size=2), True))
+    rows = [orjson.loads(line) for line in data.splitlines()]
+    assert [row['sum'] for row in rows] == [0, 10, 20, 30, 40]
+
+
+@pytest.mark.asyncio
+async def test_iter_metric_rows_merges_small_pages(db, mocker):
+    mocker.patch("nas_monitor.metrics.MIN_MERGE_PAGE_SIZE", 1)
+    pages = [page async for page in iter_metric_rows("raw", page_size=4)]
+    rows = [(row[1], row[0], series['label']) for page in pages for series, row in page]
+    assert len(rows) == 28
+    assert rows == sorted(rows)
+    assert all(len(page) <= 4 for page in pages)
@@ -0,0 +1,39 @@
+from nas_monitor.utils.hwmon import HwmonSensors
+
+
+def _make_chip(root, index, name, sensors):
+    chip = root / f"hwmon{index}"
+    chip.mkdir(parents=True)
+    (chip / "name").write_text(name + "\n")
+    for n, (label, millidegrees) in enumerate(sensors, start=1):
+        (chip / f"temp{n}_input").write_text(f"{millidegrees}\n")
+        if label is not None:
+            (chip / f"temp{n}_label").write_text(label + "\n")
+    return chip
+
+
+def test_hwmon_sensors(tmp_path):
+    _make_chip(tmp_path, 0, "acpitz", [(None, 27800)])
+    coretemp = _make_chip(tmp_path, 1, "coretemp", [("Core 0", 45000), ("Package id 0", 51000)])
+    _make_chip(tmp_path, 2, "jc42", [(None, 40500)])
+    _make_chip(tmp_path, 3, "nvme", [("Composite", 38850)])
+
+    sensors = HwmonSensors(root=str(tmp_path))
+    assert sensors.read("cpu") == [51.0]
+    assert sensors.read("ram") == [27.8, 40.5]
+
+    # open files are re-read, no rediscovery needed
+    (coretemp / "temp2_input").write_text("63000\n")
+    assert sensors.read("cpu") == [63.0]
+
+    # driver reload: old input is gone (empty read here, ENODEV in sysfs), rediscovered on failure
+    (coretemp / "temp2_input").write_text("")
+    (coretemp / "name").write_text("unloaded\n")
+    _make_chip(tmp_path, 4, "k10temp", [("Tctl", 70125)])
+    assert sensors.read("cpu") == [70.125]
+    sensors.close()
+
+
+def test_no_sensors(tmp_path):
+    sensors = HwmonSensors(root=str(tmp_path / "missing"))
+    assert sensors.read("cpu") == []
@@ -0,0 +1,96 @@
+import asyncio
+
+import pytest
+
+from nas_monitor.ingest import IngestWriter
+from nas_monitor.models import RawMetric
+
+
+def rows(series, count, ts=1_700_000_000):
+    return [RawMetric(ts=ts + i, series_id=series.id, value=float(i)) for i in range(count)]
+
+
+@pytest.mark.asyncio
+async def test_group_commit_by_size_and_time(series):
+    writer = IngestWriter(batch_size=10, flush_interval=0.1, queue_size=100)
+    writer.start()
+    # three ticks of 4 rows: one full batch, the rest after the flush interval
+    for _ in range(3):
+        await writer.submit(rows(series, 4))
+    await asyncio.sleep(0.3)
+    assert await RawMetric.all().count() == 12
+    assert writer.flushes == 2
+    stats = writer.stats()
+    assert stats["written"] == 12 and stats["queued"] == 0
+    assert stats["avg_batch_rows"] == 6
+    await writer.stop()
+
+
+@pytest.mark.asyncio
+async def test_backpressure_and_flush_on_stop(series):
+    writer = IngestWriter(batch_size=5, flush_interval=60, queue_size=5)
+    # a slow database: flushes wait until released
+    released = asyncio.Event()
+    flush = writer._flush
+
+    async def slow_flush(batch):
+        await released.wait()
+        await flush(batch)
+
+    writer._flush = slow_flush
+    writer.start()
+    # one batch is being written and the queue is full, so submit waits for space
+    submit = asyncio.create_task(writer.submit(rows(series, 20)))
+    await asyncio.sleep(0.05)
+    assert not submit.done()
+    assert writer.stats()["queued"] == 5
+
+    released.set()
+    await asyncio.wait_for(submit, 2)
+    await writer.stop()
+    assert not writer.running
+    assert await RawMetric.all().count() == 20
+    assert writer.stats()["failed"] == 0
+
+
+@pytest.mark.asyncio
+async def test_without_writer_rows_are_written_immediately(series):
+    writer = IngestWriter()
+    await writer.submit(rows(series, 3))
+    assert await RawMetric.all().count() == 3
+
+
+@pytest.mark.asyncio
+async def test_failed_batch_is_retried(series, mocker):
+    writer = IngestWriter()
+    writer.retry_delay = 0.01
+    bulk_create = RawMetric.bulk_create
+    errors = [Exception("database is locked")] * 2
+
+    async def locked_twice(batch):
+        if errors:
+            raise errors.pop()
+        await bulk_create(batch)
+
+    mock = mocker.patch.object(RawMetric, "bulk_create", side_effect=locked_twice)
+    await writer.submit(rows(series, 3))
+    assert await RawMetric.all().count() == 3
+    assert writer.stats()["failed"] == 0
+
+    mock.side_effect = Exception("disk I/O error")
+    mock.reset_mock()
+    await writer.submit(rows(series, 2))
+    assert mock.call_count == writer.retries + 1
+    assert writer.stats()["failed"] == 2
+
+
+@pytest.mark.asyncio
+async def test_rows_after_stop_are_dropped(series):
+    writer = IngestWriter(batch_size=10, flush_interval=60)
+    writer.start()
+    await writer.submit(rows(series, 3))
+    await writer.stop()
+    # a collector job still running at shutdown
+    await writer.submit(rows(series, 2, ts=1_700_000_100))
+    assert await RawMetric.all().count() == 3
+    assert writer.stats()["failed"] == 2
@@ -0,0 +1,45 @@
+import pytest
+
+from nas_monitor.latest_cache import LatestValueCache
+from nas_monitor.models import Device, Series, RawMetric
+from nas_monitor.shemas import Metrics
+
+
+def test_update_and_filter_by_type():
+    cache = LatestValueCache()
+    cache.update_batch(
+        [
+            Metrics(device_name="cpu", label="load", value=10.0),
+            Metrics(device_name="cpu", label="temp", value=40.0),
+            Metrics(device_name="ram", label="usage_percent", value=50.0),
+            Metrics(device_name="unknown", label="load", value=1.0),
+        ],
+        {"cpu": "cpu", "ram": "ram"}
+    )
+    cache.update("cpu", "cpu", "load", 20.0)
+
+    assert cache.get() == {"cpu": {"load": 20.0, "temp": 40.0}, "ram": {"usage_percent": 50.0}}
+    assert cache.get(["ram"]) == {"ram": {"usage_percent": 50.0}}
+
+    # Returned dicts are copies
+    cache.get()["cpu"]["load"] = 0
+    assert cache.get(["cpu"])["cpu"]["load"] == 20.0
+
+
+@pytest.mark.asyncio
+async def test_load_takes_latest_row_per_series(db):
+    cpu = await Device.create(name="cpu", type="cpu")
+    load = await Series.create(device=cpu, label="load")
+    temp = await Series.create(device=cpu, label="temp")
+    now = 1_700_000_000
+    await RawMetric.bulk_create([
+        RawMetric(ts=now - 10, series=load, value=1.0),
+        RawMetric(ts=now, series=load, value=2.0),
+        RawMetric(ts=now - 5, series=load, value=3.0),
+        RawMetric(ts=now - 5, series=temp, value=45.0),
+    ])
+
+    cache = LatestValueCache()
+    await cache.load()
+    assert cache.get() == {"cpu": {"load": 2.0, "temp": 45.0}}
+    assert cache.get(["ram"]) == {}
@@ -0,0 +1,70 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from nas_monitor.api_router import router
+from nas_monitor.latest_cache import latest_cache
+from nas_monitor.live import LiveHub, LiveSubscriber
+from nas_monitor.shemas import Metrics
+
+
+@pytest.fixture
+def cache():
+    latest_cache.clear()
+    latest_cache.update("cpu", "cpu", "load", 10.0)
+    latest_cache.update("sda", "storage", "temp", 35.0)
+    latest_cache.update("sdb", "storage", "temp", 37.0)
+    yield latest_cache
+    latest_cache.clear()
+
+
+@pytest.mark.asyncio
+async def test_publish_filters():
+    hub = LiveHub()
+    everything = hub.subscribe()
+    storage = hub.subscribe(device_types=["storage"])
+    sda = hub.subscribe(device_names=["sda"])
+    hub.publish("storage", [
+        Metrics(device_name="sda", label="temp", value=36),
+        Metrics(device_name="sdb", label="temp", value=38),
+    ])
+    hub.publish("cpu", [Metrics(device_name="cpu", label="load", value=12)])
+
+    assert everything.queue.qsize() == 2
+    assert storage.queue.qsize() == 1
+    message = storage.queue.get_nowait()
+    assert message['type'] == "metrics" and message['device_type'] == "storage"
+    assert message['data'] == {"sda": {"temp": 36}, "sdb": {"temp": 38}}
+    assert sda.queue.get_nowait()['data'] == {"sda": {"temp": 36}}
+    assert sda.queue.empty()
+
+    hub.unsubscribe(everything)
+    assert hub.subscribers_count == 2
+
+
+@pytest.mark.asyncio
+async def test_slow_subscriber_drops_oldest():
+    subscriber = LiveSubscriber(queue_size=2)
+    for i in range(5):
+        subscriber.put({"n": i})
+    assert subscriber.dropped == 3
+    assert [subscriber.queue.get_nowait()["n"] for _ in range(2)] == [3, 4]
+
+
+def test_snapshot(cache):
+    hub = LiveHub()
+    subscriber = LiveSubscriber(device_types=["storage"], device_names=["sdb"])
+    assert hub.snapshot(subscriber)['data'] == {"sdb": {"temp": 37.0}}
+
+
+def test_websocket_snapshot_and_filter_change(cache):
+    app = FastAPI()
+    app.include_router(router)
+    client = TestClient(app)
+    with client.websocket_connect("/api/ws/live?device_types=cpu") as websocket:
+        message = websocket.receive_json()
+        assert message['type'] == "snapshot"
+        assert message['data'] == {"cpu": {"load": 10.0}}
+        websocket.send_json({"device_types": ["storage"]})
+        message = websocket.receive_json()
+        assert set(message['data']) == {"sda", "sdb"}
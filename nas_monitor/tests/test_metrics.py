@@ -0,0 +1,84 @@
+import pytest
+from datetime import datetime, timedelta, timezone
+
+from nas_monitor.metrics import fetch_metrics_data, fetch_metrics_columns, get_metrics_cursor, select_history_type
+from nas_monitor.models import Device, Series, RawMetric, HourlyMetric
+
+
+def test_select_history_type():
+    now = datetime.now(timezone.utc)
+    # short range: raw has enough points
+    assert select_history_type(now - timedelta(hours=1), now, 400) == "raw"
+    # 30 days: hourly gives 720 points
+    assert select_history_type(now - timedelta(days=30), now, 400) == "hourly"
+    # 30 days with a bigger budget needs raw
+    assert select_history_type(now - timedelta(days=30), now, 1000) == "raw"
+    # older than raw retention
+    assert select_history_type(now - timedelta(days=60), now, 100) == "hourly"
+    assert select_history_type(now - timedelta(days=365), now, 300) == "history"
+    # no budget: the finest tier covering the range
+    assert select_history_type(now - timedelta(days=30), now) == "raw"
+    assert select_history_type(None, None, 100) == "history"
+
+
+@pytest.mark.asyncio
+async def test_fetch_metrics_data_max_points(db):
+    cpu = await Device.create(name="cpu", type="cpu")
+    load = await Series.create(device=cpu, label="load")
+    temp = await Series.create(device=cpu, label="temp")
+    await RawMetric.bulk_create(
+        [RawMetric(series=load, ts=1_700_000_000 + i * 5, value=i % 10) for i in range(1000)]
+        + [RawMetric(series=temp, ts=1_700_000_000 + i * 60, value=40) for i in range(20)]
+    )
+    rows = await fetch_metrics_data("raw", device_types=["cpu"], max_points=50)
+    assert sum(r['label'] == 'load' for r in rows) == 50
+    assert sum(r['label'] == 'temp' for r in rows) == 20
+    timestamps = [r['timestamp'] for r in rows]
+    assert timestamps == sorted(timestamps)
+
+
+@pytest.mark.asyncio
+async def test_fetch_metrics_columns(db):
+    cpu = await Device.create(name="cpu", type="cpu")
+    load = await Series.create(device=cpu, label="load")
+    temp = await Series.create(device=cpu, label="temp")
+    await RawMetric.bulk_create(
+        [RawMetric(series=load, ts=1_700_000_000 + i * 5, value=i) for i in range(10)]
+        + [RawMetric(series=temp, ts=1_700_000_000 + i * 60, value=40) for i in range(3)]
+    )
+    columns = await fetch_metrics_columns("raw", device_types=["cpu"])
+    by_label = {item['series']['label']: item for item in columns}
+    assert by_label['load']['series'] == {"device": "cpu", "label": "load", "type": "cpu"}
+    assert by_label['load']['t'] == [1_700_000_000 + i * 5 for i in range(10)]
+    assert by_label['load']['v'] == list(range(10))
+    assert by_label['temp']['v'] == [40, 40, 40]
+    assert "min" not in by_label['load']
+
+    await HourlyMetric.create(series=load, ts=1_700_000_000, value=4.5, min_value=0, max_value=9,
+                              sum_value=45, sample_count=10, last_value=9)
+    columns = await fetch_metrics_columns("hourly", device_types=["cpu"])
+    assert columns == [{
+        "series": {"device": "cpu", "label": "load", "type": "cpu"},
+        "t": [1_700_000_000], "v": [4.5],
+        "min": [0], "max": [9], "count": [10], "sum": [45], "last": [9]
+    }]
+
+
+@pytest.mark.asyncio
+async def test_since_cursor(db):
+    cpu = await Device.create(name="cpu", type="cpu")
+    load = await Series.create(device=cpu, label="load")
+    await RawMetric.bulk_create([RawMetric(series=load, ts=1_700_000_000 + i * 5, value=i) for i in range(5)])
+    cursor = await get_metrics_cursor("raw")
+    rows = await fetch_metrics_data("raw", device_types=["cpu"], until_id=cursor)
+    assert len(rows) == 5
+
+    # nothing new
+    assert await fetch_metrics_data("raw", device_types=["cpu"], since_id=cursor) == []
+    await RawMetric.bulk_create([RawMetric(series=load, ts=1_700_000_100 + i * 5, value=10 + i) for i in range(2)])
+    new_cursor = await get_metrics_cursor("raw")
+    rows = await fetch_metrics_data("raw", device_types=["cpu"], since_id=cursor, until_id=new_cursor)
+    assert [r['value'] for r in rows] == [10, 11]
+    columns = await fetch_metrics_columns("raw", device_types=["cpu"], since_id=cursor, until_id=new_cursor)
+    assert columns[0]['v'] == [10, 11]
+    assert await get_metrics_cursor("hourly") == 0
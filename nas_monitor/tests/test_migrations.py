@@ -0,0 +1,96 @@
+import pytest
+import pytest_asyncio
+from tortoise import Tortoise
+
+from nas_monitor.migrations import add_rollup_seq_column, detach_legacy_metric_tables, migrate_legacy_metric_tables
+from nas_monitor.models import Device, Series, RawMetric, HourlyMetric
+
+LEGACY_SCHEMA = """
+CREATE TABLE "device" (
+    "id" INTEGER PRIMARY KEY AUTOINCREMENT NOT NULL,
+    "name" VARCHAR(100) NOT NULL UNIQUE,
+    "type" VARCHAR(50) NOT NULL,
+    "enabled" INT NOT NULL DEFAULT 1,
+    "details" JSON
+);
+CREATE TABLE "rawmetric" (
+    "id" INTEGER PRIMARY KEY AUTOINCREMENT NOT NULL,
+    "timestamp" TIMESTAMP NOT NULL,
+    "label" VARCHAR(50) NOT NULL,
+    "value" REAL NOT NULL,
+    "device_id" INT NOT NULL REFERENCES "device" ("id") ON DELETE CASCADE
+);
+CREATE INDEX "idx_rawmetric_timesta_f7e9a1" ON "rawmetric" ("timestamp");
+CREATE TABLE "hourlymetric" (
+    "id" INTEGER PRIMARY KEY AUTOINCREMENT NOT NULL,
+    "timestamp" TIMESTAMP NOT NULL,
+    "label" VARCHAR(50) NOT NULL,
+    "value" REAL NOT NULL,
+    "device_id" INT NOT NULL REFERENCES "device" ("id") ON DELETE CASCADE
+);
+INSERT INTO device (id, name, type) VALUES (1, 'cpu', 'cpu');
+INSERT INTO rawmetric (id, timestamp, label, value, device_id) VALUES
+    (10, '2024-01-01 10:00:00.123456+00:00', 'load', 1.5, 1),
+    (11, '2024-01-01 10:00:05.000000+00:00', 'temp', 40.0, 1),
+    (12, '2024-01-01 10:00:10.000000+00:00', 'load', 2.5, 1);
+-- the same bucket emitted twice by partial aggregation
+INSERT INTO hourlymetric (id, timestamp, label, value, device_id) VALUES
+    (1, '2024-01-01 10:00:00+00:00', 'load', 1.0, 1),
+    (2, '2024-01-01 10:00:00+00:00', 'load', 3.0, 1);
+"""
+
+
+@pytest_asyncio.fixture
+async def legacy_db():
+    await Tortoise.init(db_url="sqlite://:memory:", modules={'models': ['nas_monitor.models']})
+    await Tortoise.get_connection("default").execute_script(LEGACY_SCHEMA)
+    yield
+    await Tortoise.close_connections()
+
+
+@pytest.mark.asyncio
+async def test_legacy_tables_are_migrated(legacy_db):
+    tables = await detach_legacy_metric_tables()
+    assert tables == ["rawmetric", "hourlymetric"]
+    await Tortoise.generate_schemas()
+    await migrate_legacy_metric_tables()
+
+    load = await Series.get(label="load")
+    temp = await Series.get(label="temp")
+    assert load.device_id == temp.device_id == 1
+
+    raw = await RawMetric.all().order_by("id").values_list("id", "series_id", "ts", "value")
+    assert raw == [
+        (10, load.id, 1704103200, 1.5),
+        (11, temp.id, 1704103205, 40.0),
+        (12, load.id, 1704103210, 2.5),
+    ]
+    hourly = await HourlyMetric.all().values_list("series_id", "ts", "value")
+    assert hourly == [(load.id, 1704103200, 2.0)]
+    # migrated buckets are numbered for incremental cursors
+    await add_rollup_seq_column()
+    assert await HourlyMetric.all().values_list("id", "seq") == [(2, 2)]
+
+    conn = Tortoise.get_connection("default")
+    leftovers = await conn.execute_query_dict("SELECT name FROM sqlite_master WHERE name LIKE '%_legacy'")
+    assert leftovers == []
+    assert await Device.all().count() == 1
+
+
+@pytest.mark.asyncio
+async def test_compact_tables_are_left_alone(legacy_db):
+    assert len(await detach_legacy_metric_tables()) == 2
+    await Tortoise.generate_schemas()
+    assert await detach_legacy_metric_tables() == []
+
+
+@pytest.mark.asyncio
+async def test_interrupted_migration_is_finished(legacy_db):
+    # the process died after the rename: the next start finds nothing to detach
+    await detach_legacy_metric_tables()
+    await Tortoise.generate_schemas()
+    assert await detach_legacy_metric_tables() == []
+
+    await migrate_legacy_metric_tables()
+    assert await RawMetric.all().count() == 3
+    assert await HourlyMetric.all().count() == 1
@@ -0,0 +1,69 @@
+import asyncio
+from datetime import timedelta
+
+import numpy as np
+
+from nas_monitor.collectors import NetCollector
+from nas_monitor.config import config
+from nas_monitor.utils.network import is_monitored_nic
+from nas_monitor.utils.procfs import NetDev, counter_deltas
+
+HEADER = """Inter-|   Receive                                                |  Transmit
+ face |bytes    packets errs drop fifo frame compressed multicast|bytes    packets errs drop fifo colls carrier compressed
+"""
+
+
+def net_dev_line(name, rx, rx_packets, tx, tx_packets, errors=0, drops=0):
+    return f"{name:>6}: {rx} {rx_packets} {errors} {drops} 0 0 0 0 {tx} {tx_packets} 0 0 0 0 0 0\n"
+
+
+def test_is_monitored_nic(monkeypatch):
+    assert is_monitored_nic("eth0")
+    assert is_monitored_nic("enp3s0")
+    for name in ["lo", "veth1a2b", "fwbr100i0", "tap100i0", "br0", "vmbr0"]:
+        assert not is_monitored_nic(name)
+    monkeypatch.setattr(config, "NET_INCLUDE_INTERFACES", ["eth*", "vmbr0"])
+    assert is_monitored_nic("eth1")
+    assert not is_monitored_nic("enp3s0")
+    # exclusions still win
+    assert not is_monitored_nic("vmbr0")
+
+
+def test_counter_deltas_wrap_and_reset():
+    previous = np.array([100, 2 ** 32 - 100, 5000, 2 ** 40])
+    current = np.array([150, 50, 20, 2 ** 40 + 10])
+    # plain increase, 32-bit wrap, reset to zero, 64-bit counter
+    assert counter_deltas(previous, current).tolist() == [50, 150, 20, 10]
+
+
+def test_net_collector_per_interface(tmp_path):
+    (tmp_path / "net").mkdir()
+    dev = tmp_path / "net" / "dev"
+    dev.write_text(HEADER + net_dev_line("lo", 1, 1, 1, 1) + net_dev_line("eth0", 10240, 10, 20480, 20))
+    collector = NetCollector()
+    collector.net_dev = NetDev(root=str(tmp_path), nic_filter=is_monitored_nic)
+    collector.prev_names, collector.prev_counters = collector.net_dev.read()
+    collector.prev_time -= timedelta(seconds=1)
+
+    # eth0 counters were reset, eth1 appeared
+    dev.write_text(
+        HEADER + net_dev_line("lo", 9, 9, 9, 9)
+        + net_dev_line("eth0", 2048, 4, 1024, 2, errors=1, drops=3)
+        + net_dev_line("eth1", 99999, 9, 99999, 9)
+    )
+    metrics = asyncio.run(collector.collect())
+    values = {m.label: m.value for m in metrics}
+    assert set(values) == {
+        "upload", "download", "eth0.upload", "eth0.download", "eth0.rx_packets",
+        "eth0.tx_packets", "eth0.errors", "eth0.drops"
+    }
+    # about 1 second elapsed
+    assert 0.9 < values["eth0.download"] / 2 <= 1
+    assert 0.9 < values["upload"] <= 1
+    assert values["eth0.errors"] > 0 and values["eth0.drops"] > values["eth0.errors"]
+    assert all(value >= 0 for value in values.values())
+
+    collector.prev_time -= timedelta(seconds=1)
+    metrics = asyncio.run(collector.collect())
+    labels = {m.label for m in metrics}
+    assert "eth1.upload" in labels
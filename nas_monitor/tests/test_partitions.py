@@ -0,0 +1,121 @@
+import logging
+from datetime import datetime, timezone
+
+import pytest
+import pytest_asyncio
+from tortoise import Tortoise
+
+from nas_monitor.metrics import fetch_metrics_data, get_metrics_cursor
+from nas_monitor.models import Device, RawMetric, Series
+from nas_monitor.partitions import raw_partitions
+
+DAY = 86400
+# 2024-01-01 00:00 UTC
+DAY1 = 1_704_067_200
+
+
+@pytest_asyncio.fixture
+async def series(series):
+    await raw_partitions.setup()
+    await RawMetric.bulk_create([RawMetric(ts=DAY1 + 60, series=series, value=1.0)])
+    return series
+
+
+def at(ts: int) -> datetime:
+    return datetime.fromtimestamp(ts, timezone.utc)
+
+
+async def object_type(name: str):
+    rows = await Tortoise.get_connection("default").execute_query_dict(
+        "SELECT type FROM sqlite_master WHERE name = ?", [name]
+    )
+    return rows[0]['type'] if rows else None
+
+
+@pytest.mark.asyncio
+async def test_rotation_keeps_reads_and_ids(series):
+    assert await object_type("rawmetric") == "view"
+    await RawMetric.bulk_create([RawMetric(ts=DAY1 + 120, series=series, value=2.0)])
+    # nothing to close within the same day
+    assert await raw_partitions.rotate(now=at(DAY1 + 3600)) == []
+
+    [partition] = await raw_partitions.rotate(now=at(DAY1 + DAY + 60))
+    assert partition == "rawmetric_20240101_000000"
+    assert await raw_partitions.partitions() == [partition]
+
+    await RawMetric.bulk_create([RawMetric(ts=DAY1 + DAY + 120, series=series, value=3.0)])
+    rows = await fetch_metrics_data("raw", start_time=at(DAY1), end_time=at(DAY1 + 2 * DAY))
+    assert [row["value"] for row in rows] == [1.0, 2.0, 3.0]
+    # ids continue across partitions
+    ids = await RawMetric.all().order_by("id").values_list("id", flat=True)
+    assert ids == [1, 2, 3]
+    assert await get_metrics_cursor("raw") == 3
+
+    # range filters reach the partition indexes
+    plan = await Tortoise.get_connection("default").execute_query_dict(
+        "EXPLAIN QUERY PLAN SELECT * FROM rawmetric WHERE series_id = 1 AND ts >= 0"
+    )
+    assert any(f"SEARCH {partition} USING INDEX" in row["detail"] for row in plan)
+
+
+@pytest.mark.asyncio
+async def test_retention_drops_partitions(series):
+    [first] = await raw_partitions.rotate(now=at(DAY1 + DAY + 60))
+    await RawMetric.bulk_create([RawMetric(ts=DAY1 + DAY + 120, series=series, value=2.0)])
+    [second] = await raw_partitions.rotate(now=at(DAY1 + 2 * DAY + 60))
+    await RawMetric.bulk_create([RawMetric(ts=DAY1 + 2 * DAY + 120, series=series, value=3.0)])
+
+    assert await raw_partitions.drop_expired(DAY1 + DAY) == [first]
+    assert await object_type(first) is None
+    assert await raw_partitions.partitions() == [second]
+    assert await RawMetric.all().order_by("ts").values_list("value", flat=True) == [2.0, 3.0]
+
+
+async def partition_values(table: str) -> list:
+    rows = await Tortoise.get_connection("default").execute_query_dict(f'SELECT value FROM "{table}" ORDER BY ts')
+    return [row["value"] for row in rows]
+
+
+@pytest.mark.asyncio
+async def test_rotation_splits_at_period_boundary(series):
+    await RawMetric.bulk_create([
+        RawMetric(ts=DAY1 + DAY + 10, series=series, value=2.0),
+        RawMetric(ts=DAY1 + 2 * DAY + 10, series=series, value=3.0),
+        RawMetric(ts=DAY1 + 2 * DAY + 20, series=series, value=4.0),
+    ])
+    # the app was down for a day: one partition per closed day, rows after midnight stay hot
+    assert await raw_partitions.rotate(now=at(DAY1 + 2 * DAY + 30)) == [
+        "rawmetric_20240101_000000", "rawmetric_20240102_000000"
+    ]
+    assert await partition_values("rawmetric_20240101_000000") == [1.0]
+    assert await partition_values("rawmetric_20240102_000000") == [2.0]
+    assert await partition_values(raw_partitions.hot) == [3.0, 4.0]
+    # ids continue after the rows moved back into the hot table
+    await RawMetric.bulk_create([RawMetric(ts=DAY1 + 2 * DAY + 40, series=series, value=5.0)])
+    assert await RawMetric.all().order_by("id").values_list("id", flat=True) == [1, 2, 3, 4, 5]
+
+    # retention by whole days
+    assert await raw_partitions.drop_expired(DAY1 + DAY) == ["rawmetric_20240101_000000"]
+
+
+@pytest.mark.asyncio
+async def test_setup_splits_converted_rows_by_day(db):
+    series = await Series.create(device=await Device.create(name="cpu", type="cpu"), label="load")
+    now = int(datetime.now(timezone.utc).timestamp())
+    today = now // DAY * DAY
+    await RawMetric.bulk_create([
+        RawMetric(ts=ts, series=series, value=float(n))
+        for n, ts in enumerate((today - 2 * DAY + 5, today - DAY + 5, today - DAY + 6, now))
+    ])
+    # rows written before partitioning are kept by the conversion, closed days are split right away
+    await raw_partitions.setup()
+
+    assert [await partition_values(table) for table in await raw_partitions.partitions()] == [[0.0], [1.0, 2.0]]
+    assert await partition_values(raw_partitions.hot) == [3.0]
+
+
+@pytest.mark.asyncio
+async def test_setup_of_new_database_does_not_warn(db, caplog):
+    await raw_partitions.setup()
+    assert await object_type("rawmetric") == "view"
+    assert not [record for record in caplog.records if record.levelno >= logging.WARNING]
@@ -0,0 +1,50 @@
+from nas_monitor.utils.procfs import CpuUsage, MemInfo, NetDev, ProcFile
+
+NET_DEV = """Inter-|   Receive                                                |  Transmit
+ face |bytes    packets errs drop fifo frame compressed multicast|bytes    packets errs drop fifo colls carrier compressed
+    lo: 1000      10    0    0    0     0          0         0     1000      10    0    0    0     0       0          0
+  eth0: {rx}   200    0    0    0     0          0         0   {tx}     150    0    0    0     0       0          0
+veth12: 7777      20    0    0    0     0          0         0     8888      30    0    0    0     0       0          0
+"""
+
+
+def test_cpu_usage(tmp_path):
+    stat = tmp_path / "stat"
+    stat.write_text("cpu  100 0 100 800 0 0 0 0 0 0\ncpu0 100 0 100 800 0 0 0 0 0 0\n")
+    cpu = CpuUsage(root=str(tmp_path))
+    # 50 busy ticks of 100
+    stat.write_text("cpu  130 0 120 840 10 0 0 0 0 0\ncpu0 130 0 120 840 10 0 0 0 0 0\n")
+    assert cpu.percent() == 50.0
+    # no ticks elapsed
+    assert cpu.percent() == 0.0
+
+
+def test_mem_info(tmp_path):
+    (tmp_path / "meminfo").write_text(
+        "MemTotal:        1000000 kB\nMemFree:          200000 kB\nMemAvailable:     750000 kB\nBuffers: 1 kB\n"
+    )
+    total, available, used, percent = MemInfo(root=str(tmp_path)).read()
+    assert total == 1000000 * 1024
+    assert used == 250000 * 1024
+    assert percent == 25.0
+
+
+def test_net_dev(tmp_path):
+    (tmp_path / "net").mkdir()
+    dev = tmp_path / "net" / "dev"
+    dev.write_text(NET_DEV.format(rx=5000, tx=3000))
+    net = NetDev(root=str(tmp_path), nic_filter=lambda name: name != "lo" and not name.startswith("veth"))
+    names, counters = net.read()
+    assert names == ["eth0"]
+    assert counters.tolist() == [[5000, 200, 0, 0, 3000, 150, 0, 0]]
+    dev.write_text(NET_DEV.format(rx=6000, tx=3500))
+    assert net.totals() == (3500, 6000)
+
+
+def test_proc_file_grows_buffer(tmp_path):
+    path = tmp_path / "big"
+    path.write_bytes(b"x" * 10000)
+    proc_file = ProcFile(str(path), size=1024)
+    assert len(proc_file.read()) == 10000
+    assert proc_file.size >= 10001
+    proc_file.close()
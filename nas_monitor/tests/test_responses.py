@@ -0,0 +1,53 @@
+from unittest.mock import patch
+
+import orjson
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from nas_monitor import responses
+from nas_monitor.responses import negotiate_encoding, json_response, MIN_COMPRESS_SIZE, brotli
+
+
+def test_negotiate_encoding():
+    assert negotiate_encoding("") is None
+    assert negotiate_encoding("identity") is None
+    assert negotiate_encoding("gzip, deflate") == "gzip"
+    assert negotiate_encoding("gzip;q=0") is None
+    assert negotiate_encoding("*") == ("br" if brotli else "gzip")
+    assert negotiate_encoding("br;q=0.5, gzip;q=1.0") == "gzip"
+    # explicit refusal wins over "*"
+    assert negotiate_encoding("gzip;q=0, *") == ("br" if brotli else None)
+    assert negotiate_encoding("br;q=0, gzip;q=0, *;q=1") is None
+
+
+def test_json_response_compression():
+    app = FastAPI()
+    payload = {"data": [{"t": i, "v": i * 0.5} for i in range(MIN_COMPRESS_SIZE)]}
+
+    @app.get("/big")
+    async def big(request: Request):
+        return await json_response(request, payload)
+
+    @app.get("/small")
+    async def small(request: Request):
+        return await json_response(request, {"ok": True})
+
+    client = TestClient(app)
+    response = client.get("/big", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert response.json() == payload
+
+    response = client.get("/big", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in response.headers
+    assert orjson.loads(response.content) == payload
+
+    # large body is compressed in a worker thread
+    with patch("nas_monitor.responses.THREADPOOL_COMPRESS_SIZE", MIN_COMPRESS_SIZE), \
+            patch("nas_monitor.responses.run_in_threadpool", wraps=responses.run_in_threadpool) as threadpool:
+        response = client.get("/big", headers={"Accept-Encoding": "gzip"})
+    assert threadpool.called
+    assert response.json() == payload
+
+    response = client.get("/small", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in response.headers
@@ -0,0 +1,47 @@
+import random
+
+import pytest
+
+from nas_monitor.utils.sketch import QuantileSketch, RELATIVE_ACCURACY
+
+
+def _exact_quantile(values, q):
+    values = sorted(values)
+    return values[int(q * (len(values) - 1))]
+
+
+def test_quantiles_within_relative_accuracy():
+    rnd = random.Random(1)
+    values = [rnd.lognormvariate(3, 1) for _ in range(5000)]
+    sketch = QuantileSketch()
+    for v in values:
+        sketch.add(v)
+    for q in (0.01, 0.5, 0.95, 0.99):
+        assert sketch.quantile(q) == pytest.approx(_exact_quantile(values, q), rel=RELATIVE_ACCURACY * 1.01)
+
+
+def test_merge_equals_single_sketch():
+    values = [float(v) for v in range(-50, 200)]
+    whole, left, right = QuantileSketch(), QuantileSketch(), QuantileSketch()
+    for v in values:
+        whole.add(v)
+    for v in values[:100]:
+        left.add(v)
+    for v in values[100:]:
+        right.add(v)
+    left.merge(right)
+    assert left.count == whole.count == len(values)
+    for q in (0, 0.1, 0.2, 0.5, 0.95, 1):
+        assert left.quantile(q) == whole.quantile(q)
+
+
+def test_serialization_round_trip():
+    sketch = QuantileSketch()
+    for v in (0.0, -3.5, 1.0, 42.0, 42.0, 1e9):
+        sketch.add(v)
+    restored = QuantileSketch.from_bytes(sketch.to_bytes())
+    assert restored.count == 6
+    assert restored.zero_count == 1
+    assert restored.bins == sketch.bins
+    assert restored.negative_bins == sketch.negative_bins
+    assert QuantileSketch().quantile(0.5) is None
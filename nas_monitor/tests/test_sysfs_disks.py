@@ -0,0 +1,85 @@
+import os
+
+from nas_monitor.utils.sysfs_disks import SysfsDiskReader
+
+
+def _write(path, content):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        f.write(content)
+
+
+def _make_disk(root, name, dev, sectors, rotational, partitions=()):
+    base = root / "sys" / "block" / name
+    (base / "device").mkdir(parents=True)
+    (base / "holders").mkdir()
+    _write(base / "dev", dev + "\n")
+    _write(base / "size", f"{sectors}\n")
+    _write(base / "removable", "0\n")
+    _write(base / "queue" / "rotational", f"{int(rotational)}\n")
+    (root / "sys" / "class" / "block").mkdir(parents=True, exist_ok=True)
+    _write(root / "sys" / "class" / "block" / name, "")
+    for part_name, part_dev, part_sectors in partitions:
+        part = base / part_name
+        _write(part / "partition", "1\n")
+        _write(part / "dev", part_dev + "\n")
+        _write(part / "size", f"{part_sectors}\n")
+        (part / "holders").mkdir()
+        _write(root / "sys" / "class" / "block" / part_name, "")
+    return base
+
+
+def test_sysfs_disks(tmp_path):
+    sda = _make_disk(tmp_path, "sda", "8:0", 7814037168, True, [("sda1", "8:1", 7814035456)])
+    nvme = _make_disk(tmp_path, "nvme0n1", "259:0", 1000215216, False,
+                      [("nvme0n1p1", "259:1", 1048576), ("nvme0n1p2", "259:2", 999000000)])
+    # virtual devices and optical drives are skipped
+    (tmp_path / "sys" / "block" / "loop0").mkdir()
+    _write(_make_disk(tmp_path, "sr0", "11:0", 2097151, False) / "device" / "type", "5\n")
+    _write(tmp_path / "udev" / "b8:0", "S:disk/by-id/ata-WDC\nE:ID_MODEL=WDC_WD40EFRX\nE:ID_SERIAL_SHORT=WD-123\n")
+    _write(nvme / "device" / "serial", "S4EWNX0N\n")
+    _write(nvme / "device" / "model", "Samsung SSD 970\n")
+    _write(tmp_path / "mountinfo",
+           "22 1 259:2 / / rw,relatime shared:1 - ext4 /dev/nvme0n1p2 rw\n"
+           "30 22 259:1 / /boot/efi rw shared:2 - vfat /dev/nvme0n1p1 rw\n"
+           "31 22 8:1 / /mnt/my\\040data rw shared:3 - ext4 /dev/sda1 rw\n")
+
+    reader = SysfsDiskReader(sys_root=str(tmp_path / "sys"), mountinfo_path=str(tmp_path / "mountinfo"),
+                             udev_root=str(tmp_path / "udev"))
+    disks, kname_to_serial = reader.read()
+    by_name = {d['name']: d for d in disks}
+    assert set(by_name) == {"sda", "nvme0n1"}
+    assert by_name['sda']['type'] == "HDD"
+    assert by_name['sda']['serial'] == "WD-123"
+    assert by_name['sda']['model'] == "WDC WD40EFRX"
+    assert by_name['sda']['size'] == 7814037168 * 512
+    assert by_name['sda']['partitions'][0]['mountpoint'] == "/mnt/my data"
+    assert by_name['nvme0n1']['type'] == "NVMe"
+    assert by_name['nvme0n1']['serial'] == "S4EWNX0N"
+    assert [p['mountpoint'] for p in by_name['nvme0n1']['partitions']] == ["/boot/efi", "/"]
+    assert kname_to_serial['nvme0n1p2'] == "S4EWNX0N"
+    assert kname_to_serial['sda1'] == "WD-123"
+
+    # identity is cached by device number, layout is re-read only when devices change
+    _write(nvme / "device" / "serial", "CHANGED\n")
+    disks, _ = reader.read()
+    assert {d['name']: d['serial'] for d in disks}['nvme0n1'] == "S4EWNX0N"
+    _make_disk(tmp_path, "sdb", "8:16", 100, True)
+    disks, _ = reader.read()
+    assert {d['name'] for d in disks} == {"sda", "sdb", "nvme0n1"}
+
+
+def test_sysfs_disk_swapped_under_same_name(tmp_path):
+    sdb = _make_disk(tmp_path, "sdb", "8:16", 100, True)
+    _write(sdb / "device" / "wwid", "naa.5000c500a1\n")
+    _write(sdb / "device" / "serial", "OLD\n")
+    reader = SysfsDiskReader(sys_root=str(tmp_path / "sys"), mountinfo_path=str(tmp_path / "mountinfo"),
+                             udev_root=str(tmp_path / "udev"))
+    assert [d['serial'] for d in reader.read()[0]] == ["OLD"]
+
+    # replacement disk gets the same name and device number
+    _write(sdb / "device" / "wwid", "naa.5000c500b2\n")
+    _write(sdb / "device" / "serial", "NEW\n")
+    disks, kname_to_serial = reader.read()
+    assert [d['serial'] for d in disks] == ["NEW"]
+    assert kname_to_serial['sdb'] == "NEW"
@@ -0,0 +1,81 @@
+from nas_monitor.utils.zfs_probe import parse_zpool_status, parse_zfs_list, device_pool_map, disk_kname
+
+ZPOOL_STATUS = """\
+  pool: tank
+ state: DEGRADED
+status: One or more devices could not be used because the label is missing or
+\tinvalid.
+  scan: scrub repaired 0B in 05:12:01 with 0 errors on Sun Oct 12 05:36:02 2025
+config:
+
+\tNAME                STATE     READ WRITE CKSUM
+\ttank                DEGRADED     0     0     0
+\t  raidz2-0          DEGRADED     0     0     0
+\t    /dev/sda1       ONLINE       0     0     0
+\t    /dev/sdb1       ONLINE       0     0     0
+\t    replacing-2     DEGRADED     0     0     0
+\t      /dev/sdc1     UNAVAIL      0     0     0
+\t      /dev/sdd1     ONLINE       0     0     0
+\tlogs
+\t  mirror-1          ONLINE       0     0     0
+\t    /dev/nvme0n1p1  ONLINE       0     0     0
+\t    /dev/nvme1n1p1  ONLINE       0     0     0
+\tcache
+\t  /dev/nvme0n1p2    ONLINE       0     0     0
+\tspares
+\t  /dev/sde1         AVAIL
+
+errors: No known data errors
+
+  pool: fast
+ state: ONLINE
+config:
+
+\tNAME              STATE     READ WRITE CKSUM
+\tfast              ONLINE       0     0     0
+\t  /dev/nvme2n1    ONLINE       0     0     0
+
+errors: No known data errors
+"""
+
+ZFS_LIST = "tank\t1099511627776\t3298534883328\nfast\t0\t0\n"
+
+
+def test_parse_zpool_status():
+    pools = parse_zpool_status(ZPOOL_STATUS)
+    assert set(pools) == {"tank", "fast"}
+    tank = pools["tank"]
+    assert tank.state == "DEGRADED"
+    assert [(v.name, v.type, v.role) for v in tank.vdevs] == [
+        ("raidz2-0", "raidz2", "data"),
+        ("mirror-1", "mirror", "logs"),
+        ("/dev/nvme0n1p2", "disk", "cache"),
+        ("/dev/sde1", "disk", "spares"),
+    ]
+    assert [d.name for d in tank.vdevs[0].devices] == ["sda1", "sdb1", "sdc1", "sdd1"]
+    assert tank.vdevs[0].devices[2].state == "UNAVAIL"
+    assert [d.disk_name for d in tank.vdevs[1].devices] == ["nvme0n1", "nvme1n1"]
+    fast = pools["fast"]
+    assert [(v.type, v.devices[0].path) for v in fast.vdevs] == [("disk", "/dev/nvme2n1")]
+
+
+def test_usage_and_serials():
+    pools = parse_zpool_status(ZPOOL_STATUS)
+    for name, (used, avail) in parse_zfs_list(ZFS_LIST).items():
+        pools[name].used_bytes, pools[name].avail_bytes = used, avail
+    usage = pools["tank"].usage()
+    assert usage['total_gb'] == 4096 and usage['percent'] == 25.0
+    assert pools["fast"].usage()['percent'] == 0
+    kname_to_serial = {"sda": "SN-A", "sda1": "SN-A", "sdb1": "SN-B", "nvme0n1": "SN-N0"}
+    assert pools["tank"].serials(kname_to_serial) == ["SN-A", "SN-B", "SN-N0"]
+
+
+def test_device_pool_map():
+    mapping = device_pool_map(parse_zpool_status(ZPOOL_STATUS))
+    assert mapping["/dev/sda"] == "tank"
+    assert mapping["sdd1"] == "tank"
+    assert mapping["/dev/nvme0"] == "tank"
+    assert mapping["/dev/nvme2n1"] == "fast"
+    assert disk_kname("nvme0n1p3") == "nvme0n1"
+    assert disk_kname("sdab12") == "sdab"
+    assert disk_kname("nvme0n1") == "nvme0n1"
@@ -0,0 +1,93 @@
+import asyncio
+import os
+import shutil
+import sys
+
+from nas_monitor.collectors import ARCCollector, ZFSIOCollector
+from nas_monitor.utils import disk_utils
+from nas_monitor.utils.zfs_stats import ArcStats, ZpoolIostatStream, parse_iostat_line
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+
+
+def test_arc_stats(tmp_path):
+    path = tmp_path / "arcstats"
+    shutil.copy(os.path.join(FIXTURES, "arcstats"), path)
+    arc = ArcStats(str(path))
+    assert arc.available
+    summary = arc.summary()
+    assert summary["size_gb"] == 6.0
+    assert summary["max_gb"] == 16.0
+    assert summary["mfu_gb"] == 3.0
+    # ratios need two reads
+    assert "hit_ratio" not in summary
+
+    path.write_text(path.read_text().replace("1000", "1900").replace("250", "350"))
+    summary = arc.summary()
+    assert summary["hit_ratio"] == 90.0
+    # no L2ARC lookups
+    assert "l2_hit_ratio" not in summary
+    assert not ArcStats(str(tmp_path / "missing")).available
+
+
+def test_parse_iostat_line():
+    name, sample = parse_iostat_line("nvme0n1\t10\t90\t0\t30\t0\t122880\t-\t20000\t-\t15000\t-\t-\t-\t-\t-\t-\n")
+    assert name == "nvme0n1"
+    assert sample.write_ops == 30 and sample.write_bytes == 122880
+    assert sample.read_wait_ns is None and sample.write_wait_ns == 20000
+    assert parse_iostat_line("logs\t-\t-\t-\t-\t-\t-\t-\t-\n") is None
+    assert parse_iostat_line("garbage") is None
+
+
+def test_iostat_stream_with_stand_in():
+    async def run():
+        stream = ZpoolIostatStream(command=[sys.executable, os.path.join(FIXTURES, "fake_zpool_iostat.py")])
+        await stream.ensure(["tank", "backup"], interval=1)
+        assert stream.running
+        for _ in range(100):
+            latest = stream.latest(max_age=10)
+            if "backup" in latest:
+                break
+            await asyncio.sleep(0.05)
+        # same pools: the running process is kept
+        proc = stream._proc
+        await stream.ensure(["backup", "tank"], interval=1)
+        assert stream._proc is proc
+        await stream.stop()
+        assert not stream.running
+        return latest
+
+    latest = asyncio.run(run())
+    assert set(latest) == {"tank", "backup"}
+    # vdev and member lines after a pool line belong to that pool, section headers are skipped
+    assert set(latest["tank"]) == {"tank", "mirror-0", "sda", "sdb", "nvme0n1"}
+    assert latest["backup"]["backup"].read_wait_ns == 2000000
+
+
+def test_zfs_collectors(monkeypatch):
+    async def snapshot():
+        raise AssertionError("the 10 s job reuses pool names of the last snapshot")
+
+    stream = ZpoolIostatStream(command=[sys.executable, os.path.join(FIXTURES, "fake_zpool_iostat.py")])
+    monkeypatch.setattr(disk_utils.disk_snapshot, "get", snapshot)
+    monkeypatch.setattr(disk_utils.disk_snapshot, "_data", {"zfs_pools": [{"name": "tank"}, {"name": "backup"}]})
+    monkeypatch.setattr("nas_monitor.collectors.zpool_iostat", stream)
+    monkeypatch.setattr("nas_monitor.collectors.arc_stats", ArcStats(os.path.join(FIXTURES, "arcstats")))
+
+    async def run():
+        collector = ZFSIOCollector()
+        await collector.collect()
+        for _ in range(100):
+            await asyncio.sleep(0.05)
+            if "backup" in stream.latest(max_age=10):
+                break
+        metrics = await collector.collect()
+        await stream.stop()
+        return metrics + await ARCCollector().collect()
+
+    values = {(m.device_name, m.label): m.value for m in asyncio.run(run())}
+    assert values["tank", "read_speed"] == 1024
+    assert values["tank", "write_await_ms"] == 1.5
+    assert values["tank", "mirror-0.write_iops"] == 20
+    assert ("backup", "write_await_ms") not in values
+    assert values["arc", "size_gb"] == 6.0
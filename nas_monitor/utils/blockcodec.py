@@ -0,0 +1,84 @@
+import struct
+import zlib
+from typing import Iterable, Tuple
+
+import numpy as np
+
+_FORMAT_VERSION = 1
+_HEADER = struct.Struct("<BBIqq")  # version, delta-of-delta width, count, first ts, first delta
+_COMPRESS_LEVEL = 6
+
+
+def _shuffle(array: np.ndarray) -> bytes:
+    """Byte planes one after another: the equal high bytes of small numbers form long runs"""
+    return array.view(np.uint8).reshape(len(array), array.itemsize).T.tobytes()
+
+
+def _unshuffle(buffer: bytes, dtype: np.dtype, count: int) -> np.ndarray:
+    planes = np.frombuffer(buffer, dtype=np.uint8, count=count * dtype.itemsize)
+    return planes.reshape(dtype.itemsize, count).T.copy().view(dtype).ravel()
+
+
+def encode_block(ts: np.ndarray, values: np.ndarray) -> bytes:
+    """
+    Compress samples of one series ordered by time (Gorilla-style, byte aligned).
+
+    Timestamps are stored as delta-of-delta: a regular collector interval gives zeros.
+    Values are stored as XOR of the float64 bits with the previous value: an unchanged value
+    gives zeros, a small change gives zero high bytes. Both streams are byte shuffled
+    and deflated, so the decoder is a few numpy operations instead of a bit-by-bit loop.
+    """
+    ts = np.ascontiguousarray(ts, dtype=np.int64)
+    bits = np.ascontiguousarray(values, dtype="<f8").view("<u8")
+    count = len(ts)
+    if not count or len(bits) != count:
+        raise ValueError("Block needs the same non-zero number of timestamps and values")
+    deltas = np.diff(ts)
+    dod = np.diff(deltas)
+    width = 4 if not len(dod) or (dod.min() >= -2 ** 31 and dod.max() < 2 ** 31) else 8
+    xor = bits.copy()
+    xor[1:] ^= bits[:-1]
+    header = _HEADER.pack(_FORMAT_VERSION, width, count, int(ts[0]), int(deltas[0]) if len(deltas) else 0)
+    payload = _shuffle(dod.astype(f"<i{width}")) + _shuffle(xor)
+    return header + zlib.compress(payload, _COMPRESS_LEVEL)
+
+
+def decode_block(data: bytes) -> Tuple[np.ndarray, np.ndarray]:
+    """Timestamps (int64) and values (float64) of a block made by encode_block()"""
+    version, width, count, first_ts, first_delta = _HEADER.unpack_from(data)
+    if version != _FORMAT_VERSION:
+        raise ValueError(f"Unsupported block format version {version}")
+    payload = zlib.decompress(memoryview(data)[_HEADER.size:])
+    dod_count = max(count - 2, 0)
+    dod_size = dod_count * width
+    dod = _unshuffle(payload[:dod_size], np.dtype(f"<i{width}"), dod_count).astype(np.int64)
+    bits = _unshuffle(payload[dod_size:], np.dtype("<u8"), count)
+
+    ts = np.empty(count, dtype=np.int64)
+    ts[0] = first_ts
+    if count > 1:
+        deltas = np.empty(count - 1, dtype=np.int64)
+        deltas[0] = first_delta
+        np.cumsum(dod, out=deltas[1:])
+        deltas[1:] += first_delta
+        np.cumsum(deltas, out=ts[1:])
+        ts[1:] += first_ts
+    values = np.bitwise_xor.accumulate(bits).view("<f8")
+    return ts, values
+
+
+def decode_blocks(blocks: Iterable[bytes]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Decode blocks into concatenated arrays.
+    Returns (block index of every sample, timestamps, values).
+    """
+    decoded = [decode_block(data) for data in blocks]
+    if not decoded:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64)
+    counts = [len(ts) for ts, _ in decoded]
+    index = np.repeat(np.arange(len(decoded), dtype=np.int64), counts)
+    return (
+        index,
+        np.concatenate([ts for ts, _ in decoded]),
+        np.concatenate([values for _, values in decoded])
+    )
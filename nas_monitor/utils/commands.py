@@ -0,0 +1,42 @@
+import asyncio
+import logging
+import shutil
+from functools import cache
+from typing import List, Optional
+
+from nas_monitor.config import config
+
+
+async def run_cmd(args: List[str], timeout: Optional[float] = None) -> str:
+    """
+    Run a system command asynchronously and return stdout.
+    The command is killed after timeout seconds (DISK_PROBE_TIMEOUT by default), empty string is returned.
+    """
+    timeout = timeout or config.DISK_PROBE_TIMEOUT
+    try:
+        proc = await asyncio.create_subprocess_exec(
+            *args,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE
+        )
+        try:
+            stdout, stderr = await asyncio.wait_for(proc.communicate(), timeout)
+        except asyncio.TimeoutError:
+            proc.kill()
+            await proc.wait()
+            logging.warning('Command timed out after %ss: %s', timeout, ' '.join(args))
+            return ""
+        if proc.returncode != 0:
+            # Some tools might return non-zero but still have useful output (like smartctl)
+            # We'll just return stdout for now and let the parser handle it
+            pass
+        return stdout.decode().strip()
+    except Exception as e:
+        # logging.debug(f"Error running {' '.join(args)}: {e}")
+        return ""
+
+
+@cache
+def is_tool_available(name: str) -> bool:
+    """Check if a command-line tool is available."""
+    return shutil.which(name) is not None
@@ -2,39 +2,32 @@ import asyncio
 import json
 import logging
 import os
-from functools import cache 
-import shutil
+import time
 from typing import Dict, List, Optional, Any
 
-
-async def run_cmd(args: List[str]) -> str:
-    """Run a system command asynchronously and return stdout."""
-    try:
-        proc = await asyncio.create_subprocess_exec(
-            *args,
-            stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.PIPE
-        )
-        stdout, stderr = await proc.communicate()
-        if proc.returncode != 0:
-            # Some tools might return non-zero but still have useful output (like smartctl)
-            # We'll just return stdout for now and let the parser handle it
-            pass
-        return stdout.decode().strip()
-    except Exception as e:
-        # logging.debug(f"Error running {' '.join(args)}: {e}")
-        return ""
-
-@cache
-def is_tool_available(name: str) -> bool:
-    """Check if a command-line tool is available."""
-    return shutil.which(name) is not None
+from nas_monitor.config import config
+from nas_monitor.utils.commands import run_cmd, is_tool_available
+from nas_monitor.utils.sysfs_disks import sysfs_disks
+from nas_monitor.utils.zfs_probe import probe_zfs
 
 
 async def get_physical_disks() -> List[Dict[str, Any]]:
+    """
+    Get list of physical disks and their basic info.
+    Read from sysfs when available (no subprocess), lsblk otherwise.
+    """
+    if sysfs_disks.available:
+        try:
+            return sysfs_disks.read()
+        except OSError as e:
+            logging.warning('Failed to read disks from sysfs, using lsblk: %s', e)
+    return await get_physical_disks_lsblk()
+
+
+async def get_physical_disks_lsblk() -> List[Dict[str, Any]]:
     """Get list of physical disks and their basic info using lsblk."""
     if not is_tool_available("lsblk"):
-        return []
+        return [], {}
 
     # Get all block devices to build a mapping from partition/kname to serial
     cmd = ["lsblk", "-J", "-b", "-o", "NAME,TYPE,ROTA,TRAN,SIZE,MOUNTPOINT,SERIAL,MODEL,KNAME,PKNAME"]
@@ -124,18 +117,32 @@ async def get_disk_usage(path: str) -> Dict[str, float]:
         return {}
 
 
-async def get_smart_info(device_path: str) -> Dict[str, Any]:
-    """Get SMART data for a device using smartctl."""
+def _is_standby(data: Dict[str, Any]) -> bool:
+    """smartctl -n standby did not wake the drive and returned no data"""
+    messages = data.get("smartctl", {}).get("messages", [])
+    return any("STANDBY" in m.get("string", "").upper() or "SLEEP" in m.get("string", "").upper()
+               for m in messages)
+
+
+async def get_smart_info(device_path: str, skip_standby: bool = False) -> Optional[Dict[str, Any]]:
+    """
+    Get SMART data for a device using smartctl.
+    With skip_standby sleeping drives are not woken up (smartctl -n standby), None is returned for them.
+    """
     if not is_tool_available("smartctl"):
         return {}
 
-    cmd = ["smartctl", "-a", "-j", device_path]
-    output = await run_cmd(cmd)
+    cmd = ["smartctl", "-a", "-j"]
+    if skip_standby:
+        cmd += ["-n", "standby"]
+    output = await run_cmd(cmd + [device_path])
     if not output:
         return {}
 
     try:
         data = json.loads(output)
+        if skip_standby and _is_standby(data):
+            return None
         
         # Temperature search
         temp = data.get("temperature", {}).get("current")
@@ -224,73 +231,72 @@ async def get_zfs_pools() -> List[Dict[str, Any]]:
     return pools
 
 
-async def get_zfs_pool_disks(pool_name: str, kname_to_serial: Dict[str, str]) -> List[str]:
-    """Get serial numbers of disks in a ZFS pool."""
-    if not is_tool_available("zpool"):
-        return []
-
-    # zpool status -L <pool> shows actual device names if possible
-    cmd = ["zpool", "status", "-L", pool_name]
-    output = await run_cmd(cmd)
-    if not output:
-        return []
+async def _run_probes(probes: Dict[str, Any], latency: Dict[str, float], default: Any = None) -> Dict[str, Any]:
+    """
+    Run probe coroutines concurrently, at most DISK_PROBE_CONCURRENCY at once.
+    Returns {probe_name: result}, default for a failed probe. Wall time of every probe goes to latency.
+    """
+    semaphore = asyncio.Semaphore(config.DISK_PROBE_CONCURRENCY)
+
+    async def run(name, coro):
+        async with semaphore:
+            start = time.monotonic()
+            try:
+                return await coro
+            except Exception as e:
+                logging.warning('Disk probe %s failed: %s', name, e)
+                return default
+            finally:
+                latency[name] = round(time.monotonic() - start, 3)
+
+    results = await asyncio.gather(*(run(name, coro) for name, coro in probes.items()))
+    return dict(zip(probes, results))
+
+
+# Last known SMART data by device path, kept while the drive sleeps
+smart_cache: Dict[str, Dict[str, Any]] = {}
+
+
+async def collect_smart_info(disks: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Read SMART data of all disks concurrently without waking sleeping drives.
+    Fresh data goes to smart_cache; sleeping drives keep their last known values.
+    Returns {"smart": {path: data}, "standby": [paths], "probe_latency": {probe: seconds}}
+    where smart contains only the drives actually read.
+    """
+    latency = {}
+    probes = {disk['kname']: get_smart_info(disk['kname'], skip_standby=True) for disk in disks}
+    results = await _run_probes(probes, latency, default={})
+    fresh = {}
+    standby = []
+    for path, info in results.items():
+        if info is None:
+            standby.append(path)
+        elif info:
+            fresh[path] = smart_cache[path] = info
+    if latency:
+        slowest = max(latency, key=latency.get)
+        logging.debug('SMART probes: %s, %s in standby, slowest %s %ss',
+                      len(latency), len(standby), slowest, latency[slowest])
+    return {"smart": fresh, "standby": standby, "probe_latency": latency}
 
-    # Extract device names (e.g., sda, nvme0n1, sda1, nvme0n1p3)
-    import re
-    # Match various forms: sda, sda1, nvme0n1, nvme0n1p3
-    dev_names = re.findall(r'\b(sd[a-z]+[0-9]*|nvme[0-9]+n[0-9]+(?:p[0-9]+)?)\b', output)
-    
-    unique_names = list(set(dev_names))
-    serials = []
-    
-    for dev in unique_names:
-        # Use the mapping we built from lsblk
-        sn = kname_to_serial.get(dev)
-        if sn:
-            serials.append(sn)
-            
-    return sorted(list(set(serials)))
-
-
-async def get_zfs_pool_real_usage(pool_name: str) -> Dict[str, Any]:
-    """Get real space usage of a ZFS pool (usable space, not raw pool size)."""
-    if not is_tool_available("zfs"):
-        return {}
-
-    # zfs list -H -p -o name,used,avail,refer
-    # Only for the root dataset of the pool
-    cmd = ["zfs", "list", "-H", "-p", "-o", "name,used,avail", pool_name]
-    output = await run_cmd(cmd)
-    if not output:
-        return {}
-
-    parts = output.strip().split()
-    if len(parts) >= 3:
-        name, used, avail = parts
-        used_b = int(used)
-        avail_b = int(avail)
-        total_b = used_b + avail_b
-        return {
-            "used_bytes": used_b,
-            "avail_bytes": avail_b,
-            "total_bytes": total_b,
-            "used_gb": round(used_b / (1024**3), 2),
-            "total_gb": round(total_b / (1024**3), 2),
-            "percent": round((used_b / total_b * 100), 1) if total_b > 0 else 0
-        }
-    return {}
 
 async def collect_all_disk_info():
-    """Main collector function that aggregates all data."""
-    disks, kname_to_serial = await get_physical_disks()
-    
-    # ZFS Info first to map disks to pools
-    pools = await get_zfs_pools()
+    """
+    Main collector function that aggregates all data.
+    SMART data is taken from smart_cache, filled by collect_smart_info() on its own cadence.
+    """
+    # ZFS Info first to map disks to pools: the same commands for any number of pools
+    (disks, kname_to_serial), pools, zfs = await asyncio.gather(
+        get_physical_disks(), get_zfs_pools(), probe_zfs()
+    )
+
     zfs_serials = {} # serial -> pool_name
     pool_usage_map = {} # pool_name -> real_usage
     for pool in pools:
-        pool['real_usage'] = await get_zfs_pool_real_usage(pool['name'])
-        pool['disks'] = await get_zfs_pool_disks(pool['name'], kname_to_serial)
+        probed = zfs.get(pool['name'])
+        pool['real_usage'] = probed.usage() if probed else {}
+        pool['disks'] = probed.serials(kname_to_serial) if probed else []
         pool_usage_map[pool['name']] = pool['real_usage']
         for sn in pool['disks']:
             if sn:
@@ -298,8 +304,8 @@ async def collect_all_disk_info():
 
     # Enrich disks with SMART and usage
     for disk in disks:
-        # SMART
-        disk['smart'] = await get_smart_info(disk['kname'])
+        # SMART (last known values)
+        disk['smart'] = smart_cache.get(disk['kname'], {})
         
         # Check if part of ZFS
         pool_name = zfs_serials.get(disk['serial'])
@@ -361,9 +367,59 @@ async def collect_all_disk_info():
         "zfs_pools": pools
     }
 
+class DiskInfoSnapshot:
+    """
+    Shared result of collect_all_disk_info() for all consumers (storage and ZFS collectors).
+    Result is reused while younger than ttl seconds. Collection is single-flight:
+    callers arriving while it runs await the same in-flight collection instead of starting another one,
+    so lsblk/zpool/zfs/smartctl are executed once per cycle.
+    """
+
+    def __init__(self, ttl: float, collect=collect_all_disk_info):
+        self.ttl = ttl
+        self._collect = collect
+        self._data: Optional[Dict[str, Any]] = None
+        self._collected_at = 0.0
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def age(self) -> float:
+        return time.monotonic() - self._collected_at
+
+    async def get(self) -> Dict[str, Any]:
+        if self._data is not None and self.age < self.ttl:
+            return self._data
+        if self._task is None:
+            self._task = asyncio.create_task(self._refresh())
+        # shield: a cancelled caller must not cancel the collection for the others
+        return await asyncio.shield(self._task)
+
+    async def _refresh(self) -> Dict[str, Any]:
+        try:
+            data = await self._collect()
+            self._data = data
+            self._collected_at = time.monotonic()
+            return data
+        finally:
+            self._task = None
+
+    def last(self) -> Optional[Dict[str, Any]]:
+        """Last collected result whatever its age, without collecting; None before the first collection"""
+        return self._data
+
+    def invalidate(self):
+        self._data = None
+
+
+disk_snapshot = DiskInfoSnapshot(ttl=config.DISK_SNAPSHOT_TTL)
+
+
 async def main():
     print("--- Disk & ZFS Information Collector ---")
     data = await collect_all_disk_info()
+    await collect_smart_info(data['disks'])
+    for d in data['disks']:
+        d['smart'] = smart_cache.get(d['kname'], {})
     
     print("\n[ Physical Disks ]")
     for d in data['disks']:
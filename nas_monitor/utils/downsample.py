@@ -0,0 +1,43 @@
+import numpy as np
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets downsampling.
+    Returns indices of the points to keep (first and last are always kept).
+
+    x must be sorted. Bucket bounds and next-bucket averages are computed for all
+    buckets at once; only the choice of the point in each bucket is sequential,
+    because it depends on the point chosen in the previous bucket.
+    """
+    size = len(x)
+    if threshold >= size or threshold < 3:
+        return np.arange(size)
+
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+
+    # bounds of threshold - 2 inner buckets over points 1..size-2
+    bounds = (np.arange(threshold - 1) * ((size - 2) / (threshold - 2))).astype(np.int64) + 1
+    bounds[-1] = size - 1
+    starts = bounds[:-1]
+    counts = bounds[1:] - starts
+
+    # averages of every bucket, the last point acts as the bucket after the last one
+    avg_x = np.append(np.add.reduceat(x[:-1], starts) / counts, x[-1])
+    avg_y = np.append(np.add.reduceat(y[:-1], starts) / counts, y[-1])
+
+    result = np.empty(threshold, dtype=np.int64)
+    result[0] = 0
+    result[-1] = size - 1
+    a = 0
+    for i in range(threshold - 2):
+        start, end = starts[i], bounds[i + 1]
+        next_x, next_y = avg_x[i + 1], avg_y[i + 1]
+        areas = np.abs(
+            (x[a] - next_x) * (y[start:end] - y[a])
+            - (x[a] - x[start:end]) * (next_y - y[a])
+        )
+        a = start + int(np.argmax(areas))
+        result[i + 1] = a
+    return result
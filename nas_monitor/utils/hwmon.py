@@ -0,0 +1,131 @@
+import logging
+import os
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+# Preferred CPU sensor chips, in order
+CPU_CHIPS = ['coretemp', 'k10temp', 'cpu_thermal', 'soc_thermal']
+# Substrings of chip names of memory sensors (jc42 is a common RAM temp sensor driver)
+RAM_CHIPS = ['dimm', 'mem', 'acpitz', 'pch_', 'jc42', 'gigabyte']
+# Rediscovery is not attempted more often than this when a group has no sensors
+REDISCOVER_SECONDS = 60
+
+# {chip name: [(label, input path)]}
+Chips = Dict[str, List[Tuple[str, str]]]
+
+
+def select_cpu(chips: Chips) -> List[str]:
+    """Package sensor of the first known CPU chip (or its first sensor)"""
+    for name in CPU_CHIPS:
+        entries = chips.get(name)
+        if not entries:
+            continue
+        for label, path in entries:
+            if label.startswith('Package') or label == '':
+                return [path]
+        return [entries[0][1]]
+    return []
+
+
+def select_ram(chips: Chips) -> List[str]:
+    """All sensors of memory-related chips"""
+    return [
+        path
+        for name, entries in chips.items()
+        if any(x in name.lower() for x in RAM_CHIPS)
+        for _, path in entries
+    ]
+
+
+SELECTORS: Dict[str, Callable[[Chips], List[str]]] = {
+    "cpu": select_cpu,
+    "ram": select_ram,
+}
+
+
+class HwmonSensors:
+    """
+    Registry of the few hwmon temperature inputs the collectors need.
+
+    Chips are discovered once and the selected temp*_input files are kept open,
+    so a tick costs one pread() per sensor instead of walking /sys/class/hwmon.
+    Discovery is repeated when a read fails (hotplug, driver reload) and, at most
+    every REDISCOVER_SECONDS, while a group has no sensors at all.
+    """
+
+    def __init__(self, root: str = "/sys/class/hwmon"):
+        self.root = root
+        # {group: [(path, fd)]}
+        self._groups: Dict[str, List[Tuple[str, int]]] = {}
+        self._discovered_at: Optional[float] = None
+
+    def discover(self) -> Chips:
+        chips: Chips = {}
+        try:
+            entries = sorted(os.listdir(self.root))
+        except OSError:
+            return chips
+        for entry in entries:
+            path = os.path.join(self.root, entry)
+            try:
+                with open(os.path.join(path, "name")) as f:
+                    name = f.read().strip()
+                files = sorted(os.listdir(path))
+            except OSError:
+                continue
+            sensors = chips.setdefault(name, [])
+            for file in files:
+                if not (file.startswith("temp") and file.endswith("_input")):
+                    continue
+                label = ""
+                try:
+                    with open(os.path.join(path, file.replace("_input", "_label"))) as f:
+                        label = f.read().strip()
+                except OSError:
+                    pass
+                sensors.append((label, os.path.join(path, file)))
+        return chips
+
+    def close(self):
+        for sensors in self._groups.values():
+            for _, fd in sensors:
+                os.close(fd)
+        self._groups.clear()
+
+    def _open_groups(self):
+        self.close()
+        chips = self.discover()
+        for group, selector in SELECTORS.items():
+            sensors = []
+            for path in selector(chips):
+                try:
+                    sensors.append((path, os.open(path, os.O_RDONLY)))
+                except OSError:
+                    continue
+            self._groups[group] = sensors
+        self._discovered_at = time.monotonic()
+        logging.debug('hwmon sensors: %s', {group: [p for p, _ in s] for group, s in self._groups.items()})
+
+    def _read_values(self, group: str) -> List[float]:
+        values = []
+        for _, fd in self._groups.get(group, []):
+            values.append(int(os.pread(fd, 32, 0)) / 1000)
+        return values
+
+    def read(self, group: str) -> List[float]:
+        """Current temperatures (°C) of a sensor group ("cpu", "ram")"""
+        if self._discovered_at is None or (
+                not self._groups.get(group) and time.monotonic() - self._discovered_at > REDISCOVER_SECONDS):
+            self._open_groups()
+        try:
+            return self._read_values(group)
+        except (OSError, ValueError):
+            # sensor disappeared or driver was reloaded
+            self._open_groups()
+            try:
+                return self._read_values(group)
+            except (OSError, ValueError):
+                return []
+
+
+hwmon_sensors = HwmonSensors()
@@ -0,0 +1,13 @@
+from fnmatch import fnmatch
+
+from nas_monitor.config import config
+
+
+def is_monitored_nic(name: str) -> bool:
+    """
+    Interface filter shared by the network collector and the inventory:
+    NET_INCLUDE_INTERFACES (if set) and NET_EXCLUDE_INTERFACES glob patterns.
+    """
+    if config.NET_INCLUDE_INTERFACES and not any(fnmatch(name, p) for p in config.NET_INCLUDE_INTERFACES):
+        return False
+    return not any(fnmatch(name, p) for p in config.NET_EXCLUDE_INTERFACES)
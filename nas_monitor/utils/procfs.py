@@ -0,0 +1,204 @@
+import os
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+# Columns of /proc/net/dev used by NetDev.read():
+# rx bytes, packets, errs, drop, tx bytes, packets, errs, drop
+NET_DEV_COLUMNS = (0, 1, 2, 3, 8, 9, 10, 11)
+_NET_DEV_FIELDS = 16
+# Columns of /proc/diskstats used by DiskStats.read() (after major, minor, name): reads completed, merged,
+# sectors read, ms reading, writes completed, merged, sectors written, ms writing, in flight, ms doing I/O,
+# weighted ms doing I/O. Later kernels append discard and flush fields, they are not used.
+DISK_STATS_FIELDS = 11
+
+
+class ProcFile:
+    """
+    /proc file kept open: every read is a single pread() from offset 0 into a reused buffer,
+    procfs regenerates the content on each read. Reopened if the descriptor goes bad.
+    """
+
+    def __init__(self, path: str, size: int = 4096):
+        self.path = path
+        self.size = size
+        self._fd: Optional[int] = None
+
+    def read(self) -> bytes:
+        if self._fd is None:
+            self._fd = os.open(self.path, os.O_RDONLY)
+        try:
+            data = os.pread(self._fd, self.size, 0)
+        except OSError:
+            self.close()
+            self._fd = os.open(self.path, os.O_RDONLY)
+            data = os.pread(self._fd, self.size, 0)
+        while len(data) >= self.size:
+            # content did not fit, grow the buffer once and for all
+            self.size *= 2
+            data = os.pread(self._fd, self.size, 0)
+        return data
+
+    def close(self):
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+
+class CpuUsage:
+    """
+    System-wide CPU utilization from the first line of /proc/stat,
+    same formula as psutil.cpu_percent(interval=None): busy share of ticks since the previous call.
+    """
+
+    def __init__(self, root: str = "/proc"):
+        self._file = ProcFile(os.path.join(root, "stat"), size=8192)
+        self._busy, self._total = self._read_ticks()
+
+    def _read_ticks(self) -> Tuple[int, int]:
+        data = self._file.read()
+        # cpu  user nice system idle iowait irq softirq steal guest guest_nice
+        fields = data[:data.index(b"\n")].split()[1:]
+        total = 0
+        for value in fields[:8]:
+            total += int(value)
+        # guest time is already accounted in user/nice
+        idle = int(fields[3]) + int(fields[4])
+        return total - idle, total
+
+    def percent(self) -> float:
+        busy, total = self._read_ticks()
+        busy_delta = busy - self._busy
+        total_delta = total - self._total
+        self._busy, self._total = busy, total
+        if total_delta <= 0:
+            return 0.0
+        return round(max(0, busy_delta) / total_delta * 100, 1)
+
+
+class MemInfo:
+    """Total/available memory from /proc/meminfo, used and percent as in psutil.virtual_memory()"""
+
+    def __init__(self, root: str = "/proc"):
+        self._file = ProcFile(os.path.join(root, "meminfo"))
+
+    def read(self) -> Tuple[int, int, int, float]:
+        """Returns (total, available, used) in bytes and used percent"""
+        data = self._file.read()
+        total = available = free = None
+        for line in data.split(b"\n"):
+            if line.startswith(b"MemTotal:"):
+                total = int(line.split()[1]) * 1024
+            elif line.startswith(b"MemFree:"):
+                free = int(line.split()[1]) * 1024
+            elif line.startswith(b"MemAvailable:"):
+                available = int(line.split()[1]) * 1024
+                break
+        if available is None:
+            # kernels before 3.14
+            available = free or 0
+        used = total - available
+        return total, available, used, round(used / total * 100, 1) if total else 0.0
+
+
+class NetDev:
+    """
+    Per-interface byte counters from /proc/net/dev, parsed straight from bytes.
+    Interfaces are filtered by nic_filter(name) -> bool, the answer is cached per name.
+    """
+
+    def __init__(self, root: str = "/proc", nic_filter: Callable[[str], bool] = None):
+        self._file = ProcFile(os.path.join(root, "net", "dev"))
+        self._filter = nic_filter or (lambda name: True)
+        self._accepted: Dict[bytes, Optional[str]] = {}
+
+    def _name(self, raw: bytes) -> Optional[str]:
+        """Decoded name for accepted interfaces, None for filtered ones"""
+        if raw not in self._accepted:
+            name = raw.decode()
+            self._accepted[raw] = name if self._filter(name) else None
+        return self._accepted[raw]
+
+    def read(self) -> Tuple[List[str], np.ndarray]:
+        """
+        Names of accepted interfaces and their counters as (n, 8) int64 array, NET_DEV_COLUMNS order.
+        All numbers are parsed in one pass by numpy.
+        """
+        names = []
+        rows = []
+        # two header lines
+        for line in self._file.read().split(b"\n")[2:]:
+            raw, sep, rest = line.partition(b":")
+            if not sep:
+                continue
+            name = self._name(raw.strip())
+            if name is None:
+                continue
+            names.append(name)
+            rows.append(rest)
+        values = np.fromstring(b" ".join(rows), dtype=np.int64, sep=" ") if rows else np.empty(0, dtype=np.int64)
+        return names, values.reshape(-1, _NET_DEV_FIELDS)[:, NET_DEV_COLUMNS]
+
+    def totals(self) -> Tuple[int, int]:
+        """(bytes_sent, bytes_recv) summed over accepted interfaces"""
+        _, counters = self.read()
+        return int(counters[:, 4].sum()), int(counters[:, 0].sum())
+
+
+class DiskStats:
+    """
+    Block device I/O counters from /proc/diskstats for the requested kernel names
+    (whole disks, "sda", "nvme0n1"), one read for all disks.
+    """
+
+    def __init__(self, root: str = "/proc"):
+        self._file = ProcFile(os.path.join(root, "diskstats"), size=16384)
+
+    def read(self, knames: Set[str]) -> Tuple[List[str], np.ndarray]:
+        """Names of found disks and their counters as (n, DISK_STATS_FIELDS) int64 array"""
+        names = []
+        rows = []
+        for line in self._file.read().split(b"\n"):
+            fields = line.split()
+            if len(fields) < 3 + DISK_STATS_FIELDS:
+                continue
+            name = fields[2].decode()
+            if name not in knames:
+                continue
+            names.append(name)
+            rows.append(b" ".join(fields[3:3 + DISK_STATS_FIELDS]))
+        values = np.fromstring(b" ".join(rows), dtype=np.int64, sep=" ") if rows else np.empty(0, dtype=np.int64)
+        return names, values.reshape(-1, DISK_STATS_FIELDS)
+
+
+def align_counters(prev_names: List[str], prev_counters: np.ndarray,
+                   names: List[str], counters: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Previous counters reordered to match current rows, and mask of rows present in both reads.
+    Rows of new devices are copies of current values (zero delta), the mask excludes them.
+    """
+    if names == prev_names:
+        return prev_counters, np.ones(len(names), dtype=bool)
+    index = {name: i for i, name in enumerate(prev_names)}
+    previous = counters.copy()
+    seen = np.zeros(len(names), dtype=bool)
+    for i, name in enumerate(names):
+        j = index.get(name)
+        if j is not None:
+            previous[i] = prev_counters[j]
+            seen[i] = True
+    return previous, seen
+
+
+def counter_deltas(previous: np.ndarray, current: np.ndarray) -> np.ndarray:
+    """
+    Increments of monotonic kernel counters between two reads.
+    A decrease is either a wrap of a 32-bit counter (previous value was in the upper half
+    of the 32-bit range) or a reset (interface/driver re-created), then the counter counts from zero.
+    """
+    deltas = current - previous
+    negative = deltas < 0
+    if negative.any():
+        wrapped = negative & (previous >= 2 ** 31) & (previous < 2 ** 32)
+        deltas = np.where(wrapped, current + 2 ** 32 - previous, np.where(negative, current, deltas))
+    return deltas
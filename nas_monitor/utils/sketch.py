@@ -0,0 +1,98 @@
+import math
+import struct
+from typing import Dict, Optional
+
+# Relative error of returned quantiles
+RELATIVE_ACCURACY = 0.01
+# Values closer to zero than this are counted as zero
+MIN_INDEXABLE_VALUE = 1e-9
+
+_FORMAT_VERSION = 1
+_HEADER = struct.Struct("<BHHI")  # version, positive bins, negative bins, zero count
+
+
+class QuantileSketch:
+    """
+    Mergeable quantile sketch with relative accuracy guarantee (DDSketch).
+
+    Values are counted in logarithmically spaced bins, so any quantile is returned
+    within RELATIVE_ACCURACY of the real value, and two sketches are merged
+    by adding bin counts. Serialized form is a few bytes per used bin.
+    """
+
+    gamma = (1 + RELATIVE_ACCURACY) / (1 - RELATIVE_ACCURACY)
+    _log_gamma = math.log(gamma)
+
+    def __init__(self):
+        self.bins: Dict[int, int] = {}
+        self.negative_bins: Dict[int, int] = {}
+        self.zero_count = 0
+        self.count = 0
+
+    def _key(self, value: float) -> int:
+        # keys are stored as int16
+        return min(math.ceil(math.log(value) / self._log_gamma), 32767)
+
+    def _value(self, key: int) -> float:
+        return 2 * self.gamma ** key / (self.gamma + 1)
+
+    def add(self, value: float, count: int = 1):
+        if value > MIN_INDEXABLE_VALUE:
+            key = self._key(value)
+            self.bins[key] = self.bins.get(key, 0) + count
+        elif value < -MIN_INDEXABLE_VALUE:
+            key = self._key(-value)
+            self.negative_bins[key] = self.negative_bins.get(key, 0) + count
+        else:
+            self.zero_count += count
+        self.count += count
+
+    def merge(self, other: "QuantileSketch"):
+        for key, count in other.bins.items():
+            self.bins[key] = self.bins.get(key, 0) + count
+        for key, count in other.negative_bins.items():
+            self.negative_bins[key] = self.negative_bins.get(key, 0) + count
+        self.zero_count += other.zero_count
+        self.count += other.count
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Value at quantile q (0..1), None for empty sketch"""
+        if not self.count:
+            return None
+        rank = q * (self.count - 1)
+        seen = 0
+        # from the most negative to the most positive value
+        for key in sorted(self.negative_bins, reverse=True):
+            seen += self.negative_bins[key]
+            if seen > rank:
+                return -self._value(key)
+        seen += self.zero_count
+        if seen > rank:
+            return 0.0
+        for key in sorted(self.bins):
+            seen += self.bins[key]
+            if seen > rank:
+                return self._value(key)
+        return self._value(max(self.bins)) if self.bins else 0.0
+
+    def to_bytes(self) -> bytes:
+        parts = [_HEADER.pack(_FORMAT_VERSION, len(self.bins), len(self.negative_bins), self.zero_count)]
+        for bins in (self.bins, self.negative_bins):
+            keys = sorted(bins)
+            parts.append(struct.pack(f"<{len(keys)}h{len(keys)}I", *keys, *(bins[k] for k in keys)))
+        return b"".join(parts)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "QuantileSketch":
+        sketch = cls()
+        version, n_pos, n_neg, zero_count = _HEADER.unpack_from(data)
+        if version != _FORMAT_VERSION:
+            raise ValueError(f"Unsupported sketch version: {version}")
+        offset = _HEADER.size
+        for bins, size in ((sketch.bins, n_pos), (sketch.negative_bins, n_neg)):
+            values = struct.unpack_from(f"<{size}h{size}I", data, offset)
+            bins.update(zip(values[:size], values[size:]))
+            offset += size * 6
+        sketch.zero_count = zero_count
+        sketch.count = zero_count + sum(sketch.bins.values()) + sum(sketch.negative_bins.values())
+        return sketch
@@ -0,0 +1,194 @@
+import logging
+import os
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+# Octal escapes used by the kernel in mountinfo paths (\040 for space etc.)
+_ESCAPE_RE = re.compile(r"\\([0-7]{3})")
+
+
+def _read(path: str, default: str = "") -> str:
+    try:
+        with open(path) as f:
+            return f.read().strip()
+    except OSError:
+        return default
+
+
+def _read_int(path: str, default: int = 0) -> int:
+    try:
+        return int(_read(path))
+    except ValueError:
+        return default
+
+
+class SysfsDiskReader:
+    """
+    Physical disks and partitions from /sys/block and /proc/self/mountinfo, without lsblk.
+
+    The disk/partition layout is rebuilt only when the set of block devices or their
+    world-wide ids change (a disk swapped for another one under the same name);
+    serial and model are resolved once per device number and layout. Mount points are re-read
+    on every call (a single small file), so mounts and unmounts are seen immediately.
+    Result has the same shape as get_physical_disks() from lsblk.
+    """
+
+    def __init__(self, sys_root: str = "/sys", mountinfo_path: str = "/proc/self/mountinfo",
+                 udev_root: str = "/run/udev/data"):
+        self.sys_root = sys_root
+        self.mountinfo_path = mountinfo_path
+        self.udev_root = udev_root
+        self._signature: Optional[Tuple[Tuple[str, str], ...]] = None
+        self._layout: List[Dict[str, Any]] = []
+        # {"major:minor": (serial, model)}
+        self._identity: Dict[str, Tuple[str, str]] = {}
+
+    @property
+    def available(self) -> bool:
+        return os.path.isdir(os.path.join(self.sys_root, "block"))
+
+    def read(self) -> Tuple[List[Dict[str, Any]], Dict[str, str]]:
+        """Returns (disks, kname_to_serial) like get_physical_disks()"""
+        signature = self._block_signature()
+        if signature != self._signature:
+            self._layout = self._read_layout()
+            self._signature = signature
+            # a replacement disk may get the device number of the removed one
+            self._identity.clear()
+            logging.debug('Block devices changed, %s disks found in sysfs', len(self._layout))
+        mounts = self._read_mounts()
+        devices = []
+        kname_to_serial = {}
+        for disk in self._layout:
+            serial, model = self._get_identity(disk)
+            kname_to_serial[disk['name']] = serial
+            for holder in disk['holders']:
+                kname_to_serial[holder] = serial
+            partitions = []
+            for part in disk['partitions']:
+                kname_to_serial[part['name']] = serial
+                for holder in part['holders']:
+                    kname_to_serial[holder] = serial
+                partitions.append({
+                    "name": part['name'],
+                    "kname": f"/dev/{part['name']}",
+                    "mountpoint": mounts.get(part['dev']),
+                    "size": part['size']
+                })
+            devices.append({
+                "name": disk['name'],
+                "kname": f"/dev/{disk['name']}",
+                "model": model,
+                "serial": serial,
+                "size": disk['size'],
+                "type": disk['type'],
+                "partitions": partitions,
+                "mountpoint": mounts.get(disk['dev']),
+                "kname_short": disk['name'],
+                "removable": disk['removable'],
+                "holders": disk['holders']
+            })
+        return devices, kname_to_serial
+
+    def _block_signature(self) -> Tuple[Tuple[str, str], ...]:
+        """Block device names with the world-wide id of disks (empty for partitions and virtual devices)"""
+        try:
+            names = os.listdir(os.path.join(self.sys_root, "class", "block"))
+        except OSError:
+            names = os.listdir(os.path.join(self.sys_root, "block"))
+        block_dir = os.path.join(self.sys_root, "block")
+        signature = []
+        for name in sorted(names):
+            path = os.path.join(block_dir, name)
+            signature.append((name, _read(os.path.join(path, "wwid")) or _read(os.path.join(path, "device", "wwid"))))
+        return tuple(signature)
+
+    def _read_layout(self) -> List[Dict[str, Any]]:
+        block_dir = os.path.join(self.sys_root, "block")
+        disks = []
+        for name in sorted(os.listdir(block_dir)):
+            path = os.path.join(block_dir, name)
+            # only real hardware: loop, ram, dm and md devices have no backing device
+            if not os.path.exists(os.path.join(path, "device")):
+                continue
+            # optical drives (SCSI type 5), lsblk reports them as "rom"
+            if name.startswith("sr") or _read(os.path.join(path, "device", "type")) == "5":
+                continue
+            rotational = _read(os.path.join(path, "queue", "rotational")) == "1"
+            if name.startswith("nvme"):
+                disk_type = "NVMe"
+            elif rotational:
+                disk_type = "HDD"
+            else:
+                disk_type = "SSD"
+            partitions = []
+            for child in sorted(os.listdir(path)):
+                child_path = os.path.join(path, child)
+                if os.path.exists(os.path.join(child_path, "partition")):
+                    partitions.append({
+                        "name": child,
+                        "dev": _read(os.path.join(child_path, "dev")),
+                        "size": _read_int(os.path.join(child_path, "size")) * 512,
+                        "holders": self._holders(child_path)
+                    })
+            disks.append({
+                "name": name,
+                "path": path,
+                "dev": _read(os.path.join(path, "dev")),
+                "size": _read_int(os.path.join(path, "size")) * 512,
+                "type": disk_type,
+                "removable": _read(os.path.join(path, "removable")) == "1",
+                "partitions": partitions,
+                "holders": self._holders(path)
+            })
+        return disks
+
+    @staticmethod
+    def _holders(path: str) -> List[str]:
+        try:
+            return sorted(os.listdir(os.path.join(path, "holders")))
+        except OSError:
+            return []
+
+    def _get_identity(self, disk: Dict[str, Any]) -> Tuple[str, str]:
+        identity = self._identity.get(disk['dev'])
+        if identity is None:
+            identity = self._identity[disk['dev']] = self._read_identity(disk)
+        return identity
+
+    def _read_identity(self, disk: Dict[str, Any]) -> Tuple[str, str]:
+        """Serial and model: udev database (same source as lsblk), then sysfs attributes"""
+        udev = {}
+        for line in _read(os.path.join(self.udev_root, f"b{disk['dev']}")).splitlines():
+            if line.startswith("E:") and "=" in line:
+                key, _, value = line[2:].partition("=")
+                udev[key] = value
+        device_path = os.path.join(disk['path'], "device")
+        serial = udev.get("ID_SERIAL_SHORT") or _read(os.path.join(device_path, "serial")) \
+            or self._vpd_serial(device_path)
+        model = udev.get("ID_MODEL", "").replace("_", " ") or _read(os.path.join(device_path, "model"))
+        return serial.strip(), model.strip()
+
+    @staticmethod
+    def _vpd_serial(device_path: str) -> str:
+        """Unit serial number VPD page of SCSI/SATA disks: 4 bytes header, then ASCII serial"""
+        try:
+            with open(os.path.join(device_path, "vpd_pg80"), "rb") as f:
+                data = f.read()
+        except OSError:
+            return ""
+        return data[4:].decode("ascii", errors="ignore").strip("\x00 ")
+
+    def _read_mounts(self) -> Dict[str, str]:
+        """{"major:minor": first mount point}"""
+        mounts = {}
+        for line in _read(self.mountinfo_path).splitlines():
+            fields = line.split()
+            if len(fields) < 5:
+                continue
+            mountpoint = _ESCAPE_RE.sub(lambda m: chr(int(m.group(1), 8)), fields[4])
+            mounts.setdefault(fields[2], mountpoint)
+        return mounts
+
+
+sysfs_disks = SysfsDiskReader()
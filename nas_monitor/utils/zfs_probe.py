@@ -0,0 +1,192 @@
+import asyncio
+import os
+import re
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from nas_monitor.utils.commands import run_cmd, is_tool_available
+
+# Headers of special vdev classes in zpool status config
+VDEV_CLASSES = {"logs", "cache", "spares", "special", "dedup"}
+# Vdevs grouping other vdevs/devices
+GROUP_VDEV_RE = re.compile(r"^(raidz[123]?|mirror|draid[123]?|replacing|spare)(?=-|:|$)")
+# sda1 -> sda, nvme0n1p3 -> nvme0n1
+PARTITION_RE = re.compile(r"^(nvme\d+n\d+|mmcblk\d+)p\d+$|^([a-z]+)\d+$")
+
+
+@dataclass
+class ZfsDevice:
+    path: str
+    state: str
+
+    @property
+    def name(self) -> str:
+        return os.path.basename(self.path)
+
+    @property
+    def disk_name(self) -> str:
+        """Kernel name of the whole disk holding this device (partition suffix removed)"""
+        return disk_kname(self.name)
+
+
+@dataclass
+class ZfsVdev:
+    name: str
+    type: str  # raidz1, mirror, draid2, disk...
+    state: str
+    role: str = "data"  # data, logs, cache, spares, special, dedup
+    devices: List[ZfsDevice] = field(default_factory=list)
+
+
+@dataclass
+class ZfsPool:
+    name: str
+    state: str = "UNKNOWN"
+    vdevs: List[ZfsVdev] = field(default_factory=list)
+    used_bytes: Optional[int] = None
+    avail_bytes: Optional[int] = None
+
+    @property
+    def devices(self) -> List[ZfsDevice]:
+        return [device for vdev in self.vdevs for device in vdev.devices]
+
+    def usage(self) -> Dict[str, float]:
+        """Usable space of the root dataset (zfs list), not the raw pool size of zpool list"""
+        if self.used_bytes is None or self.avail_bytes is None:
+            return {}
+        total = self.used_bytes + self.avail_bytes
+        return {
+            "used_bytes": self.used_bytes,
+            "avail_bytes": self.avail_bytes,
+            "total_bytes": total,
+            "used_gb": round(self.used_bytes / (1024**3), 2),
+            "total_gb": round(total / (1024**3), 2),
+            "percent": round((self.used_bytes / total * 100), 1) if total > 0 else 0
+        }
+
+    def serials(self, kname_to_serial: Dict[str, str]) -> List[str]:
+        """Serial numbers of pool member disks, using kname -> serial mapping from lsblk"""
+        serials = set()
+        for device in self.devices:
+            sn = kname_to_serial.get(device.name) or kname_to_serial.get(device.disk_name)
+            if sn:
+                serials.add(sn)
+        return sorted(serials)
+
+
+def disk_kname(name: str) -> str:
+    match = PARTITION_RE.match(name)
+    if not match:
+        return name
+    return match.group(1) or match.group(2)
+
+
+def parse_zfs_list(output: str) -> Dict[str, tuple]:
+    """Parse `zfs list -H -p -o name,used,avail`: {name: (used_bytes, avail_bytes)}"""
+    result = {}
+    for line in output.splitlines():
+        parts = line.split("\t") if "\t" in line else line.split()
+        if len(parts) < 3:
+            continue
+        try:
+            result[parts[0]] = (int(parts[1]), int(parts[2]))
+        except ValueError:
+            continue
+    return result
+
+
+def parse_zpool_status(output: str) -> Dict[str, ZfsPool]:
+    """
+    Parse `zpool status -L -P` of all pools into pool -> vdev -> device model.
+    Tree levels come from indentation of the config section: pool (and class headers
+    like logs/cache on the same level), then vdevs, then devices.
+    """
+    pools: Dict[str, ZfsPool] = {}
+    pool = None
+    in_config = False
+    base_indent = 0
+    role = "data"
+    vdev = None
+    for raw_line in output.splitlines():
+        line = raw_line.expandtabs(8)
+        stripped = line.strip()
+        if stripped.startswith("pool:"):
+            name = stripped.split(":", 1)[1].strip()
+            pool = pools.setdefault(name, ZfsPool(name))
+            in_config = False
+            continue
+        if pool is None:
+            continue
+        if stripped.startswith("state:") and not in_config:
+            pool.state = stripped.split(":", 1)[1].strip()
+            continue
+        if stripped.startswith("config:"):
+            in_config = True
+            role, vdev = "data", None
+            continue
+        if not in_config or not stripped or stripped.startswith("NAME"):
+            continue
+        if stripped.startswith("errors:"):
+            in_config = False
+            continue
+
+        parts = stripped.split()
+        name = parts[0]
+        state = parts[1] if len(parts) > 1 else ""
+        indent = len(line) - len(line.lstrip())
+        if name == pool.name and vdev is None and role == "data":
+            base_indent = indent
+            continue
+        level = (indent - base_indent) // 2
+        if level == 0 and name in VDEV_CLASSES and len(parts) == 1:
+            role, vdev = name, None
+            continue
+        group = GROUP_VDEV_RE.match(name)
+        if level <= 1:
+            if group:
+                vdev = ZfsVdev(name=name, type=group.group(1), state=state, role=role)
+            else:
+                # single device vdev
+                vdev = ZfsVdev(name=name, type="disk", state=state, role=role,
+                               devices=[ZfsDevice(path=name, state=state)])
+            pool.vdevs.append(vdev)
+        elif vdev is not None and not group:
+            # nested replacing/spare groups are flattened into the top level vdev
+            vdev.devices.append(ZfsDevice(path=name, state=state))
+    return pools
+
+
+async def probe_zfs() -> Dict[str, ZfsPool]:
+    """
+    Structure and usage of all pools with a constant number of commands:
+    one `zfs list` for usable space of pool root datasets and one `zpool status` for the vdev tree.
+    """
+    if not is_tool_available("zpool") or not is_tool_available("zfs"):
+        return {}
+    list_output, status_output = await asyncio.gather(
+        run_cmd(["zfs", "list", "-H", "-p", "-d", "0", "-o", "name,used,avail"]),
+        run_cmd(["zpool", "status", "-L", "-P"])
+    )
+    pools = parse_zpool_status(status_output)
+    for name, (used, avail) in parse_zfs_list(list_output).items():
+        pool = pools.setdefault(name, ZfsPool(name))
+        pool.used_bytes = used
+        pool.avail_bytes = avail
+    return pools
+
+
+def device_pool_map(pools: Dict[str, ZfsPool]) -> Dict[str, str]:
+    """
+    {device alias: pool name} for matching disks found by other tools:
+    device path, kernel name, whole disk name and NVMe controller (as in `smartctl --scan`).
+    """
+    mapping = {}
+    for pool in pools.values():
+        for device in pool.devices:
+            aliases = {device.path, device.name, device.disk_name, f"/dev/{device.disk_name}"}
+            controller = re.match(r"^(nvme\d+)n\d+$", device.disk_name)
+            if controller:
+                aliases.update({controller.group(1), f"/dev/{controller.group(1)}"})
+            for alias in aliases:
+                mapping[alias] = pool.name
+    return mapping
@@ -0,0 +1,195 @@
+import asyncio
+import logging
+import os
+import time
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from nas_monitor.utils.commands import is_tool_available
+from nas_monitor.utils.procfs import ProcFile
+
+ARCSTATS_PATH = "/proc/spl/kstat/zfs/arcstats"
+# A dead iostat process is not restarted more often than this
+RESTART_SECONDS = 60
+
+
+class ArcStats:
+    """
+    ZFS ARC counters from the arcstats kstat, kept open like other procfs files.
+    Hit ratios are computed from counter deltas since the previous read, not since boot.
+    """
+
+    def __init__(self, path: str = ARCSTATS_PATH):
+        self._file = ProcFile(path, size=16384)
+        self._prev: Optional[Dict[str, int]] = None
+
+    @property
+    def available(self) -> bool:
+        return os.path.exists(self._file.path)
+
+    def read(self) -> Dict[str, int]:
+        """{name: value} of all numeric kstat rows"""
+        stats = {}
+        # header line, then "name type data" column titles
+        for line in self._file.read().split(b"\n")[2:]:
+            fields = line.split()
+            if len(fields) != 3:
+                continue
+            try:
+                stats[fields[0].decode()] = int(fields[2])
+            except ValueError:
+                continue
+        return stats
+
+    def summary(self) -> Dict[str, float]:
+        """Sizes in GB and hit ratios in percent; ratios are omitted on the first call or without lookups"""
+        stats = self.read()
+        gb = 1024 ** 3
+        result = {
+            "size_gb": round(stats.get("size", 0) / gb, 2),
+            "target_gb": round(stats.get("c", 0) / gb, 2),
+            "max_gb": round(stats.get("c_max", 0) / gb, 2),
+            "mru_gb": round(stats.get("mru_size", 0) / gb, 2),
+            "mfu_gb": round(stats.get("mfu_size", 0) / gb, 2),
+            "l2_size_gb": round(stats.get("l2_size", 0) / gb, 2),
+        }
+        if self._prev is not None:
+            for label, hits, misses in (("hit_ratio", "hits", "misses"), ("l2_hit_ratio", "l2_hits", "l2_misses")):
+                hit_delta = stats.get(hits, 0) - self._prev.get(hits, 0)
+                miss_delta = stats.get(misses, 0) - self._prev.get(misses, 0)
+                # negative deltas mean the module was reloaded
+                if hit_delta >= 0 and miss_delta >= 0 and hit_delta + miss_delta > 0:
+                    result[label] = round(hit_delta / (hit_delta + miss_delta) * 100, 1)
+        self._prev = stats
+        return result
+
+
+@dataclass
+class IostatSample:
+    """One line of `zpool iostat -Hpl`: rates over the last interval, waits in nanoseconds"""
+    read_ops: float
+    write_ops: float
+    read_bytes: float
+    write_bytes: float
+    read_wait_ns: Optional[float] = None
+    write_wait_ns: Optional[float] = None
+
+
+def _number(value: str) -> Optional[float]:
+    return None if value == "-" else float(value)
+
+
+def parse_iostat_line(line: str) -> Optional[Tuple[str, IostatSample]]:
+    """
+    Parse a line of `zpool iostat -H -p -l [-v]`:
+    name, alloc, free, read/write ops, read/write bandwidth, total_wait read/write, then other waits.
+    Section headers (logs, cache) and lines without rates are skipped.
+    """
+    parts = line.rstrip("\n").split("\t")
+    if len(parts) < 7:
+        return None
+    name = parts[0].strip()
+    try:
+        ops_and_bandwidth = [_number(value) for value in parts[3:7]]
+        waits = [_number(value) for value in parts[7:9]]
+    except ValueError:
+        return None
+    if not name or None in ops_and_bandwidth:
+        return None
+    waits += [None] * (2 - len(waits))
+    return name, IostatSample(*ops_and_bandwidth, *waits)
+
+
+class ZpoolIostatStream:
+    """
+    One long-running `zpool iostat -Hplv -y <interval>` for all pools, its output parsed line by line
+    as it arrives, so pool I/O costs no process per tick.
+
+    Script mode output has no tree indentation, so lines are attributed to pools by name:
+    a pool line switches the current pool, the following vdev and device lines belong to it.
+    The process is restarted when the set of pools changes or after it exits.
+    """
+
+    def __init__(self, command: Optional[List[str]] = None):
+        self.command = command
+        self._proc: Optional[asyncio.subprocess.Process] = None
+        self._reader: Optional[asyncio.Task] = None
+        self._pools: frozenset = frozenset()
+        self._started_at: Optional[float] = None
+        # {pool: {name: (monotonic time, sample)}}, pool stats are stored under the pool name
+        self._samples: Dict[str, Dict[str, Tuple[float, IostatSample]]] = {}
+
+    @property
+    def running(self) -> bool:
+        return self._proc is not None and self._proc.returncode is None
+
+    def _command(self, interval: int) -> List[str]:
+        if self.command:
+            return self.command
+        return ["zpool", "iostat", "-H", "-p", "-l", "-v", "-L", "-y", str(interval)]
+
+    async def ensure(self, pools: Iterable[str], interval: int):
+        """Start the stream (or restart it for a changed pool set), dead processes are retried after a delay"""
+        pools = frozenset(pools)
+        if self.running and pools == self._pools:
+            return
+        if not self.running and self._started_at is not None and pools == self._pools \
+                and time.monotonic() - self._started_at < RESTART_SECONDS:
+            return
+        await self.stop()
+        if not pools or (self.command is None and not is_tool_available("zpool")):
+            return
+        self._pools = pools
+        self._started_at = time.monotonic()
+        try:
+            self._proc = await asyncio.create_subprocess_exec(
+                *self._command(interval),
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.DEVNULL
+            )
+        except OSError as e:
+            logging.warning('Cannot start zpool iostat: %s', e)
+            return
+        self._reader = asyncio.create_task(self._read(self._proc))
+
+    async def _read(self, proc: asyncio.subprocess.Process):
+        pool = None
+        async for raw_line in proc.stdout:
+            parsed = parse_iostat_line(raw_line.decode(errors="replace"))
+            if parsed is None:
+                continue
+            name, sample = parsed
+            if name in self._pools:
+                pool = name
+            if pool is not None:
+                self._samples.setdefault(pool, {})[name] = (time.monotonic(), sample)
+        await proc.wait()
+        logging.warning('zpool iostat exited with code %s', proc.returncode)
+
+    def latest(self, max_age: float) -> Dict[str, Dict[str, IostatSample]]:
+        """{pool: {name: sample}} of samples received within max_age seconds, pool totals under the pool name"""
+        now = time.monotonic()
+        result = {}
+        for pool, samples in self._samples.items():
+            fresh = {name: sample for name, (ts, sample) in samples.items() if now - ts <= max_age}
+            if fresh:
+                result[pool] = fresh
+        return result
+
+    async def stop(self):
+        if self._proc is not None and self._proc.returncode is None:
+            self._proc.kill()
+            await self._proc.wait()
+        if self._reader is not None:
+            self._reader.cancel()
+            try:
+                await self._reader
+            except (asyncio.CancelledError, Exception):
+                pass
+        self._proc = None
+        self._reader = None
+        self._samples.clear()
+
+
+arc_stats = ArcStats()
+zpool_iostat = ZpoolIostatStream()